@@ -0,0 +1,107 @@
+"""
+Compares ingestion and read throughput of SQLite under two engine profiles.
+
+- baseline: SQLite defaults (rollback journal, synchronous=FULL, 2 MB page cache)
+- tuned: the profile in `Settings` (WAL, synchronous=NORMAL, 64 MB page cache)
+
+Each profile gets a fresh database file. Ingestion stores one commit per ticker through
+`upsert_stocks_from_dataframe`; the read workload runs concurrent per-ticker range queries.
+
+Usage:
+    python -m benchmarks.engine_profile [--tickers 20] [--bars 2500] [--reads 2000] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./dev.db")
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker  # noqa: E402
+from sqlmodel import SQLModel, select  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+from src.backend.config import Settings, settings  # noqa: E402
+from src.backend.database import create_engine  # noqa: E402
+from src.backend.models.price import StockPrice  # noqa: E402
+from src.backend.services import stock_service  # noqa: E402
+
+PROFILES: dict[str, dict[str, Any]] = {
+    "baseline": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_CACHE_SIZE": -2_000,
+        "SQLITE_BUSY_TIMEOUT_MS": None,
+    },
+    "tuned": {},
+}
+
+
+async def ingest(engine: AsyncEngine, tickers: int, bars: int) -> float:
+    session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    frames = {f"T{i:04d}": synthetic.ohlcv_frame(bars, seed=i) for i in range(tickers)}
+    started = time.perf_counter()
+    for ticker, frame in frames.items():
+        async with session_maker() as session:
+            await stock_service.upsert_stocks_from_dataframe(session=session, df=frame, ticker=ticker)
+            await session.commit()
+    return tickers * bars / (time.perf_counter() - started)
+
+
+async def read(engine: AsyncEngine, tickers: int, reads: int, concurrency: int) -> float:
+    session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    rng = np.random.default_rng(0)
+    stock_ids = rng.integers(1, tickers + 1, reads)
+
+    async def worker(ids: np.ndarray) -> None:
+        async with session_maker() as session:
+            for stock_id in ids:
+                statement = select(StockPrice.time, StockPrice.close).where(StockPrice.stock_info_id == int(stock_id))
+                (await session.execute(statement.order_by(StockPrice.time))).all()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(chunk) for chunk in np.array_split(stock_ids, concurrency)))
+    return reads / (time.perf_counter() - started)
+
+
+async def run_profile(name: str, directory: Path, args: argparse.Namespace) -> dict[str, float]:
+    profile = Settings.model_validate({**settings.model_dump(), **PROFILES[name]})
+    engine = create_engine(f"sqlite+aiosqlite:///{directory / f'{name}.db'}", profile=profile)
+    # The services read the global settings; keep the columnar store out of the read numbers
+    original_store = settings.COLUMNAR_STORE_DIR
+    settings.COLUMNAR_STORE_DIR = None
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        return {
+            "ingest_rows_per_s": await ingest(engine, args.tickers, args.bars),
+            "reads_per_s": await read(engine, args.tickers, args.reads, args.concurrency),
+        }
+    finally:
+        settings.COLUMNAR_STORE_DIR = original_store
+        await engine.dispose()
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        results = {name: await run_profile(name, Path(directory), args) for name in PROFILES}
+    print(f"{'profile':<10} {'ingest rows/s':>15} {'reads/s':>10}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['ingest_rows_per_s']:>15,.0f} {result['reads_per_s']:>10,.0f}")
+    for metric in ("ingest_rows_per_s", "reads_per_s"):
+        print(f"{metric}: x{results['tuned'][metric] / results['baseline'][metric]:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
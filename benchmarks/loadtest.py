@@ -0,0 +1,353 @@
+"""
+Async HTTP load test of the API.
+
+Virtual users (`concurrency` asyncio tasks) loop until the scenario's duration is over,
+each picking an operation by its weight and waiting for the response before the next one:
+
+- dashboard: a portfolio summary, holdings, profit/loss or indicator read of a random user or ticker
+- robot_poll: the robot's stock list or one ticker with its prices
+- transaction_write: a buy recorded through POST /stock/transaction/
+- download: POST /stock/download, served by a deterministic fake price source
+
+Targets:
+
+- asgi (default): the app in this process through httpx's ASGI transport; no network
+- uvicorn: the app served by uvicorn on a local port in this process
+- an http(s) URL: an already running server, used as is. Its data is not seeded, and its
+  downloads reach its real price source, so give `download` a weight of 0.
+
+The asgi and uvicorn targets run on a temporary SQLite file (or --database-url), seeded
+with synthetic prices and ledgers. Requests made during warm-up are not reported.
+SQLite serializes writers, so at higher concurrency its writes fail with "database is
+locked"; measure release candidates against PostgreSQL with --database-url.
+
+Usage:
+    python -m benchmarks.loadtest [--scenario benchmarks/scenarios/release.yaml] [--target asgi]
+        [--duration 60] [--concurrency 32] [--output loadtest.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import yaml
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./dev.db")
+
+import httpx  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+from src.backend.api import stock_api  # noqa: E402
+from src.backend.config import settings  # noqa: E402
+from src.backend.database import create_engine, get_db, get_read_db, init_db, unit_of_work  # noqa: E402
+from src.backend.main import app  # noqa: E402
+from src.backend.services import lot_service  # noqa: E402
+
+DEFAULT_SCENARIO = Path(__file__).parent / "scenarios" / "release.yaml"
+# Seeded bars end here; downloads ask for windows around it, so some bars are new and most are not
+SEED_END = date(2025, 6, 30)
+
+
+# ----------------------------
+# Fake price source
+# ----------------------------
+class FakePriceSource:
+    """
+    Stands in for `yfinance.download`: the same ticker and day always yield the same bar.
+    """
+
+    def __init__(self, origin: date = date(2015, 1, 1)) -> None:
+        self.origin = origin
+
+    def frame(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        """
+        Business-day bars with `start <= day < end`, like yfinance's exclusive end.
+        """
+        periods = len(pd.bdate_range(self.origin, end - timedelta(days=1)))
+        frame = synthetic.ohlcv_frame(periods, start=str(self.origin), seed=sum(ticker.encode()), ticker=ticker)
+        return frame[frame.index >= pd.Timestamp(start, tz="UTC")]
+
+    def download(self, ticker: str, start: str, end: str, **kwargs: Any) -> pd.DataFrame:
+        return self.frame(ticker, date.fromisoformat(start), date.fromisoformat(end))
+
+
+# ----------------------------
+# Scenario and operations
+# ----------------------------
+@dataclass
+class Scenario:
+    duration_s: float
+    warmup_s: float
+    concurrency: int
+    data: dict[str, int]
+    operations: dict[str, float]
+
+    @classmethod
+    def load(cls, path: Path) -> "Scenario":
+        raw = yaml.safe_load(path.read_text())
+        unknown = set(raw["operations"]) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unknown operations in {path}: {', '.join(sorted(unknown))}")
+        return cls(
+            duration_s=float(raw["duration_s"]),
+            warmup_s=float(raw.get("warmup_s", 0)),
+            concurrency=int(raw["concurrency"]),
+            data=raw["data"],
+            operations={name: float(weight) for name, weight in raw["operations"].items() if weight > 0},
+        )
+
+    @property
+    def tickers(self) -> list[str]:
+        return [f"LT{i:03d}" for i in range(self.data["tickers"])]
+
+
+Operation = Callable[[httpx.AsyncClient, Scenario, random.Random], Awaitable[httpx.Response]]
+
+
+async def dashboard(client: httpx.AsyncClient, scenario: Scenario, rng: random.Random) -> httpx.Response:
+    user_id = rng.randint(1, scenario.data["users"])
+    path = rng.choice(
+        [
+            f"/stock/portfolio/{user_id}/summary",
+            f"/stock/holding/user/{user_id}",
+            f"/stock/pnl/user/{user_id}",
+            f"/stock/indicators/{rng.choice(scenario.tickers)}?names=sma,rsi,macd",
+        ]
+    )
+    return await client.get(path)
+
+
+async def robot_poll(client: httpx.AsyncClient, scenario: Scenario, rng: random.Random) -> httpx.Response:
+    if rng.random() < 0.5:
+        return await client.get("/robot/robot/stocks/")
+    return await client.get(f"/robot/robot/stocks/{rng.choice(scenario.tickers)}")
+
+
+async def transaction_write(client: httpx.AsyncClient, scenario: Scenario, rng: random.Random) -> httpx.Response:
+    ticker_index = rng.randrange(len(scenario.tickers))
+    price = round(rng.uniform(50, 150), 2)
+    quantity = rng.randint(1, 10)
+    payload = {
+        "user_id": rng.randint(1, scenario.data["users"]),
+        "stock_info_id": ticker_index + 1,
+        "ticker": scenario.tickers[ticker_index],
+        "transaction_date": datetime.now(timezone.utc).isoformat(),
+        "brokerage": "LoadTest",
+        "transaction_type": lot_service.BUY,
+        "transaction_price": price,
+        "quantity": quantity,
+        "total_amount": price * quantity,
+    }
+    return await client.post("/stock/transaction/", json=payload)
+
+
+async def download(client: httpx.AsyncClient, scenario: Scenario, rng: random.Random) -> httpx.Response:
+    start = SEED_END - timedelta(days=rng.randint(0, 10))
+    end = SEED_END + timedelta(days=rng.randint(1, 30))
+    payload = {"ticker": rng.choice(scenario.tickers), "start": start.isoformat(), "end": end.isoformat()}
+    return await client.post("/stock/download", json=payload)
+
+
+OPERATIONS: dict[str, Operation] = {
+    "dashboard": dashboard,
+    "robot_poll": robot_poll,
+    "transaction_write": transaction_write,
+    "download": download,
+}
+
+
+# ----------------------------
+# Running and reporting
+# ----------------------------
+@dataclass
+class Samples:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    error_examples: list[str] = field(default_factory=list)
+
+    def record(self, operation: str, latency: float, error: str | None) -> None:
+        self.latencies[operation].append(latency)
+        if error is not None:
+            self.errors[operation] += 1
+            if len(self.error_examples) < 10:
+                self.error_examples.append(f"{operation}: {error}")
+
+
+async def virtual_user(
+    client: httpx.AsyncClient, scenario: Scenario, seed: int, measure_from: float, until: float, samples: Samples
+) -> None:
+    rng = random.Random(seed)
+    names, weights = list(scenario.operations), list(scenario.operations.values())
+    while time.perf_counter() < until:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        error = None
+        try:
+            response = await OPERATIONS[name](client, scenario, rng)
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code} {response.request.url.path}"
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+        if started >= measure_from:
+            samples.record(name, time.perf_counter() - started, error)
+
+
+def summarize(samples: Samples, duration_s: float) -> dict[str, dict[str, float]]:
+    def stats(latencies: list[float], errors: int) -> dict[str, float]:
+        ms = np.array(latencies) * 1000
+        return {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / duration_s, 2),
+            "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+            "p50_ms": round(float(np.percentile(ms, 50)), 2) if latencies else 0.0,
+            "p90_ms": round(float(np.percentile(ms, 90)), 2) if latencies else 0.0,
+            "p99_ms": round(float(np.percentile(ms, 99)), 2) if latencies else 0.0,
+            "max_ms": round(float(ms.max()), 2) if latencies else 0.0,
+        }
+
+    report = {name: stats(values, samples.errors[name]) for name, values in sorted(samples.latencies.items())}
+    report["total"] = stats(
+        [latency for values in samples.latencies.values() for latency in values], sum(samples.errors.values())
+    )
+    return report
+
+
+async def run_load(client: httpx.AsyncClient, scenario: Scenario) -> tuple[dict[str, dict[str, float]], Samples]:
+    samples = Samples()
+    started = time.perf_counter()
+    measure_from = started + scenario.warmup_s
+    until = measure_from + scenario.duration_s
+    await asyncio.gather(
+        *(virtual_user(client, scenario, seed, measure_from, until, samples) for seed in range(scenario.concurrency))
+    )
+    return summarize(samples, scenario.duration_s), samples
+
+
+async def seed(session_maker: async_sessionmaker[AsyncSession], scenario: Scenario, source: FakePriceSource) -> None:
+    """
+    Stores the scenario's tickers with `bars` bars each, and a ledger per user over them.
+    """
+    first_day = SEED_END - timedelta(days=int(scenario.data["bars"] * 7 / 5))
+    frames = {ticker: source.frame(ticker, first_day, SEED_END + timedelta(days=1)) for ticker in scenario.tickers}
+    await synthetic.populate(
+        session_maker,
+        frames,
+        users=scenario.data["users"],
+        transactions_per_user=scenario.data["transactions_per_user"],
+    )
+
+
+async def serve_with_uvicorn(run: Callable[[str], Awaitable[Any]]) -> Any:
+    """
+    Serves the app with uvicorn on a free local port for the duration of `run(base_url)`.
+    """
+    import socket
+
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        return await run(f"http://127.0.0.1:{port}")
+    finally:
+        server.should_exit = True
+        await task
+
+
+async def main(args: argparse.Namespace) -> None:
+    scenario = Scenario.load(args.scenario)
+    if args.duration is not None:
+        scenario.duration_s = args.duration
+    if args.concurrency is not None:
+        scenario.concurrency = args.concurrency
+    limits = httpx.Limits(max_connections=scenario.concurrency)
+
+    async def against(base_url: str, transport: httpx.AsyncBaseTransport | None = None) -> Any:
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=60) as client:
+            return await run_load(client, scenario)
+
+    if args.target not in ("asgi", "uvicorn"):
+        report, samples = await against(args.target)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(args.database_url or f"sqlite+aiosqlite:///{directory}/loadtest.db")
+            session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            source = FakePriceSource()
+
+            async def session_override() -> AsyncGenerator[AsyncSession, None]:
+                async with unit_of_work(session_maker) as session:
+                    yield session
+
+            app.dependency_overrides[get_db] = session_override
+            app.dependency_overrides[get_read_db] = session_override
+            original_store = settings.COLUMNAR_STORE_DIR
+            settings.COLUMNAR_STORE_DIR = Path(directory) / "columnar"
+            try:
+                await init_db(engine)
+                print(f"Seeding {scenario.data['tickers']} tickers and {scenario.data['users']} users...")
+                await seed(session_maker, scenario, source)
+                with mock.patch.object(stock_api, "yf", SimpleNamespace(download=source.download)):
+                    if args.target == "asgi":
+                        report, samples = await against(
+                            # Unhandled exceptions become 500 responses, as behind a real server
+                            "http://loadtest",
+                            httpx.ASGITransport(app=app, raise_app_exceptions=False),
+                        )
+                    else:
+                        report, samples = await serve_with_uvicorn(against)
+            finally:
+                settings.COLUMNAR_STORE_DIR = original_store
+                app.dependency_overrides.clear()
+                await engine.dispose()
+
+    print(f"\n{scenario.concurrency} virtual users for {scenario.duration_s:g}s against {args.target}")
+    print(f"{'operation':<18} {'requests':>9} {'req/s':>9} {'errors':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for name, row in report.items():
+        print(
+            f"{name:<18} {row['requests']:>9} {row['throughput_rps']:>9.1f} {row['error_rate']:>8.2%}"
+            f" {row['p50_ms']:>9.1f} {row['p90_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+        )
+    for example in samples.error_examples:
+        print(f"  error: {example}")
+    if args.output:
+        meta = {
+            "target": args.target,
+            "scenario": str(args.scenario),
+            "concurrency": scenario.concurrency,
+            "duration_s": scenario.duration_s,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        args.output.write_text(
+            json.dumps({"meta": meta, "results": report, "error_examples": samples.error_examples}, indent=2) + "\n"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", type=Path, default=DEFAULT_SCENARIO)
+    parser.add_argument("--target", default="asgi", help="asgi, uvicorn or the base URL of a running server")
+    parser.add_argument("--database-url", help="database of the asgi and uvicorn targets; defaults to a temp SQLite")
+    parser.add_argument("--duration", type=float, help="overrides the scenario's duration_s")
+    parser.add_argument("--concurrency", type=int, help="overrides the scenario's concurrency")
+    parser.add_argument("--output", type=Path, help="where to write the JSON report")
+    asyncio.run(main(parser.parse_args()))
@@ -5,7 +5,7 @@ API routes for robot stock data, simplified for specific automated tasks.
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.backend.database import get_db
+from src.backend.database import get_db, get_read_db
 from src.backend.models.stock import (
     StockInfoCreate,
     StockInfoRead,
@@ -29,7 +29,9 @@ async def create_stock_info_robot(stock_info: StockInfoCreate, db: AsyncSession
 
 
 @stockbot_router.get("/{ticker}", response_model=StockInfoReadWithPrices)
-async def read_stock_info_by_ticker_robot(ticker: str, db: AsyncSession = Depends(get_db)) -> StockInfoReadWithPrices:
+async def read_stock_info_by_ticker_robot(
+    ticker: str, db: AsyncSession = Depends(get_read_db)
+) -> StockInfoReadWithPrices:
     """
     Reads stock info and prices for a given ticker.
     """
@@ -40,7 +42,7 @@ async def read_stock_info_by_ticker_robot(ticker: str, db: AsyncSession = Depend
 
 
 @stockbot_router.get("/", response_model=list[StockInfoRead])
-async def read_all_stock_infos_robot(db: AsyncSession = Depends(get_db)) -> list[StockInfoRead]:
+async def read_all_stock_infos_robot(db: AsyncSession = Depends(get_read_db)) -> list[StockInfoRead]:
     """
     Reads all stock info entries (without prices).
     """
@@ -65,7 +67,7 @@ async def update_stock_info_robot(
 @stockbot_router.delete("/{stock_info_id}", response_model=dict)
 async def delete_stock_info_robot(stock_info_id: int, db: AsyncSession = Depends(get_db)) -> dict[str, bool]:
     """
-    Deletes a stock info entry and all its associated prices.
+    Deletes a stock info entry with all its prices, transactions, holdings, lots and snapshots.
     """
     success = await stock_service.delete_stock_info(session=db, stock_info_id=stock_info_id)
     if not success:
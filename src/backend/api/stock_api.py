@@ -2,17 +2,41 @@
 API routes for stock data.
 """
 
+from datetime import date, datetime, time, timedelta, timezone
+from time import perf_counter
+
 import yfinance as yf
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.backend.database import get_db, reset_db
+from src.backend import metrics
+from src.backend.database import get_db, get_read_db, reset_db
+from src.backend.models.analytics import ReturnStatisticsRead, ReturnStatisticsRequest
+from src.backend.models.backtest import BacktestJobRead, BacktestRequest
+from src.backend.models.corporate_action import (
+    AdjustedPriceRead,
+    StockCorporateActionCreate,
+    StockCorporateActionRead,
+)
+from src.backend.models.coverage import CoverageRepairRead, CoverageRepairRequest, TickerCoverageRead
 from src.backend.models.holding import (
     StockHoldingDetailCreate,
     StockHoldingDetailRead,
     StockHoldingDetailUpdate,
 )
+from src.backend.models.indicator import IndicatorSeriesRead
+from src.backend.models.lot import (
+    StockLotRead,
+    StockProfitLossRead,
+    UserCostBasisSettingRead,
+    UserCostBasisSettingUpdate,
+)
+from src.backend.models.portfolio import PortfolioSummaryRead
+from src.backend.models.risk import ValueAtRiskRead
+from src.backend.models.rolling_stat import StockRollingStatRead
+from src.backend.models.screener import ScreenerMatch
+from src.backend.models.snapshot import StockHoldingAsOfRead
 from src.backend.models.stock import (
     StockInfoCreate,
     StockInfoRead,
@@ -24,7 +48,22 @@ from src.backend.models.transaction import (
     StockTransactionRead,
     StockTransactionUpdate,
 )
-from src.backend.services import stock_service
+from src.backend.services import (
+    analytics_service,
+    backtest_service,
+    columnar_store,
+    corporate_action_service,
+    coverage_service,
+    indicator_service,
+    lot_service,
+    portfolio_service,
+    risk_service,
+    rolling_stats_service,
+    screener_service,
+    snapshot_service,
+    stock_service,
+    trading_calendar,
+)
 
 router = APIRouter(prefix="/stock", tags=["stock"])
 
@@ -43,7 +82,7 @@ async def create_stock_info(stock_info: StockInfoCreate, db: AsyncSession = Depe
 
 
 @router.get("/info/id/{stock_info_id}", response_model=StockInfoReadWithPrices)
-async def read_stock_info(stock_info_id: int, db: AsyncSession = Depends(get_db)) -> StockInfoReadWithPrices:
+async def read_stock_info(stock_info_id: int, db: AsyncSession = Depends(get_read_db)) -> StockInfoReadWithPrices:
     """
     Reads a stock info entry by its ID, including all associated price data.
     """
@@ -54,7 +93,7 @@ async def read_stock_info(stock_info_id: int, db: AsyncSession = Depends(get_db)
 
 
 @router.get("/info/ticker/{ticker}", response_model=StockInfoReadWithPrices)
-async def read_stock_info_by_ticker(ticker: str, db: AsyncSession = Depends(get_db)) -> StockInfoReadWithPrices:
+async def read_stock_info_by_ticker(ticker: str, db: AsyncSession = Depends(get_read_db)) -> StockInfoReadWithPrices:
     """
     Reads a stock info entry by its ticker, including all associated price data.
     """
@@ -65,7 +104,7 @@ async def read_stock_info_by_ticker(ticker: str, db: AsyncSession = Depends(get_
 
 
 @router.get("/info/", response_model=list[StockInfoRead])
-async def read_all_stock_infos(db: AsyncSession = Depends(get_db)) -> list[StockInfoRead]:
+async def read_all_stock_infos(db: AsyncSession = Depends(get_read_db)) -> list[StockInfoRead]:
     """
     Reads all stock info entries, without price data for performance.
     """
@@ -90,7 +129,7 @@ async def update_stock_info(
 @router.delete("/info/{stock_info_id}", response_model=dict)
 async def delete_stock_info(stock_info_id: int, db: AsyncSession = Depends(get_db)) -> dict[str, bool]:
     """
-    Deletes a stock info entry and all its associated price data.
+    Deletes a stock info entry with all its prices, transactions, holdings, lots and snapshots.
     """
     success = await stock_service.delete_stock_info(session=db, stock_info_id=stock_info_id)
     if not success:
@@ -98,6 +137,79 @@ async def delete_stock_info(stock_info_id: int, db: AsyncSession = Depends(get_d
     return {"ok": True}
 
 
+@router.delete("/price/", response_model=dict)
+async def purge_stock_prices(
+    start: datetime,
+    end: datetime,
+    tickers: list[str] | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> dict[str, int]:
+    """
+    Deletes the stored prices with start <= time < end, across all tickers or only the given ones.
+    """
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    deleted = await stock_service.purge_stock_prices(session=db, start=start, end=end, tickers=tickers)
+    return {"deleted": deleted}
+
+
+@router.get("/price/adjusted/{ticker}", response_model=list[AdjustedPriceRead])
+async def read_adjusted_prices(
+    ticker: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: AsyncSession = Depends(get_read_db),
+) -> list[AdjustedPriceRead]:
+    """
+    Reads a ticker's bars adjusted for the splits and dividends recorded after each bar.
+    """
+    prices = await corporate_action_service.get_adjusted_prices(session=db, ticker=ticker, start=start, end=end)
+    if prices is None:
+        raise HTTPException(status_code=404, detail=f"Stock info with ticker '{ticker}' not found")
+    return prices
+
+
+# -------------------------
+# Corporate Action Endpoints
+# -------------------------
+@router.post("/corporate-action/", response_model=StockCorporateActionRead)
+async def create_corporate_action(
+    action: StockCorporateActionCreate, db: AsyncSession = Depends(get_db)
+) -> StockCorporateActionRead:
+    """
+    Records a split or dividend; adjusted prices pick it up without rewriting stored bars.
+    """
+    try:
+        db_action = await corporate_action_service.create_corporate_action(session=db, action=action)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if db_action is None:
+        raise HTTPException(status_code=404, detail="Stock info not found")
+    return StockCorporateActionRead.model_validate(db_action)
+
+
+@router.get("/corporate-action/ticker/{ticker}", response_model=list[StockCorporateActionRead])
+async def read_corporate_actions(
+    ticker: str, db: AsyncSession = Depends(get_read_db)
+) -> list[StockCorporateActionRead]:
+    """
+    Reads the recorded splits and dividends of a ticker, oldest first.
+    """
+    actions = await corporate_action_service.get_corporate_actions(session=db, ticker=ticker)
+    return [StockCorporateActionRead.model_validate(action) for action in actions]
+
+
+@router.delete("/corporate-action/{action_id}", response_model=dict)
+async def delete_corporate_action(action_id: int, db: AsyncSession = Depends(get_db)) -> dict[str, bool]:
+    """
+    Deletes a recorded split or dividend.
+    """
+    success = await corporate_action_service.delete_corporate_action(session=db, action_id=action_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Corporate action not found")
+    return {"ok": True}
+
+
 # -------------------------
 # StockTransaction Endpoints
 # -------------------------
@@ -113,7 +225,7 @@ async def create_stock_transaction(
 
 
 @router.get("/transaction/{transaction_id}", response_model=StockTransactionRead)
-async def read_stock_transaction(transaction_id: int, db: AsyncSession = Depends(get_db)) -> StockTransactionRead:
+async def read_stock_transaction(transaction_id: int, db: AsyncSession = Depends(get_read_db)) -> StockTransactionRead:
     """
     Reads a stock transaction entry by its ID.
     """
@@ -124,7 +236,9 @@ async def read_stock_transaction(transaction_id: int, db: AsyncSession = Depends
 
 
 @router.get("/transaction/user/{user_id}", response_model=list[StockTransactionRead])
-async def read_user_stock_transactions(user_id: int, db: AsyncSession = Depends(get_db)) -> list[StockTransactionRead]:
+async def read_user_stock_transactions(
+    user_id: int, db: AsyncSession = Depends(get_read_db)
+) -> list[StockTransactionRead]:
     """
     Reads all stock transaction entries for a specific user.
     """
@@ -172,7 +286,7 @@ async def create_stock_holding_detail(
 
 
 @router.get("/holding/{holding_id}", response_model=StockHoldingDetailRead)
-async def read_stock_holding_detail(holding_id: int, db: AsyncSession = Depends(get_db)) -> StockHoldingDetailRead:
+async def read_stock_holding_detail(holding_id: int, db: AsyncSession = Depends(get_read_db)) -> StockHoldingDetailRead:
     """
     Reads a stock holding detail entry by its ID.
     """
@@ -184,7 +298,7 @@ async def read_stock_holding_detail(holding_id: int, db: AsyncSession = Depends(
 
 @router.get("/holding/user/{user_id}", response_model=list[StockHoldingDetailRead])
 async def read_user_stock_holding_details(
-    user_id: int, db: AsyncSession = Depends(get_db)
+    user_id: int, db: AsyncSession = Depends(get_read_db)
 ) -> list[StockHoldingDetailRead]:
     """
     Reads all stock holding detail entries for a specific user.
@@ -194,7 +308,7 @@ async def read_user_stock_holding_details(
 
 @router.get("/holding/user/{user_id}/ticker/{ticker}", response_model=StockHoldingDetailRead)
 async def read_user_stock_holding_detail_by_ticker(
-    user_id: int, ticker: str, db: AsyncSession = Depends(get_db)
+    user_id: int, ticker: str, db: AsyncSession = Depends(get_read_db)
 ) -> StockHoldingDetailRead:
     """
     Reads a stock holding detail entry for a specific user and ticker.
@@ -207,6 +321,18 @@ async def read_user_stock_holding_detail_by_ticker(
     return db_holding_detail
 
 
+@router.get("/holding/user/{user_id}/as-of/{as_of}", response_model=list[StockHoldingAsOfRead])
+async def read_user_holdings_as_of(
+    user_id: int, as_of: date, db: AsyncSession = Depends(get_read_db)
+) -> list[StockHoldingAsOfRead]:
+    """
+    Reads what a user held at the end of a given day, from the nearest holdings snapshot.
+    """
+    # Include every transaction up to the last instant of the day
+    end_of_day = datetime.combine(as_of + timedelta(days=1), time.min, tzinfo=timezone.utc) - timedelta(microseconds=1)
+    return await snapshot_service.get_holdings_as_of(session=db, user_id=user_id, as_of=end_of_day)
+
+
 @router.put("/holding/{holding_id}", response_model=StockHoldingDetailRead)
 async def update_stock_holding_detail(
     holding_id: int, holding_detail: StockHoldingDetailUpdate, db: AsyncSession = Depends(get_db)
@@ -233,6 +359,247 @@ async def delete_stock_holding_detail(holding_id: int, db: AsyncSession = Depend
     return {"ok": True}
 
 
+# --------------------------
+# Cost Basis Endpoints
+# --------------------------
+@router.get("/cost-basis/user/{user_id}", response_model=UserCostBasisSettingRead)
+async def read_user_cost_basis_setting(
+    user_id: int, db: AsyncSession = Depends(get_read_db)
+) -> UserCostBasisSettingRead:
+    """
+    Reads the cost basis method (FIFO or average) used for a user's lots.
+    """
+    method = await lot_service.get_cost_basis_method(session=db, user_id=user_id)
+    return UserCostBasisSettingRead(user_id=user_id, cost_basis_method=method)
+
+
+@router.put("/cost-basis/user/{user_id}", response_model=UserCostBasisSettingRead)
+async def update_user_cost_basis_setting(
+    user_id: int, setting: UserCostBasisSettingUpdate, db: AsyncSession = Depends(get_db)
+) -> UserCostBasisSettingRead:
+    """
+    Changes a user's cost basis method and rebuilds the user's lots with it.
+    """
+    method = await lot_service.set_cost_basis_method(session=db, user_id=user_id, method=setting.cost_basis_method)
+    return UserCostBasisSettingRead(user_id=user_id, cost_basis_method=method)
+
+
+@router.get("/lot/user/{user_id}/ticker/{ticker}", response_model=list[StockLotRead])
+async def read_user_open_lots(user_id: int, ticker: str, db: AsyncSession = Depends(get_read_db)) -> list[StockLotRead]:
+    """
+    Reads the open lots of a user for a ticker, oldest first.
+    """
+    lots = await lot_service.get_open_lots(session=db, user_id=user_id, ticker=ticker)
+    return [StockLotRead.model_validate(lot) for lot in lots]
+
+
+@router.get("/pnl/user/{user_id}", response_model=list[StockProfitLossRead])
+async def read_user_profit_loss(user_id: int, db: AsyncSession = Depends(get_read_db)) -> list[StockProfitLossRead]:
+    """
+    Reads realized and unrealized profit per stock for a user.
+    """
+    return await lot_service.get_user_profit_loss(session=db, user_id=user_id)
+
+
+# --------------------------
+# Portfolio Endpoints
+# --------------------------
+@router.get("/portfolio/{user_id}/summary", response_model=PortfolioSummaryRead)
+async def read_portfolio_summary(user_id: int, db: AsyncSession = Depends(get_read_db)) -> PortfolioSummaryRead:
+    """
+    Reads a user's portfolio totals, per-currency breakdown and per-ticker weights.
+    """
+    return await portfolio_service.get_portfolio_summary(session=db, user_id=user_id)
+
+
+@router.get("/portfolio/{user_id}/var", response_model=ValueAtRiskRead)
+async def read_value_at_risk(
+    user_id: int,
+    confidence: float = Query(default=0.99, gt=0.5, lt=1),
+    horizon_days: int = Query(default=1, ge=1, le=252),
+    paths: int = Query(default=100_000, ge=1000, le=risk_service.MAX_PATHS),
+    lookback: int = Query(default=252, ge=20),
+    seed: int | None = Query(default=None, ge=0),
+    currency: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+) -> ValueAtRiskRead:
+    """
+    Estimates Value-at-Risk and expected shortfall of a user's holdings by Monte Carlo simulation.
+    """
+    try:
+        return await risk_service.get_value_at_risk(
+            session=db,
+            user_id=user_id,
+            confidence=confidence,
+            horizon_days=horizon_days,
+            paths=paths,
+            lookback=lookback,
+            seed=seed,
+            currency=currency,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# --------------------------
+# Indicator Endpoints
+# --------------------------
+@router.get("/indicators/{ticker}", response_model=IndicatorSeriesRead)
+async def read_indicators(
+    ticker: str,
+    names: str = Query(default="sma", description="Comma-separated: sma, ema, rsi, macd, bollinger"),
+    window: int = Query(default=20, ge=2),
+    db: AsyncSession = Depends(get_read_db),
+) -> IndicatorSeriesRead:
+    """
+    Reads technical indicators computed over the stored closes of a ticker.
+    """
+    requested = [name.strip().lower() for name in names.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(indicator_service.INDICATOR_NAMES))
+    if not requested or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown indicators: {', '.join(unknown) or names}")
+    series = await indicator_service.get_indicators(session=db, ticker=ticker, names=requested, window=window)
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"Stock info with ticker '{ticker}' not found")
+    return series
+
+
+# --------------------------
+# Rolling Statistics Endpoints
+# --------------------------
+@router.get("/rolling-stats/", response_model=list[StockRollingStatRead])
+async def read_rolling_stats(
+    tickers: list[str] | None = Query(default=None), db: AsyncSession = Depends(get_read_db)
+) -> list[StockRollingStatRead]:
+    """
+    Reads the precomputed rolling statistics of the given tickers, or of every stock, in one query.
+    """
+    stats = await rolling_stats_service.get_rolling_stats(session=db, tickers=tickers)
+    return [StockRollingStatRead.model_validate(stat) for stat in stats]
+
+
+@router.post("/rolling-stats/rebuild", response_model=dict)
+async def rebuild_rolling_stats(db: AsyncSession = Depends(get_db)) -> dict[str, int]:
+    """
+    Recomputes the rolling statistics of every stock from its stored bars.
+    """
+    count = await rolling_stats_service.rebuild_rolling_stats(session=db)
+    return {"updated": count}
+
+
+# --------------------------
+# Screener Endpoints
+# --------------------------
+@router.get("/screener/", response_model=list[ScreenerMatch])
+async def screen_stock_prices(
+    filter: str = Query(description="e.g. change_percent > 5 AND volume > 1000000"),
+    on: date | None = Query(default=None, description="Screen a single UTC day"),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    tickers: list[str] | None = Query(default=None),
+    limit: int = Query(default=500, ge=1, le=screener_service.MAX_RESULTS),
+    db: AsyncSession = Depends(get_read_db),
+) -> list[ScreenerMatch]:
+    """
+    Reads the stored bars matching a filter on one day (`on`) or over start <= time < end.
+    """
+    if on is not None:
+        start = datetime.combine(on, time.min, tzinfo=timezone.utc)
+        end = start + timedelta(days=1)
+    if start is None or end is None:
+        raise HTTPException(status_code=400, detail="Either on, or both start and end, are required")
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    try:
+        return await screener_service.screen(
+            session=db, expression=filter, start=start, end=end, tickers=tickers, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# --------------------------
+# Analytics Endpoints
+# --------------------------
+@router.post("/analytics/returns", response_model=ReturnStatisticsRead)
+async def read_return_statistics(
+    req: ReturnStatisticsRequest, db: AsyncSession = Depends(get_db)
+) -> ReturnStatisticsRead:
+    """
+    Reads daily log-return means, volatilities, covariance and correlation for a set of tickers.
+    """
+    if not req.tickers:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+    if req.window is not None and req.window < 1:
+        raise HTTPException(status_code=400, detail="window must be positive")
+    statistics = await analytics_service.get_return_statistics(session=db, tickers=req.tickers, window=req.window)
+    if statistics is None:
+        raise HTTPException(status_code=404, detail="One or more tickers not found")
+    return statistics
+
+
+# --------------------------
+# Backtest Endpoints
+# --------------------------
+@router.post("/backtest/jobs", response_model=BacktestJobRead, status_code=202)
+async def submit_backtest(req: BacktestRequest, db: AsyncSession = Depends(get_db)) -> BacktestJobRead:
+    """
+    Starts a backtest over a parameter grid; poll the returned job for its results.
+    """
+    try:
+        job = await backtest_service.submit_backtest(session=db, request=req)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Stock info with ticker '{req.ticker}' not found")
+    return job
+
+
+@router.get("/backtest/jobs/{job_id}", response_model=BacktestJobRead)
+async def read_backtest_job(job_id: str, db: AsyncSession = Depends(get_db)) -> BacktestJobRead:
+    """
+    Reads the status of a backtest job and, once done, the summary statistics of every run
+    and the equity curves of the best ones. Jobs are read from the primary, so a job is
+    found right after it is submitted.
+    """
+    job = await backtest_service.get_backtest_job(session=db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    return job
+
+
+# --------------------------
+# Coverage Endpoints
+# --------------------------
+@router.get("/coverage/", response_model=list[TickerCoverageRead])
+async def read_coverage(
+    tickers: list[str] | None = Query(default=None),
+    start: date | None = None,
+    end: date | None = None,
+    timezone: str = "UTC",
+    db: AsyncSession = Depends(get_read_db),
+) -> list[TickerCoverageRead]:
+    """
+    Reports the trading sessions without a stored bar, per ticker, grouped into contiguous gaps.
+    """
+    return await coverage_service.scan_coverage(session=db, tickers=tickers, start=start, end=end, tz=timezone)
+
+
+@router.post("/coverage/repair", response_model=list[CoverageRepairRead])
+async def repair_coverage(req: CoverageRepairRequest, db: AsyncSession = Depends(get_db)) -> list[CoverageRepairRead]:
+    """
+    Downloads and stores the missing ranges found by the coverage scan.
+    """
+    return await coverage_service.repair_gaps(
+        session=db,
+        tickers=req.tickers,
+        start=req.start,
+        end=req.end,
+        auto_adjust=req.auto_adjust,
+        tz=req.timezone,
+    )
+
+
 class DownloadRequest(BaseModel):
     ticker: str
     start: str
@@ -242,6 +609,8 @@ class DownloadRequest(BaseModel):
     name: str | None = None
     market: str | None = None
     currency: str = "USD"
+    # Also fetch dividends and splits; stored as corporate actions when auto_adjust is off
+    actions: bool = False
 
 
 @router.post("/download", response_model=dict)
@@ -249,9 +618,28 @@ async def download_and_store(req: DownloadRequest, db: AsyncSession = Depends(ge
     """
     Downloads historical stock data from yfinance and stores it in the database.
     Creates StockInfo if it doesn't exist, and adds new StockPrice entries.
-    """
-    df = yf.download(req.ticker, start=req.start, end=req.end, auto_adjust=req.auto_adjust)
-    if df is None or len(df) == 0:
+    Ranges without a trading session of the market, or of the stored stock's market when the
+    request names none, are not requested at all.
+    """
+    try:
+        first_day = date.fromisoformat(req.start)
+        # yfinance's end date is exclusive
+        last_day = date.fromisoformat(req.end) - timedelta(days=1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be YYYY-MM-DD dates")
+    stored = await stock_service.get_stock_info_summary_by_ticker(session=db, ticker=req.ticker)
+    # A re-download without a market uses the stored stock's exchange calendar
+    market = req.market if req.market is not None or stored is None else stored.market
+    if not trading_calendar.get_calendar(market).has_session(first_day, last_day):
+        return {"saved": 0}
+    started = perf_counter()
+    df = yf.download(req.ticker, start=req.start, end=req.end, auto_adjust=req.auto_adjust, actions=req.actions)
+    elapsed = perf_counter() - started
+    received = df is not None and len(df) > 0
+    # Arbitrary tickers share one label, so requests for unknown symbols cannot grow the series
+    known = received or stored is not None
+    metrics.DOWNLOAD_DURATION.observe(elapsed, ticker=req.ticker if known else metrics.OTHER_LABEL)
+    if not received:
         return {"saved": 0}
     saved_count = await stock_service.upsert_stocks_from_dataframe(
         session=db,
@@ -272,4 +660,9 @@ async def reset_database() -> dict[str, bool]:
     Resets the entire database by dropping and recreating all tables.
     """
     await reset_db()
+    columnar_store.invalidate()
+    indicator_service.invalidate()
+    analytics_service.invalidate()
+    corporate_action_service.invalidate()
+    risk_service.invalidate()
     return {"ok": True}
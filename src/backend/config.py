@@ -1,10 +1,14 @@
 import os
 from pathlib import Path
+from typing import Literal
 
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Path to the directory containing this config.py file (src/backend)
 CONFIG_DIR = Path(__file__).resolve().parent
+# Repository root, for data directories that must not depend on the working directory
+PROJECT_DIR = CONFIG_DIR.parents[1]
 
 
 # src/backend/config.py
@@ -12,10 +16,47 @@ CONFIG_DIR = Path(__file__).resolve().parent
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Debug mode: responses report their SQL statement count, DB time and repeated statements in X-DB-* headers
+    DEBUG: bool = False
     TEST_DATABASE_URL: str | None = None
+    # Read-only replicas of DATABASE_URL, e.g. '["postgresql+asyncpg://replica1/db"]'; GET routes read from them
+    DATABASE_REPLICA_URLS: list[str] = []
+
+    # Engine profile. Pool settings apply to file and server databases, not in-memory SQLite.
+    DB_ECHO: bool | Literal["debug"] = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 keeps connections forever
+    DB_POOL_PRE_PING: bool = True
+    # Compiled-SQL cache of SQLAlchemy, and the prepared statement cache of each asyncpg connection
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # PRAGMAs run on every new SQLite connection; None leaves SQLite's default
+    SQLITE_JOURNAL_MODE: str | None = "WAL"
+    SQLITE_SYNCHRONOUS: str | None = "NORMAL"
+    SQLITE_CACHE_SIZE: int | None = -64_000  # negative = KiB, i.e. 64 MB per connection
+    SQLITE_BUSY_TIMEOUT_MS: int | None = 5_000
+
+    # PostgreSQL only: range-partition stockprice by time, "year" for daily bars or "month" for intraday
+    # bars. Applies when the table is created; None keeps a single table.
+    STOCKPRICE_PARTITION_INTERVAL: Literal["year", "month"] | None = None
+    # Future partitions created at startup, beyond the current one
+    STOCKPRICE_PARTITIONS_AHEAD: int = 2
+
+    # CPU-bound work (backtests, simulations) runs in this many worker processes; None = CPU count
+    PROCESS_POOL_WORKERS: int | None = None
+    # Memory-mapped price columns shared by all workers; None reads every series from the database.
+    # Relative paths are resolved against the repository root, so every worker uses the same directory.
+    COLUMNAR_STORE_DIR: Path | None = PROJECT_DIR / "data" / "columnar"
 
     model_config = SettingsConfigDict(env_file=CONFIG_DIR / ".env", env_prefix="")
 
+    @field_validator("COLUMNAR_STORE_DIR")
+    @classmethod
+    def _resolve_store_dir(cls, value: Path | None) -> Path | None:
+        return None if value is None else (PROJECT_DIR / value).resolve()
+
     @property
     def EFFECTIVE_DATABASE_URL(self) -> str:
         # pytest 실행 중이고 TEST_DATABASE_URL이 존재하면 그걸 사용
@@ -23,6 +64,13 @@ class Settings(BaseSettings):
             return self.TEST_DATABASE_URL
         return self.DATABASE_URL
 
+    @property
+    def EFFECTIVE_DATABASE_REPLICA_URLS(self) -> list[str]:
+        # Tests always read from the test database
+        if os.getenv("PYTEST_CURRENT_TEST") and self.TEST_DATABASE_URL:
+            return []
+        return self.DATABASE_REPLICA_URLS
+
 
 # Create a single instance of the settings to be used throughout the application
 settings = Settings()
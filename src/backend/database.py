@@ -1,19 +1,74 @@
-from collections.abc import AsyncGenerator
+import itertools
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session
 from sqlmodel import SQLModel
 
-from src.backend.config import settings
+from src.backend.config import Settings, settings
+from src.backend.metrics import TimedAsyncAdaptedQueuePool, instrument_engine
+from src.backend.migrations import run_migrations
 
-engine: AsyncEngine = create_async_engine(
-    settings.EFFECTIVE_DATABASE_URL,
-    echo=True,
-)
+
+def _sqlite_pragmas(profile: Settings) -> list[str]:
+    pragmas = {
+        "journal_mode": profile.SQLITE_JOURNAL_MODE,
+        "synchronous": profile.SQLITE_SYNCHRONOUS,
+        "cache_size": profile.SQLITE_CACHE_SIZE,
+        "busy_timeout": profile.SQLITE_BUSY_TIMEOUT_MS,
+    }
+    return [f"PRAGMA {name}={value}" for name, value in pragmas.items() if value is not None]
+
+
+def create_engine(url: str, profile: Settings = settings, **kwargs: Any) -> AsyncEngine:
+    """
+    Creates an async engine configured by the engine profile in `profile`.
+    Extra keyword arguments are passed to `create_async_engine` and take precedence.
+    """
+    database_url = make_url(url)
+    options: dict[str, Any] = {
+        "echo": profile.DB_ECHO,
+        "pool_pre_ping": profile.DB_POOL_PRE_PING,
+        "query_cache_size": profile.DB_QUERY_CACHE_SIZE,
+    }
+    if not (database_url.get_backend_name() == "sqlite" and database_url.database in (None, "", ":memory:")):
+        options.update(
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_size=profile.DB_POOL_SIZE,
+            max_overflow=profile.DB_MAX_OVERFLOW,
+            pool_timeout=profile.DB_POOL_TIMEOUT,
+            pool_recycle=profile.DB_POOL_RECYCLE,
+        )
+    if database_url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": profile.DB_STATEMENT_CACHE_SIZE}
+    options.update(kwargs)
+    async_engine = create_async_engine(database_url, **options)
+    instrument_engine(async_engine)
+
+    if database_url.get_backend_name() == "sqlite":
+        pragmas = _sqlite_pragmas(profile)
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def apply_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return async_engine
+
+
+engine: AsyncEngine = create_engine(settings.EFFECTIVE_DATABASE_URL)
 
 async_session_maker = async_sessionmaker(
     bind=engine,
@@ -21,22 +76,128 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+replica_engines: list[AsyncEngine] = [create_engine(url) for url in settings.EFFECTIVE_DATABASE_REPLICA_URLS]
+replica_session_makers = [
+    async_sessionmaker(
+        bind=replica,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        info={"replica": True, "primary": async_session_maker},
+    )
+    for replica in replica_engines
+]
+_next_replica = itertools.cycle(replica_session_makers)
+
+# The read-write session of the current request, if it has one
+_primary_session: ContextVar[AsyncSession | None] = ContextVar("primary_session", default=None)
+
+
+def is_replica(session: AsyncSession) -> bool:
+    """
+    Whether a session reads from a replica, whose data may lag behind the primary.
+    """
+    return bool(session.info.get("replica"))
+
+
+@asynccontextmanager
+async def primary_reads(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    Yields `session`, or a short-lived session on the primary when `session` reads from a
+    replica. Caches shared across requests are filled through it, so that they never keep
+    the data of a lagging replica.
+    """
+    if not is_replica(session):
+        yield session
+        return
+    session_maker = session.info.get("primary", async_session_maker)
+    async with session_maker() as primary:
+        yield primary
+
+
+# ----------------------------
+# Unit of work
+# ----------------------------
+# Services only flush; the owner of the session (a request through `get_db`, or a script
+# through `unit_of_work`) commits once at the end. In-process caches must not see data that
+# may still be rolled back, so services register their cache updates with `after_commit`.
+_AFTER_COMMIT = "after_commit_callbacks"
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Runs `callback` once the session's current transaction commits; a rollback discards it.
+    """
+    session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT, []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit(session: Session) -> None:
+    session.info.pop(_AFTER_COMMIT, None)
+
+
+@asynccontextmanager
+async def unit_of_work(
+    session_maker: async_sessionmaker[AsyncSession] = async_session_maker,
+) -> AsyncIterator[AsyncSession]:
+    """
+    Yields a session whose work is committed once on exit, or rolled back if the block raises.
+    """
+    async with session_maker() as session:
+        try:
+            yield session
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+
 
 async def init_db(async_engine: AsyncEngine = engine) -> None:
+    """
+    Creates missing tables and applies pending schema migrations.
+    """
     async with async_engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(run_migrations)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
+    """
+    Yields a read-write session on the primary database. Everything the request writes is
+    committed in one transaction after the endpoint returns, or rolled back if it raises.
+    """
+    async with unit_of_work() as session:
+        token = _primary_session.set(session)
+        try:
+            yield session
+        finally:
+            _primary_session.reset(token)
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yields a session for reads: a replica in round-robin order, or the primary when no
+    replicas are configured. A request that already holds a read-write session reads
+    through that session, so it sees its own writes.
+    """
+    primary = _primary_session.get()
+    if primary is not None:
+        yield primary
+        return
+    session_maker = next(_next_replica) if replica_session_makers else async_session_maker
+    async with session_maker() as session:
         yield session
 
 
 async def reset_db(async_engine: AsyncEngine = engine) -> None:
     """
     개발/테스트 용: 모든 테이블 드롭 후 최신 모델로 재생성.
-    프로덕션에서는 마이그레이션 도구(Alembic) 사용 권장.
+    프로덕션 스키마 변경은 src/backend/migrations.py 에 마이그레이션으로 추가.
     """
     async with async_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.drop_all)
-        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(run_migrations)
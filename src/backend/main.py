@@ -2,21 +2,27 @@ from collections.abc import AsyncGenerator  # Added for lifespan return type
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
+from src.backend import metrics
 from src.backend.__version__ import __version__
 from src.backend.api.robot_stock_api import stockbot_router
 from src.backend.api.stock_api import router as stock_router
 from src.backend.database import init_db
+from src.backend.query_stats import QueryStatsMiddleware
+from src.backend.services.process_pool import shutdown_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:  # Added return type
     """
     Lifespan manager for the application.
-    Creates database tables on startup.
+    Creates database tables and applies schema migrations on startup,
+    and stops the worker process pool on shutdown.
     """
     await init_db()
     yield
+    shutdown_pool()
 
 
 app = FastAPI(  # Renamed app to fastapi_app
@@ -26,6 +32,9 @@ app = FastAPI(  # Renamed app to fastapi_app
     lifespan=lifespan,
 )
 
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include the API router from stock_api.py
 app.include_router(stockbot_router, prefix="/robot")
 app.include_router(stock_router)
@@ -37,3 +46,11 @@ def read_root() -> dict[str, str]:  # Added return type
     Root endpoint to check if the API is running.
     """
     return {"message": "Welcome to the Stock Playground API!"}
+
+
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+def read_metrics() -> PlainTextResponse:
+    """
+    Operational metrics of this process in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,131 @@
+"""
+Versioned schema migrations applied at startup.
+
+`SQLModel.metadata.create_all` only creates missing tables, so every change to a table
+that already exists in production (new indexes, columns, backfills) is added here as a
+numbered migration. Each applied version is recorded in the `schemamigration` table and
+runs exactly once per database. Migrations must be idempotent because a fresh database
+already gets the latest table definitions from `create_all`.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Index, Table, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Field, SQLModel, select
+
+from src.backend import partitioning
+from src.backend.models.holding import StockHoldingDetail
+from src.backend.models.price import StockPrice
+from src.backend.models.transaction import StockTransaction
+
+
+class SchemaMigration(SQLModel, table=True):
+    """
+    Database model recording an applied schema migration.
+    """
+
+    __tablename__ = "schemamigration"
+
+    version: int = Field(primary_key=True)
+    description: str
+    applied_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    A numbered schema change.
+    """
+
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _index(table: Table, name: str) -> Index:
+    """
+    Returns the index declared on a model's table under `name`.
+    """
+    return next(index for index in table.indexes if index.name == name)
+
+
+def _create_indexes(*indexes: Index) -> Callable[[Connection], None]:
+    """
+    Returns an upgrade step that creates the given model indexes if they are missing.
+    """
+
+    def upgrade(conn: Connection) -> None:
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+
+    return upgrade
+
+
+def _drop_indexes(*names: str) -> Callable[[Connection], None]:
+    """
+    Returns an upgrade step that drops the named indexes if they exist.
+    """
+
+    def upgrade(conn: Connection) -> None:
+        for name in names:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    return upgrade
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        description="composite indexes for ledger and holdings lookups",
+        upgrade=_create_indexes(
+            _index(StockTransaction.__table__, "ix_stocktransaction_user_stock_date"),  # type: ignore[attr-defined]
+            _index(StockHoldingDetail.__table__, "ix_stockholdingdetail_user_ticker"),  # type: ignore[attr-defined]
+        ),
+    ),
+    Migration(
+        version=2,
+        description="screener indexes on stock prices by date",
+        upgrade=_create_indexes(
+            _index(StockPrice.__table__, "ix_stockprice_time_change_percent"),  # type: ignore[attr-defined]
+            _index(StockPrice.__table__, "ix_stockprice_time_volume"),  # type: ignore[attr-defined]
+        ),
+    ),
+    Migration(
+        version=3,
+        description="drop the stock price time index the screener indexes make redundant",
+        upgrade=_drop_indexes("ix_stockprice_time"),
+    ),
+]
+
+
+def run_migrations(conn: Connection) -> list[int]:
+    """
+    Creates missing tables and applies pending migrations in version order, then extends
+    the stockprice partitions when partitioning is enabled.
+    Returns the versions applied by this call.
+    """
+    partitioning.create_partitioned_table(conn)
+    SQLModel.metadata.create_all(conn)
+    applied = set(conn.execute(select(SchemaMigration.version)).scalars().all())
+
+    newly_applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in applied:
+            continue
+        migration.upgrade(conn)
+        conn.execute(
+            SchemaMigration.__table__.insert().values(  # type: ignore[attr-defined]
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.now(timezone.utc),
+            )
+        )
+        newly_applied.append(migration.version)
+    partitioning.extend_partitions(conn)
+    return newly_applied
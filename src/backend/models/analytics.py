@@ -0,0 +1,36 @@
+"""
+Cross-ticker analytics models for API communication.
+"""
+
+from datetime import datetime
+
+from sqlmodel import SQLModel
+
+
+class ReturnStatisticsRequest(SQLModel):
+    """
+    Model for requesting return statistics over a set of tickers.
+
+    `window` is the number of most recent daily returns to use; all history when omitted.
+    """
+
+    tickers: list[str]
+    window: int | None = None
+
+
+class ReturnStatisticsRead(SQLModel):
+    """
+    Model for reading daily log-return statistics of a ticker set.
+
+    Returns are taken over the dates on which every ticker has a close. Vectors and the
+    rows and columns of both matrices follow the order of `tickers`.
+    """
+
+    tickers: list[str]
+    start: datetime | None = None
+    end: datetime | None = None
+    observations: int
+    mean_returns: list[float] = []
+    volatilities: list[float] = []
+    covariance: list[list[float]] = []
+    correlation: list[list[float | None]] = []
@@ -0,0 +1,108 @@
+"""
+Backtest job models for API communication.
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+from sqlalchemy import JSON, Column, DateTime
+from sqlmodel import Field, SQLModel
+
+
+class BacktestStrategy(str, Enum):
+    """
+    Strategy simulated by a backtest.
+
+    - ma_crossover: long while the `fast`-bar SMA is above the `slow`-bar SMA.
+    - rsi_threshold: enter when the `window`-bar RSI drops below `lower`, exit when it rises above `upper`.
+    """
+
+    MA_CROSSOVER = "ma_crossover"
+    RSI_THRESHOLD = "rsi_threshold"
+
+
+class BacktestJobStatus(str, Enum):
+    """
+    Lifecycle state of a backtest job.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class BacktestRequest(SQLModel):
+    """
+    Model for submitting a backtest over a ticker's stored closes.
+
+    Every combination of the listed parameter values is simulated. `fee_rate` is charged
+    on each change of position as a fraction of equity.
+    """
+
+    ticker: str
+    strategy: BacktestStrategy
+    parameters: dict[str, list[float]]
+    start: datetime | None = None
+    end: datetime | None = None
+    fee_rate: float = 0.0
+
+
+class BacktestRunResult(SQLModel):
+    """
+    Model for the outcome of one parameter combination.
+
+    `equity_curve` starts at 1.0 and is aligned with the job's `times`. Only the best runs
+    of a job carry one; the others report their summary statistics alone.
+    """
+
+    parameters: dict[str, float]
+    total_return: float
+    annualized_return: float | None = None
+    annualized_volatility: float | None = None
+    sharpe_ratio: float | None = None
+    max_drawdown: float
+    trade_count: int
+    exposure: float
+    equity_curve: list[float] | None = None
+
+
+class BacktestJob(SQLModel, table=True):
+    """
+    Database model for a backtest job, so that any API worker process can report it.
+
+    `times` and `runs` hold the results as JSON once the job is done.
+    """
+
+    __tablename__ = "backtestjob"
+
+    job_id: str = Field(primary_key=True, max_length=32)
+    status: BacktestJobStatus
+    ticker: str
+    strategy: BacktestStrategy
+    combinations: int
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    finished_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True), index=True))
+    error: str | None = None
+    times: list[str] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+    runs: list[dict[str, Any]] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+
+
+class BacktestJobRead(SQLModel):
+    """
+    Model for reading the state and results of a backtest job.
+
+    Runs are ordered by total return, best first.
+    """
+
+    job_id: str
+    status: BacktestJobStatus
+    ticker: str
+    strategy: BacktestStrategy
+    combinations: int
+    created_at: datetime
+    finished_at: datetime | None = None
+    error: str | None = None
+    times: list[datetime] = []
+    runs: list[BacktestRunResult] = []
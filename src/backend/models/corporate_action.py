@@ -0,0 +1,84 @@
+"""
+Corporate action models for database and API communication.
+"""
+
+from datetime import datetime, timezone
+from enum import Enum
+
+from pydantic import ConfigDict
+from sqlalchemy import Column, DateTime, UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class CorporateActionType(str, Enum):
+    """
+    Kind of corporate action.
+
+    - split: `value` is the number of new shares per old share (2.0 for a 2-for-1 split).
+    - dividend: `value` is the cash amount per share.
+    """
+
+    SPLIT = "split"
+    DIVIDEND = "dividend"
+
+
+class StockCorporateActionBase(SQLModel):
+    """
+    Base model for a split or dividend, effective from its ex-date.
+    """
+
+    ex_date: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    action_type: CorporateActionType
+    value: float = Field(gt=0)
+
+
+class StockCorporateAction(StockCorporateActionBase, table=True):
+    """
+    Database model for a split or dividend.
+    """
+
+    __tablename__ = "stockcorporateaction"
+    __table_args__ = (UniqueConstraint("stock_info_id", "ex_date", "action_type", name="uq_stock_corporate_action"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    stock_info_id: int = Field(foreign_key="stockinfo.id", index=True)
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+
+
+class StockCorporateActionCreate(StockCorporateActionBase):
+    """
+    Model for recording a corporate action.
+    """
+
+    stock_info_id: int
+
+
+class StockCorporateActionRead(StockCorporateActionBase):
+    """
+    Model for reading a corporate action from the API.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    stock_info_id: int
+    created_at: datetime
+
+
+class AdjustedPriceRead(SQLModel):
+    """
+    Model for reading a bar adjusted for the splits and dividends after it.
+
+    Prices are the stored prices times `factor`; volume is scaled by later splits only.
+    """
+
+    time: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    factor: float
@@ -0,0 +1,55 @@
+"""
+Price history coverage models for API communication.
+"""
+
+from datetime import date
+
+from sqlmodel import SQLModel
+
+
+class CoverageGap(SQLModel):
+    """
+    Model for a run of consecutive trading sessions without a stored bar.
+    """
+
+    start: date
+    end: date
+    sessions: int
+
+
+class TickerCoverageRead(SQLModel):
+    """
+    Model for reading how completely a ticker's stored bars cover the trading calendar.
+    """
+
+    stock_info_id: int
+    ticker: str
+    start: date | None = None
+    end: date | None = None
+    expected_sessions: int = 0
+    missing_sessions: int = 0
+    gaps: list[CoverageGap] = []
+
+
+class CoverageRepairRequest(SQLModel):
+    """
+    Model for requesting the repair of gaps in stored bars.
+
+    Without a range, each ticker is scanned between its first and last stored bar.
+    """
+
+    tickers: list[str] | None = None
+    start: date | None = None
+    end: date | None = None
+    auto_adjust: bool = True
+    timezone: str = "UTC"
+
+
+class CoverageRepairRead(SQLModel):
+    """
+    Model for reading the outcome of repairing one ticker's gaps, one download per gap.
+    """
+
+    ticker: str
+    gaps: int
+    saved: int
@@ -5,7 +5,7 @@ Stock holding detail models for database and API communication.
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, DateTime, UniqueConstraint
+from sqlalchemy import Column, DateTime, Index, UniqueConstraint
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -36,7 +36,16 @@ class StockHoldingDetail(StockHoldingDetailBase, table=True):
     """
 
     __tablename__ = "stockholdingdetail"
-    __table_args__ = (UniqueConstraint("user_id", "stock_info_id", name="uq_user_stock_holding"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "stock_info_id", name="uq_user_stock_holding"),
+        # Covers the per-user holdings reads; PostgreSQL also answers them from the index alone
+        Index(
+            "ix_stockholdingdetail_user_ticker",
+            "user_id",
+            "ticker",
+            postgresql_include=["stock_info_id", "holding_quantity", "average_buy_price", "total_buy_amount"],
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     stock_info_id: int = Field(foreign_key="stockinfo.id", index=True)
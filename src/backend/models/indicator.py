@@ -0,0 +1,20 @@
+"""
+Technical indicator models for API communication.
+"""
+
+from datetime import datetime
+
+from sqlmodel import SQLModel
+
+
+class IndicatorSeriesRead(SQLModel):
+    """
+    Model for reading technical indicators computed over a ticker's stored closes.
+
+    Every list in `values` is aligned with `times`; warm-up points are null.
+    """
+
+    ticker: str
+    window: int
+    times: list[datetime] = []
+    values: dict[str, list[float | None]] = {}
@@ -0,0 +1,162 @@
+"""
+Cost basis lot models for database and API communication.
+"""
+
+from datetime import datetime, timezone
+from enum import Enum
+
+from sqlalchemy import Column, DateTime, Index
+from sqlmodel import Field, SQLModel
+
+
+class CostBasisMethod(str, Enum):
+    """
+    Method used to match sells against open lots.
+    """
+
+    FIFO = "fifo"
+    AVERAGE = "average"
+
+
+# -----------------
+# UserCostBasisSetting Models
+# -----------------
+class UserCostBasisSettingBase(SQLModel):
+    """
+    Base model for a user's cost basis setting.
+    """
+
+    user_id: int = Field(unique=True, index=True)
+    cost_basis_method: CostBasisMethod = Field(default=CostBasisMethod.AVERAGE)
+
+
+class UserCostBasisSetting(UserCostBasisSettingBase, table=True):
+    """
+    Database model for a user's cost basis setting.
+    """
+
+    __tablename__ = "usercostbasissetting"
+
+    id: int | None = Field(default=None, primary_key=True)
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+
+
+class UserCostBasisSettingRead(UserCostBasisSettingBase):
+    """
+    Model for reading a user's cost basis setting from the API.
+    """
+
+
+class UserCostBasisSettingUpdate(SQLModel):
+    """
+    Model for updating a user's cost basis setting.
+    """
+
+    cost_basis_method: CostBasisMethod
+
+
+# -----------------
+# StockLot Models
+# -----------------
+class StockLotBase(SQLModel):
+    """
+    Base model for an acquired lot of shares.
+    """
+
+    user_id: int
+    ticker: str
+    transaction_id: int | None = Field(default=None, index=True)  # the buy that opened this lot
+    acquired_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    quantity: int
+    remaining_quantity: int
+    unit_cost: float
+
+
+class StockLot(StockLotBase, table=True):
+    """
+    Database model for an acquired lot of shares.
+    """
+
+    __tablename__ = "stocklot"
+    __table_args__ = (Index("ix_stocklot_user_stock_acquired", "user_id", "stock_info_id", "acquired_at"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    stock_info_id: int = Field(foreign_key="stockinfo.id")
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+
+
+class StockLotRead(StockLotBase):
+    """
+    Model for reading a lot from the API.
+    """
+
+    id: int
+    stock_info_id: int
+
+
+# -----------------
+# StockLotRealization Models
+# -----------------
+class StockLotRealizationBase(SQLModel):
+    """
+    Base model for the part of a sell matched against a single lot.
+    """
+
+    user_id: int
+    ticker: str
+    sell_transaction_id: int | None = Field(default=None, index=True)
+    lot_id: int | None = Field(default=None)
+    realized_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    quantity: int
+    proceeds: float
+    cost_basis: float
+    realized_profit: float
+
+
+class StockLotRealization(StockLotRealizationBase, table=True):
+    """
+    Database model for the part of a sell matched against a single lot.
+    """
+
+    __tablename__ = "stocklotrealization"
+    __table_args__ = (Index("ix_stocklotrealization_user_stock", "user_id", "stock_info_id"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    stock_info_id: int = Field(foreign_key="stockinfo.id")
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+
+
+# -----------------
+# Profit and Loss Read Models
+# -----------------
+class StockProfitLossRead(SQLModel):
+    """
+    Model for reading realized and unrealized profit of a user's position in one stock.
+    """
+
+    stock_info_id: int
+    ticker: str
+    holding_quantity: int
+    cost_basis: float
+    average_cost: float
+    market_price: float | None = None
+    market_value: float | None = None
+    unrealized_profit: float | None = None
+    realized_profit: float
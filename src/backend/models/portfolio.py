@@ -0,0 +1,53 @@
+"""
+Portfolio summary models for API communication.
+"""
+
+from sqlmodel import SQLModel
+
+
+class PortfolioPositionSummary(SQLModel):
+    """
+    Model for one ticker's share of a user's portfolio.
+
+    `weight` is the position's share of the market value held in the same currency.
+    """
+
+    ticker: str
+    currency: str | None = None
+    holding_quantity: int
+    invested_amount: float
+    market_value: float
+    profit: float
+    weight: float
+    priced: bool
+
+
+class PortfolioCurrencySummary(SQLModel):
+    """
+    Model for the totals of a user's positions held in one currency.
+    """
+
+    currency: str | None = None
+    invested_amount: float
+    market_value: float
+    profit: float
+    profit_percent: float | None = None
+
+
+class PortfolioSummaryRead(SQLModel):
+    """
+    Model for reading a user's portfolio totals from the API.
+
+    Top-level totals are only given when every position is held in one currency, named by
+    `currency`; amounts in different currencies are not added, so mixed portfolios report
+    None and are totalled per currency in `currencies`.
+    """
+
+    user_id: int
+    currency: str | None = None
+    invested_amount: float | None = None
+    market_value: float | None = None
+    profit: float | None = None
+    profit_percent: float | None = None
+    currencies: list[PortfolioCurrencySummary] = []
+    positions: list[PortfolioPositionSummary] = []
@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
 from pydantic import ConfigDict
-from sqlalchemy import Column, DateTime, UniqueConstraint
+from sqlalchemy import Column, DateTime, Index, UniqueConstraint
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -18,7 +18,7 @@ class StockPriceBase(SQLModel):
     Base model for stock price data.
     """
 
-    time: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False, index=True))
+    time: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
     open: float
     high: float
     low: float
@@ -36,7 +36,13 @@ class StockPrice(StockPriceBase, table=True):
     """
 
     __tablename__ = "stockprice"
-    __table_args__ = (UniqueConstraint("stock_info_id", "time", name="uq_stock_price_stock_info_id_time"),)
+    __table_args__ = (
+        UniqueConstraint("stock_info_id", "time", name="uq_stock_price_stock_info_id_time"),
+        # Screener filters select a date or range first, then compare these columns. Their time
+        # prefix also serves every other time-only filter, so time has no index of its own.
+        Index("ix_stockprice_time_change_percent", "time", "change_percent"),
+        Index("ix_stockprice_time_volume", "time", "volume"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     stock_info_id: int = Field(foreign_key="stockinfo.id", index=True)
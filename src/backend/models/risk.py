@@ -0,0 +1,42 @@
+"""
+Portfolio risk models for API communication.
+"""
+
+from datetime import datetime
+
+from sqlmodel import SQLModel
+
+
+class RiskPositionRead(SQLModel):
+    """
+    Model for one position included in a risk simulation.
+    """
+
+    ticker: str
+    holding_quantity: int
+    market_value: float
+    weight: float
+
+
+class ValueAtRiskRead(SQLModel):
+    """
+    Model for reading a Monte Carlo Value-at-Risk estimate of a user's holdings.
+
+    `value_at_risk` and `expected_shortfall` are losses over `horizon_days`, reported as
+    positive amounts in `currency`. Re-running with the same `seed`, holdings and prices
+    reproduces the result.
+    """
+
+    user_id: int
+    currency: str | None = None
+    price_date: datetime | None = None
+    confidence: float
+    horizon_days: int
+    paths: int
+    observations: int
+    seed: int
+    portfolio_value: float
+    value_at_risk: float
+    expected_shortfall: float
+    positions: list[RiskPositionRead] = []
+    unpriced_tickers: list[str] = []
@@ -0,0 +1,54 @@
+"""
+Rolling price statistics models for database and API communication.
+"""
+
+from datetime import datetime, timezone
+
+from pydantic import ConfigDict
+from sqlalchemy import Column, DateTime
+from sqlmodel import Field, SQLModel
+
+
+class StockRollingStatBase(SQLModel):
+    """
+    Base model for the trailing-window statistics of one stock, as of its latest bar.
+
+    `window_start` is the time of the oldest bar in the 52-week window; bars stored
+    before it cannot change the statistics.
+    """
+
+    ticker: str = Field(index=True)
+    as_of: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    window_start: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    bar_count: int
+    high_52w: float
+    low_52w: float
+    avg_volume_20d: float
+    sma_200: float | None = Field(default=None)
+    distance_from_sma_200_percent: float | None = Field(default=None)
+
+
+class StockRollingStat(StockRollingStatBase, table=True):
+    """
+    Database model for the trailing-window statistics of one stock.
+    """
+
+    __tablename__ = "stockrollingstat"
+
+    id: int | None = Field(default=None, primary_key=True)
+    stock_info_id: int = Field(foreign_key="stockinfo.id", unique=True)
+    updated_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+
+
+class StockRollingStatRead(StockRollingStatBase):
+    """
+    Model for reading the trailing-window statistics of a stock from the API.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    stock_info_id: int
+    updated_at: datetime
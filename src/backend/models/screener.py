@@ -0,0 +1,24 @@
+"""
+Stock screener models for API communication.
+"""
+
+from datetime import datetime
+
+from sqlmodel import SQLModel
+
+
+class ScreenerMatch(SQLModel):
+    """
+    Model for one stored bar that satisfied a screener filter.
+    """
+
+    stock_info_id: int
+    ticker: str
+    time: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+    change: float | None = None
+    change_percent: float | None = None
@@ -0,0 +1,58 @@
+"""
+Holdings snapshot models for database and API communication.
+"""
+
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import JSON, Column, DateTime, UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+from src.backend.models.lot import CostBasisMethod
+
+
+class StockHoldingSnapshotBase(SQLModel):
+    """
+    Base model for a holdings checkpoint of one user and stock.
+
+    A snapshot with `period_end` P reflects every transaction dated strictly before P.
+    """
+
+    user_id: int
+    ticker: str
+    period_end: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    holding_quantity: int = Field(default=0)
+    cost_basis: float = Field(default=0.0)
+    realized_profit: float = Field(default=0.0)
+    cost_basis_method: CostBasisMethod = Field(default=CostBasisMethod.AVERAGE)
+
+
+class StockHoldingSnapshot(StockHoldingSnapshotBase, table=True):
+    """
+    Database model for a holdings checkpoint of one user and stock.
+    """
+
+    __tablename__ = "stockholdingsnapshot"
+    __table_args__ = (UniqueConstraint("user_id", "stock_info_id", "period_end", name="uq_user_stock_snapshot_period"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    stock_info_id: int = Field(foreign_key="stockinfo.id")
+    # Open lots as [acquired_at (ISO 8601), remaining_quantity, unit_cost, transaction_id]
+    open_lots: list[list[Any]] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default_factory=lambda: datetime.now(timezone.utc),
+    )
+
+
+class StockHoldingAsOfRead(SQLModel):
+    """
+    Model for reading a user's position in one stock as of a past date.
+    """
+
+    stock_info_id: int
+    ticker: str
+    holding_quantity: int
+    cost_basis: float
+    average_cost: float
+    realized_profit: float
@@ -5,7 +5,7 @@ Stock transaction models for database and API communication.
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -33,6 +33,7 @@ class StockTransaction(StockTransactionBase, table=True):
     """
 
     __tablename__ = "stocktransaction"
+    __table_args__ = (Index("ix_stocktransaction_user_stock_date", "user_id", "stock_info_id", "transaction_date"),)
 
     id: int | None = Field(default=None, primary_key=True)
     stock_info_id: int = Field(foreign_key="stockinfo.id", index=True)
@@ -0,0 +1,244 @@
+"""
+Range partitioning of `stockprice` by time on PostgreSQL.
+
+With `settings.STOCKPRICE_PARTITION_INTERVAL` set, a new PostgreSQL database gets
+`stockprice` as a declaratively partitioned table, one partition per year (daily bars)
+or per month (intraday bars), named `stockprice_p2024` or `stockprice_p2024_01`.
+Queries that filter on `time` only touch the matching partitions, and each partition
+keeps its own small indexes.
+
+Partitions are created on demand: the schema layer creates the current and the next
+`STOCKPRICE_PARTITIONS_AHEAD` periods at startup, and ingestion creates the ones its bars
+fall into before inserting them. Old periods can be detached with `detach_partitions`,
+which turns them into standalone tables without rewriting any rows. Storing bars in a
+detached period raises DetachedPartitionError until the table is re-attached with
+`attach_partition`, or renamed or dropped.
+
+Other databases, and an existing unpartitioned `stockprice` table, are left as they are;
+converting a populated table means copying every row and is not done automatically.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import MetaData, PrimaryKeyConstraint, Table, inspect, text
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from src.backend.config import settings
+from src.backend.models.price import StockPrice
+from src.backend.models.stock import StockInfo
+
+TABLE_NAME = "stockprice"
+
+
+@dataclass(frozen=True)
+class Partition:
+    """
+    One time range of stockprice: `start <= time < end` (UTC).
+    """
+
+    name: str
+    start: date
+    end: date
+
+
+class DetachedPartitionError(RuntimeError):
+    """
+    Raised when a partition to create exists as a standalone table, e.g. after `detach_partitions`.
+    """
+
+
+def is_enabled(conn: Connection) -> bool:
+    return settings.STOCKPRICE_PARTITION_INTERVAL is not None and conn.dialect.name == "postgresql"
+
+
+def _period_start(day: date, interval: str) -> date:
+    return date(day.year, 1, 1) if interval == "year" else date(day.year, day.month, 1)
+
+
+def _next_period(start: date, interval: str) -> date:
+    if interval == "year":
+        return date(start.year + 1, 1, 1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partitions_between(start: date, end: date, interval: str | None = None) -> list[Partition]:
+    """
+    Returns the partitions covering `start` to `end` inclusive.
+    """
+    interval = interval or settings.STOCKPRICE_PARTITION_INTERVAL or "year"
+    partitions = []
+    period = _period_start(start, interval)
+    while period <= end:
+        suffix = f"{period.year}" if interval == "year" else f"{period.year}_{period.month:02d}"
+        upper = _next_period(period, interval)
+        partitions.append(Partition(f"{TABLE_NAME}_p{suffix}", period, upper))
+        period = upper
+    return partitions
+
+
+def partitioned_table() -> Table:
+    """
+    The partitioned definition of stockprice. PostgreSQL requires every unique constraint of
+    a partitioned table to include the partition key, so the primary key becomes (id, time);
+    `id` stays unique in practice because it still comes from one sequence.
+    """
+    metadata = MetaData()
+    StockInfo.__table__.to_metadata(metadata)  # type: ignore[attr-defined]
+    table = StockPrice.__table__.to_metadata(metadata)  # type: ignore[attr-defined]
+    # Unmark `id` first; replacing a key whose column is still marked primary warns
+    table.c.id.primary_key = False
+    table.c.id.autoincrement = True
+    table.append_constraint(PrimaryKeyConstraint("id", "time"))
+    table.dialect_options["postgresql"]["partition_by"] = "RANGE (time)"
+    return table
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """
+    Whether stockprice exists as a partitioned table.
+    """
+    result = conn.execute(
+        text("SELECT 1 FROM pg_class WHERE relkind = 'p' AND relname = :table"), {"table": TABLE_NAME}
+    )
+    return result.first() is not None
+
+
+def attached_partitions(conn: Connection) -> set[str]:
+    result = conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": TABLE_NAME},
+    )
+    return set(result.scalars().all())
+
+
+def _standalone_tables(conn: Connection, names: list[str]) -> set[str]:
+    """
+    The names that belong to visible ordinary tables which are not partitions.
+    """
+    result = conn.execute(
+        text(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition "
+            "AND pg_table_is_visible(oid) AND relname = ANY(:names)"
+        ),
+        {"names": names},
+    )
+    return set(result.scalars().all())
+
+
+def _bound(day: date) -> str:
+    return f"'{day.isoformat()} 00:00:00+00'"
+
+
+def ensure_partitions(conn: Connection, start: datetime | date, end: datetime | date) -> list[str]:
+    """
+    Creates the missing partitions for `start` to `end` inclusive. Returns the created names.
+    Raises DetachedPartitionError if one of them exists as a standalone table, which
+    `CREATE TABLE IF NOT EXISTS` would silently keep, leaving the period without a partition.
+    """
+    if not is_enabled(conn) or not is_partitioned(conn):
+        return []
+    attached = attached_partitions(conn)
+    missing = [p for p in partitions_between(_utc_date(start), _utc_date(end)) if p.name not in attached]
+    if not missing:
+        return []
+    standalone = _standalone_tables(conn, [partition.name for partition in missing])
+    if standalone:
+        names = ", ".join(sorted(standalone))
+        raise DetachedPartitionError(
+            f"{names} exist as standalone tables, not as partitions of {TABLE_NAME}, so their periods cannot "
+            "be stored. Re-attach them with partitioning.attach_partition, or rename or drop them."
+        )
+    for partition in missing:
+        # IF NOT EXISTS: another writer may create the same partition concurrently
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {partition.name} PARTITION OF {TABLE_NAME} "
+                f"FOR VALUES FROM ({_bound(partition.start)}) TO ({_bound(partition.end)})"
+            )
+        )
+    return [partition.name for partition in missing]
+
+
+def attach_partition(conn: Connection, name: str) -> None:
+    """
+    Attaches a standalone table named like a partition, e.g. one detached by `detach_partitions`,
+    back to stockprice for its period. PostgreSQL scans it to check that every row is in range.
+    """
+    partition = _parse_partition(name)
+    if partition is None:
+        raise ValueError(f"{name} is not named like a partition of {TABLE_NAME}")
+    conn.execute(
+        text(
+            f"ALTER TABLE {TABLE_NAME} ATTACH PARTITION {partition.name} "
+            f"FOR VALUES FROM ({_bound(partition.start)}) TO ({_bound(partition.end)})"
+        )
+    )
+
+
+def create_partitioned_table(conn: Connection) -> bool:
+    """
+    Creates stockprice as a partitioned table without partitions, unless the table already
+    exists. Returns whether it was created.
+    """
+    if not is_enabled(conn) or inspect(conn).has_table(TABLE_NAME):
+        return False
+    # stockprice references stockinfo, so create every other table first
+    SQLModel.metadata.create_all(conn, tables=[t for t in SQLModel.metadata.sorted_tables if t.name != TABLE_NAME])
+    partitioned_table().create(conn)
+    return True
+
+
+def extend_partitions(conn: Connection) -> list[str]:
+    """
+    Creates the partitions of the current and the next `STOCKPRICE_PARTITIONS_AHEAD` periods.
+    """
+    today = datetime.now(timezone.utc).date()
+    last = partitions_between(today, today)[0].start
+    for _ in range(settings.STOCKPRICE_PARTITIONS_AHEAD):
+        last = _next_period(last, settings.STOCKPRICE_PARTITION_INTERVAL or "year")
+    return ensure_partitions(conn, today, last)
+
+
+def detach_partitions(conn: Connection, before: date, concurrently: bool = False) -> list[str]:
+    """
+    Detaches the partitions that end on or before `before`, keeping them as standalone tables
+    to archive or drop. Returns the detached names. `concurrently` avoids blocking queries on
+    stockprice (PostgreSQL 14+) but needs a connection outside a transaction, e.g. with
+    `isolation_level="AUTOCOMMIT"`.
+    """
+    if not is_enabled(conn):
+        return []
+    detached = []
+    for name in sorted(attached_partitions(conn)):
+        partition = _parse_partition(name)
+        if partition is None or partition.end > before:
+            continue
+        conn.execute(text(f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {name}{' CONCURRENTLY' if concurrently else ''}"))
+        detached.append(name)
+    return detached
+
+
+def _parse_partition(name: str) -> Partition | None:
+    """
+    The range of a partition from its name, or None for partitions not named by this module.
+    """
+    year, _, month = name.removeprefix(f"{TABLE_NAME}_p").partition("_")
+    if not name.startswith(f"{TABLE_NAME}_p") or not year.isdigit() or not (month == "" or month.isdigit()):
+        return None
+    start = date(int(year), int(month or 1), 1)
+    return Partition(name, start, _next_period(start, "month" if month else "year"))
+
+
+def _utc_date(value: datetime | date) -> date:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
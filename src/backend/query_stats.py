@@ -0,0 +1,191 @@
+"""
+Per-request SQL statement accounting.
+
+Engine events record every statement executed while a `QueryStats` is active: the count,
+the time spent in the database and how often each statement pattern repeated. COMMITs are
+counted too (untimed: the engine only announces them), and statements sent on the raw
+driver connection, such as the asyncpg COPY of price bars, are recorded by wrapping the
+driver call in `recorded`. Repeated patterns are the signature of N+1 loads, e.g. touching
+a lazy relationship of `StockInfo` (`prices`, `transactions`, `holding_details`) once per
+row.
+
+`QueryStatsMiddleware` tracks each HTTP request and, with `settings.DEBUG`, reports the
+numbers in `X-DB-*` response headers. Tests wrap calls in `query_budget` to fail when a
+code path issues more statements than it should.
+"""
+
+import re
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.backend.config import settings
+
+
+@dataclass
+class QueryStats:
+    """
+    Statements executed during one request or block.
+    """
+
+    count: int = 0
+    duration: float = 0.0  # seconds
+    patterns: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def duplicates(self) -> dict[str, int]:
+        """
+        The statement patterns executed more than once, with their counts.
+        """
+        return {pattern: n for pattern, n in self.patterns.items() if n > 1}
+
+    @property
+    def duplicate_count(self) -> int:
+        """
+        Executions that repeated an earlier pattern.
+        """
+        return sum(n - 1 for n in self.duplicates.values())
+
+    def headers(self) -> list[tuple[bytes, bytes]]:
+        return [
+            (b"x-db-query-count", str(self.count).encode()),
+            (b"x-db-query-time-ms", f"{self.duration * 1000:.1f}".encode()),
+            (b"x-db-duplicate-queries", str(self.duplicate_count).encode()),
+        ]
+
+
+# Every active recorder of the current context; nested blocks each see their own statements
+_active: ContextVar[tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|\$\d+|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_pattern(statement: str) -> str:
+    """
+    Normalizes a statement so that executions differing only in the length of an expanded
+    IN list or in whitespace count as the same pattern.
+    """
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+    # A connection runs one statement at a time, so one start time per connection suffices
+    if _active.get():
+        conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+    started = conn.info.pop("query_started", None)
+    recorders = _active.get()
+    if recorders and started is not None:
+        _record(recorders, statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context: Any):
+    # A failing statement gets no after_cursor_execute; it still ran, so count it
+    connection = exception_context.connection
+    started = connection.info.pop("query_started", None) if connection is not None else None
+    recorders = _active.get()
+    if recorders and started is not None and exception_context.statement is not None:
+        _record(recorders, exception_context.statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "commit")
+def _commit(conn: Any):
+    # Fired before the DBAPI commit, which has no after-event to time it with
+    if recorders := _active.get():
+        _record(recorders, "COMMIT", 0.0)
+
+
+def _record(recorders: tuple[QueryStats, ...], statement: str, elapsed: float) -> None:
+    pattern = statement_pattern(statement)
+    for stats in recorders:
+        stats.count += 1
+        stats.duration += elapsed
+        stats.patterns[pattern] += 1
+
+
+@asynccontextmanager
+async def recorded(statement: str) -> AsyncIterator[None]:
+    """
+    Records the block as one execution of `statement`, for driver calls that bypass the
+    engine's cursor events.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if recorders := _active.get():
+            _record(recorders, statement, time.perf_counter() - started)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryStats]:
+    """
+    Records the statements executed inside the block, including those of enclosing recorders.
+    """
+    stats = QueryStats()
+    token = _active.set((*_active.get(), stats))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int, max_duplicates: int = 0) -> Iterator[QueryStats]:
+    """
+    Fails with `QueryBudgetExceeded` when the block executes more than `max_queries`
+    statements or repeats statement patterns more than `max_duplicates` times.
+    """
+    with record_queries() as stats:
+        yield stats
+    problems = []
+    if stats.count > max_queries:
+        problems.append(f"{stats.count} statements (budget {max_queries})")
+    if stats.duplicate_count > max_duplicates:
+        problems.append(f"{stats.duplicate_count} repeated statements (budget {max_duplicates})")
+    if problems:
+        repeated = "".join(f"\n  {n}x {pattern}" for pattern, n in stats.duplicates.items())
+        raise QueryBudgetExceeded(", ".join(problems) + repeated)
+
+
+class QueryStatsMiddleware:
+    """
+    Tracks the statements of each HTTP request; with `settings.DEBUG` the response carries
+    `X-DB-Query-Count`, `X-DB-Query-Time-Ms` and `X-DB-Duplicate-Queries` headers.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.DEBUG:
+            await self.app(scope, receive, send)
+            return
+
+        with record_queries() as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                # The request's session has committed by the time the response starts
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", []), *stats.headers()]
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
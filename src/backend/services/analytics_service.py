@@ -0,0 +1,151 @@
+"""
+Service layer for cross-ticker return analytics.
+
+A ticker set's closes are read from the columnar price store and pivoted into an aligned NumPy panel
+(dates x tickers). Panels are cached per ticker set, so repeated queries with different
+windows only slice the cached log returns.
+"""
+
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, cast
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.models.analytics import ReturnStatisticsRead
+from src.backend.models.stock import StockInfo
+from src.backend.services import columnar_store
+
+MAX_CACHED_PANELS = 32
+
+
+@dataclass
+class _ReturnPanel:
+    times: np.ndarray  # datetime64[ns] UTC, dates on which every ticker has a close
+    returns: np.ndarray  # log returns, shape (len(times) - 1, tickers), ending at times[1:]
+    versions: tuple[tuple[str, int] | None, ...] = ()  # of the columnar store entries, by stock
+
+
+_cache: "OrderedDict[tuple[int, ...], _ReturnPanel]" = OrderedDict()
+
+
+def invalidate(stock_info_id: int | None = None) -> None:
+    """
+    Drops every cached panel containing a stock, or all panels when no id is given.
+    """
+    if stock_info_id is None:
+        _cache.clear()
+        return
+    for key in [key for key in _cache if stock_info_id in key]:
+        del _cache[key]
+
+
+def _build_panel(stock_ids: np.ndarray, times: np.ndarray, closes: np.ndarray, columns: Sequence[int]) -> _ReturnPanel:
+    """
+    Pivots (stock id, time, close) rows into aligned closes and their log returns.
+    Dates missing a close for any of the `columns` are dropped.
+    """
+    unique_times, row_index = np.unique(times, return_inverse=True)
+    column_of = {stock_id: i for i, stock_id in enumerate(columns)}
+    column_index = np.array([column_of[stock_id] for stock_id in stock_ids], dtype=int)
+
+    panel = np.full((len(unique_times), len(columns)), np.nan)
+    panel[row_index, column_index] = closes
+    complete = ~np.isnan(panel).any(axis=1)
+    aligned = panel[complete]
+    return _ReturnPanel(times=unique_times[complete], returns=np.diff(np.log(aligned), axis=0))
+
+
+def _is_current(stock_ids: tuple[int, ...], versions: tuple[tuple[str, int] | None, ...]) -> bool:
+    return all(
+        columnar_store.is_current(stock_id, version) for stock_id, version in zip(stock_ids, versions, strict=True)
+    )
+
+
+async def _load_panel(*, session: AsyncSession, stock_ids: tuple[int, ...]) -> _ReturnPanel:
+    key = tuple(sorted(stock_ids))
+    panel = _cache.get(key)
+    if panel is not None and not _is_current(key, panel.versions):
+        # Another process appended to or dropped a stock's stored columns
+        panel = None
+    if panel is None:
+        columns = [await columnar_store.get_columns(session=session, stock_info_id=stock_id) for stock_id in key]
+        panel = _build_panel(
+            np.repeat(np.array(key, dtype=int), [len(c) for c in columns]),
+            np.concatenate([c.time for c in columns]),
+            np.concatenate([c.close for c in columns]),
+            key,
+        )
+        panel.versions = tuple(c.version for c in columns)
+        if not _is_current(key, panel.versions):
+            return panel
+        _cache[key] = panel
+        while len(_cache) > MAX_CACHED_PANELS:
+            _cache.popitem(last=False)
+    _cache.move_to_end(key)
+    return panel
+
+
+async def get_log_returns(
+    *, session: AsyncSession, tickers: Sequence[str], window: int | None = None
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Returns (times, returns): the last `window` aligned daily log returns of the tickers, with
+    one column per ticker in the given order, and the dates they end on. Returns None if any
+    ticker is unknown. The arrays may be views of the cache and must not be modified.
+    """
+    result = await session.execute(
+        select(StockInfo.ticker, StockInfo.id).where(cast(Any, StockInfo.ticker).in_(tickers))
+    )
+    id_of = dict(result.tuples().all())
+    if len(id_of) != len(set(tickers)):
+        return None
+
+    panel = await _load_panel(session=session, stock_ids=tuple(id_of[ticker] for ticker in dict.fromkeys(tickers)))
+    # Panel columns are in stock id order; reorder them to the requested ticker order
+    column_of = {stock_id: i for i, stock_id in enumerate(sorted(set(id_of.values())))}
+    returns = panel.returns[:, [column_of[id_of[ticker]] for ticker in tickers]]
+    times = panel.times[1:]
+    if window is not None:
+        returns, times = returns[-window:], times[-window:]
+    return times, returns
+
+
+async def get_return_statistics(
+    *, session: AsyncSession, tickers: Sequence[str], window: int | None = None
+) -> ReturnStatisticsRead | None:
+    """
+    Returns mean, volatility, covariance and correlation of daily log returns for the tickers,
+    over the last `window` returns. Returns None if any ticker is unknown.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    aligned = await get_log_returns(session=session, tickers=tickers, window=window)
+    if aligned is None:
+        return None
+    times, returns = aligned
+
+    statistics = ReturnStatisticsRead(tickers=tickers, observations=len(returns))
+    if len(returns) == 0:
+        return statistics
+    statistics.start = pd.Timestamp(times[0], tz="UTC").to_pydatetime()
+    statistics.end = pd.Timestamp(times[-1], tz="UTC").to_pydatetime()
+    statistics.mean_returns = returns.mean(axis=0).tolist()
+    if len(returns) < 2:
+        return statistics
+
+    covariance = np.atleast_2d(np.cov(returns, rowvar=False))
+    volatilities = np.sqrt(np.diag(covariance))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.outer(volatilities, volatilities)
+    # Tickers with constant prices have no defined correlation
+    correlation = correlation.astype(object)
+    correlation[~np.isfinite(correlation.astype(float))] = None
+
+    statistics.volatilities = volatilities.tolist()
+    statistics.covariance = covariance.tolist()
+    statistics.correlation = correlation.tolist()
+    return statistics
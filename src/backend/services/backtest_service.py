@@ -0,0 +1,254 @@
+"""
+Service layer for vectorized strategy backtests.
+
+A ticker's closes are loaded once into NumPy arrays. Each parameter combination is
+simulated without a per-bar Python loop: positions are derived from indicator arrays,
+and P&L from element-wise products. Parameter grids are split across the shared
+process pool and the work runs as a background job that clients poll.
+
+Jobs are stored in the `backtestjob` table, so a poll can reach any API worker process.
+The simulation itself runs in the process that accepted the job; if that process stops
+before the job finishes, the job stays `running`.
+"""
+
+import asyncio
+import itertools
+import uuid
+from datetime import datetime, timezone
+from typing import Any, cast
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from src.backend.database import after_commit, unit_of_work
+from src.backend.models.backtest import (
+    BacktestJob,
+    BacktestJobRead,
+    BacktestJobStatus,
+    BacktestRequest,
+    BacktestRunResult,
+    BacktestStrategy,
+)
+from src.backend.services import indicator_service, process_pool
+from src.backend.utils.datetime_utils import as_utc
+
+PERIODS_PER_YEAR = 252
+MAX_COMBINATIONS = 10_000
+MAX_FINISHED_JOBS = 100
+# Runs of a job, best first, that are reported with their equity curve
+EQUITY_CURVE_RUNS = 10
+
+STRATEGY_PARAMETERS: dict[BacktestStrategy, tuple[str, ...]] = {
+    BacktestStrategy.MA_CROSSOVER: ("fast", "slow"),
+    BacktestStrategy.RSI_THRESHOLD: ("window", "lower", "upper"),
+}
+
+
+# ----------------------------
+# Simulation (runs in worker processes)
+# ----------------------------
+def positions(strategy: BacktestStrategy, closes: np.ndarray, parameters: dict[str, float]) -> np.ndarray:
+    """
+    Returns the target position (0 or 1) at each close.
+    """
+    if strategy == BacktestStrategy.MA_CROSSOVER:
+        fast = indicator_service.sma(closes, int(parameters["fast"]))
+        slow = indicator_service.sma(closes, int(parameters["slow"]))
+        # NaN comparisons are False, so there is no position during warm-up
+        return (fast > slow).astype(float)
+
+    rsi = indicator_service.rsi(closes, int(parameters["window"]))
+    signal = np.full(len(closes), np.nan)
+    signal[rsi < parameters["lower"]] = 1.0
+    signal[rsi > parameters["upper"]] = 0.0
+    # Hold the last entry/exit signal until the next one
+    last_signal = np.maximum.accumulate(np.where(np.isnan(signal), 0, np.arange(len(signal))))
+    held = signal[last_signal]
+    return np.nan_to_num(held, nan=0.0)
+
+
+def simulate(
+    strategy: BacktestStrategy, closes: np.ndarray, parameters: dict[str, float], fee_rate: float = 0.0
+) -> dict[str, Any]:
+    """
+    Simulates one parameter combination. A position decided at a close is held over the next bar.
+    Returns the fields of a BacktestRunResult.
+    """
+    held = positions(strategy, closes, parameters)[:-1]
+    bar_returns = np.diff(closes) / closes[:-1]
+    turnover = np.abs(np.diff(held, prepend=0.0))
+    strategy_returns = held * bar_returns - fee_rate * turnover
+    equity = np.concatenate(([1.0], np.cumprod(1 + strategy_returns)))
+
+    years = len(strategy_returns) / PERIODS_PER_YEAR
+    deviation = float(strategy_returns.std(ddof=1)) if len(strategy_returns) > 1 else 0.0
+    return {
+        "parameters": parameters,
+        "total_return": float(equity[-1] - 1),
+        "annualized_return": float(equity[-1] ** (1 / years) - 1) if years > 0 and equity[-1] > 0 else None,
+        "annualized_volatility": deviation * np.sqrt(PERIODS_PER_YEAR) if len(strategy_returns) > 1 else None,
+        "sharpe_ratio": (
+            float(strategy_returns.mean() / deviation * np.sqrt(PERIODS_PER_YEAR)) if deviation > 0 else None
+        ),
+        "max_drawdown": float((1 - equity / np.maximum.accumulate(equity)).max()),
+        "trade_count": int(np.count_nonzero(np.diff(held, prepend=0.0) > 0)),
+        "exposure": float(held.mean()) if len(held) else 0.0,
+        "equity_curve": equity.tolist(),
+    }
+
+
+def _best_first(runs: list[dict[str, Any]], curve_runs: int) -> list[dict[str, Any]]:
+    """
+    Orders runs by total return and drops the equity curves of all but the best `curve_runs`.
+    """
+    runs = sorted(runs, key=lambda run: run["total_return"], reverse=True)
+    for run in runs[curve_runs:]:
+        run["equity_curve"] = None
+    return runs
+
+
+def _simulate_chunk(
+    combinations: list[dict[str, float]],
+    strategy: BacktestStrategy,
+    closes: np.ndarray,
+    fee_rate: float,
+    curve_runs: int,
+) -> list[dict[str, Any]]:
+    # The overall best runs are among the best of each chunk, so other curves need not leave the worker
+    return _best_first([simulate(strategy, closes, parameters, fee_rate) for parameters in combinations], curve_runs)
+
+
+def expand_grid(strategy: BacktestStrategy, parameters: dict[str, list[float]]) -> list[dict[str, float]]:
+    """
+    Returns every valid combination of the parameter grid.
+    Raises ValueError if parameters are missing, unknown or out of range.
+    """
+    names = STRATEGY_PARAMETERS[strategy]
+    missing = [name for name in names if not parameters.get(name)]
+    unknown = sorted(set(parameters) - set(names))
+    if missing or unknown:
+        raise ValueError(f"{strategy.value} takes parameters {', '.join(names)}")
+
+    combinations = [
+        dict(zip(names, values, strict=True)) for values in itertools.product(*(parameters[n] for n in names))
+    ]
+    if strategy == BacktestStrategy.MA_CROSSOVER:
+        combinations = [c for c in combinations if 1 <= c["fast"] < c["slow"]]
+    else:
+        combinations = [c for c in combinations if c["window"] >= 2 and c["lower"] < c["upper"]]
+    if not combinations:
+        raise ValueError("The parameter grid has no valid combination")
+    if len(combinations) > MAX_COMBINATIONS:
+        raise ValueError(f"The parameter grid is limited to {MAX_COMBINATIONS} combinations")
+    return combinations
+
+
+# ----------------------------
+# Jobs
+# ----------------------------
+_tasks: set[asyncio.Task] = set()
+
+
+async def _finish_job(session_maker: async_sessionmaker[AsyncSession], job_id: str, **values: Any) -> None:
+    """
+    Records the outcome of a job and deletes the oldest finished jobs beyond MAX_FINISHED_JOBS.
+    """
+    async with unit_of_work(session_maker) as session:
+        await session.execute(
+            update(BacktestJob)
+            .where(cast(Any, BacktestJob.job_id) == job_id)
+            .values(**values, finished_at=datetime.now(timezone.utc))
+        )
+        stale = (
+            select(BacktestJob.job_id)
+            .where(cast(Any, BacktestJob.finished_at).is_not(None))
+            .order_by(cast(Any, BacktestJob.finished_at).desc())
+            .offset(MAX_FINISHED_JOBS)
+        )
+        await session.execute(delete(BacktestJob).where(cast(Any, BacktestJob.job_id).in_(stale)))
+
+
+async def _run_job(
+    session_maker: async_sessionmaker[AsyncSession],
+    job_id: str,
+    strategy: BacktestStrategy,
+    combinations: list[dict[str, float]],
+    closes: np.ndarray,
+    fee_rate: float,
+) -> None:
+    async with unit_of_work(session_maker) as session:
+        await session.execute(
+            update(BacktestJob).where(cast(Any, BacktestJob.job_id) == job_id).values(status=BacktestJobStatus.RUNNING)
+        )
+    try:
+        chunks = process_pool.split(combinations, process_pool.worker_count())
+        results = await process_pool.map_in_pool(_simulate_chunk, chunks, strategy, closes, fee_rate, EQUITY_CURVE_RUNS)
+        runs = _best_first([run for chunk in results for run in chunk], EQUITY_CURVE_RUNS)
+        # Validate before storing, so a malformed run fails the job instead of its readers
+        runs = [BacktestRunResult(**run).model_dump() for run in runs]
+    except Exception as e:
+        await _finish_job(session_maker, job_id, status=BacktestJobStatus.FAILED, error=str(e) or type(e).__name__)
+    else:
+        await _finish_job(session_maker, job_id, status=BacktestJobStatus.DONE, runs=runs)
+
+
+def _start_job(session_maker: async_sessionmaker[AsyncSession], *args: Any) -> None:
+    task = asyncio.create_task(_run_job(session_maker, *args))
+    # Keep a reference so the task is not garbage collected while it runs
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def submit_backtest(*, session: AsyncSession, request: BacktestRequest) -> BacktestJobRead | None:
+    """
+    Validates a backtest and records it as a pending job, which starts in the background
+    once the session commits. Returns the pending job, or None if the ticker is unknown.
+    Raises ValueError for an invalid request.
+    """
+    combinations = expand_grid(request.strategy, request.parameters)
+    series = await indicator_service.get_close_series(session=session, ticker=request.ticker)
+    if series is None:
+        return None
+
+    times, closes = series
+    if request.start is not None:
+        mask = times >= np.datetime64(as_utc(request.start).replace(tzinfo=None))
+        times, closes = times[mask], closes[mask]
+    if request.end is not None:
+        mask = times < np.datetime64(as_utc(request.end).replace(tzinfo=None))
+        times, closes = times[mask], closes[mask]
+    if len(closes) < 2:
+        raise ValueError("At least two closes are needed in the requested range")
+
+    job = BacktestJob(
+        job_id=uuid.uuid4().hex,
+        status=BacktestJobStatus.PENDING,
+        ticker=request.ticker,
+        strategy=request.strategy,
+        combinations=len(combinations),
+        created_at=datetime.now(timezone.utc),
+        times=[t.isoformat() for t in pd.DatetimeIndex(times, tz="UTC")],
+    )
+    session.add(job)
+    await session.flush()
+
+    # The job's own sessions must reach the database of the request, which has committed the job by then
+    session_maker = async_sessionmaker(bind=session.bind, class_=AsyncSession, expire_on_commit=False)
+    after_commit(
+        session,
+        lambda: _start_job(session_maker, job.job_id, request.strategy, combinations, closes, request.fee_rate),
+    )
+    return BacktestJobRead.model_validate(job)
+
+
+async def get_backtest_job(*, session: AsyncSession, job_id: str) -> BacktestJobRead | None:
+    """
+    Returns a job by id, or None if it is unknown or has been pruned.
+    """
+    job = await session.get(BacktestJob, job_id)
+    if job is None:
+        return None
+    return BacktestJobRead.model_validate(job)
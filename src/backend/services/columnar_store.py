@@ -0,0 +1,311 @@
+"""
+Read-optimized columnar copy of stored price bars.
+
+Each stock's bars are kept as fixed-width NumPy columns (time, open, high, low, close,
+volume), one file per column, under `settings.COLUMNAR_STORE_DIR/<stock_info_id>/`.
+Readers memory-map the files, so every worker process shares the same page-cache view
+instead of rebuilding series from SQL rows.
+
+A small `meta.json` names the current generation and its row count and is replaced
+atomically. Appends write past the published rows and then publish the new count, so
+readers never see a partial bar. Anything else (back-dated bars, purges, deletes) drops
+the entry, and the next read rebuilds it from the database under a new generation.
+
+Writers of a stock (appends, rebuilds and drops) are serialized across processes by an
+`fcntl` lock on `.locks/<stock_info_id>.lock`, which also counts the appends and drops.
+A rebuild only publishes its rows if that count did not change while it read the
+database, so bars committed meanwhile are never lost. Caches derived from the columns
+record their (generation, rows) `version` and check it with `is_current` on every read,
+so they follow changes made by other processes.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import uuid
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, cast
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.config import settings
+from src.backend.database import primary_reads
+from src.backend.models.price import StockPrice
+from src.backend.utils.datetime_utils import as_utc
+
+COLUMNS: dict[str, np.dtype] = {
+    "time": np.dtype("datetime64[ns]"),
+    "open": np.dtype("float64"),
+    "high": np.dtype("float64"),
+    "low": np.dtype("float64"),
+    "close": np.dtype("float64"),
+    "volume": np.dtype("int64"),
+}
+META_FILE = "meta.json"
+LOCK_DIR = ".locks"
+
+
+@dataclass(frozen=True)
+class PriceColumns:
+    """
+    A stock's bars oldest first, as read-only arrays. Times are UTC datetime64 values.
+    `version` is the (generation, rows) of the stored entry they were mapped from, or None
+    when they were read from the database without being stored.
+    """
+
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    version: tuple[str, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+
+# Open mappings of this process: stock id -> (generation, rows, columns)
+_mapped: dict[int, tuple[str, int, PriceColumns]] = {}
+
+
+def _stock_dir(stock_info_id: int) -> Path | None:
+    if settings.COLUMNAR_STORE_DIR is None:
+        return None
+    return Path(settings.COLUMNAR_STORE_DIR) / str(stock_info_id)
+
+
+def _lock_path(stock_info_id: int) -> Path:
+    return Path(cast(Path, settings.COLUMNAR_STORE_DIR)) / LOCK_DIR / f"{stock_info_id}.lock"
+
+
+@contextmanager
+def _locked(stock_info_id: int) -> Iterator[int]:
+    """
+    Holds a stock's lock file exclusively and yields its descriptor. The file is never
+    deleted, so every process locks the same inode; the lock is released on close.
+    """
+    path = _lock_path(stock_info_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield fd
+    finally:
+        os.close(fd)
+
+
+def _read_changes(fd: int) -> int:
+    try:
+        return int(os.pread(fd, 20, 0) or b"0")
+    except ValueError:
+        # Read while another process rewrote it; never equal to a real count
+        return -1
+
+
+def _changes(stock_info_id: int) -> int:
+    """
+    The number of appends and drops of a stock so far, read without taking the lock.
+    """
+    try:
+        fd = os.open(_lock_path(stock_info_id), os.O_RDONLY)
+    except FileNotFoundError:
+        return 0
+    try:
+        return _read_changes(fd)
+    finally:
+        os.close(fd)
+
+
+def _record_change(fd: int) -> None:
+    # Fixed width, so the count is overwritten in place and never truncated
+    os.pwrite(fd, f"{_read_changes(fd) + 1:020d}".encode(), 0)
+
+
+def _column_path(directory: Path, generation: str, column: str) -> Path:
+    return directory / f"{column}-{generation}.bin"
+
+
+def _read_meta(directory: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads((directory / META_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_meta(directory: Path, meta: dict[str, Any]) -> None:
+    temporary = directory / f"{META_FILE}.{uuid.uuid4().hex}"
+    temporary.write_text(json.dumps(meta))
+    os.replace(temporary, directory / META_FILE)
+
+
+def _empty_columns(version: tuple[str, int] | None = None) -> PriceColumns:
+    return PriceColumns(**{column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}, version=version)
+
+
+def _map(directory: Path, generation: str, rows: int) -> PriceColumns:
+    if rows == 0:
+        return _empty_columns((generation, rows))
+    arrays = {
+        column: np.memmap(_column_path(directory, generation, column), dtype=dtype, mode="r", shape=(rows,))
+        for column, dtype in COLUMNS.items()
+    }
+    # Plain ndarray views of the mappings: still zero-copy and read-only, but safe to pickle
+    return PriceColumns(
+        **{column: array.view(np.ndarray) for column, array in arrays.items()}, version=(generation, rows)
+    )
+
+
+def _open(stock_info_id: int) -> PriceColumns | None:
+    directory = _stock_dir(stock_info_id)
+    meta = _read_meta(directory) if directory is not None else None
+    if directory is None or meta is None:
+        _mapped.pop(stock_info_id, None)
+        return None
+    mapped = _mapped.get(stock_info_id)
+    if mapped is None or mapped[:2] != (meta["generation"], meta["rows"]):
+        try:
+            columns = _map(directory, meta["generation"], meta["rows"])
+        except FileNotFoundError:
+            # Replaced by another process between reading the meta and mapping the files
+            return None
+        mapped = (meta["generation"], meta["rows"], columns)
+        _mapped[stock_info_id] = mapped
+    return mapped[2]
+
+
+def _write(stock_info_id: int, arrays: dict[str, np.ndarray], changes: int) -> None:
+    """
+    Publishes a rebuilt entry under a new generation, unless bars were appended or the entry
+    dropped since `changes` was read: the arrays may then miss bars committed meanwhile.
+    """
+    directory = _stock_dir(stock_info_id)
+    if directory is None:
+        return
+    with _locked(stock_info_id) as fd:
+        if _read_changes(fd) != changes:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        generation = uuid.uuid4().hex
+        for column, dtype in COLUMNS.items():
+            np.ascontiguousarray(arrays[column], dtype=dtype).tofile(_column_path(directory, generation, column))
+        _write_meta(directory, {"generation": generation, "rows": len(arrays["time"])})
+        # Processes that still map an old generation keep reading it until they see the new meta
+        for path in directory.glob("*.bin"):
+            if not path.name.endswith(f"-{generation}.bin"):
+                path.unlink(missing_ok=True)
+
+
+def _to_datetime64(times: Sequence[datetime]) -> np.ndarray:
+    return np.array([as_utc(t).replace(tzinfo=None) for t in times], dtype="datetime64[ns]")
+
+
+async def get_columns(*, session: AsyncSession, stock_info_id: int) -> PriceColumns:
+    """
+    Returns a stock's bars, building its columns from the database when they are not stored yet.
+    The arrays may be memory-mapped and must not be modified. Bars missing from the store are
+    read from the primary even when `session` reads from a replica: later appends would never
+    fill in the bars a lagging replica missed.
+    """
+    columns = _open(stock_info_id)
+    if columns is not None:
+        return columns
+
+    changes = _changes(stock_info_id) if settings.COLUMNAR_STORE_DIR is not None else 0
+    async with primary_reads(session) as primary:
+        result = await primary.execute(
+            select(
+                StockPrice.time, StockPrice.open, StockPrice.high, StockPrice.low, StockPrice.close, StockPrice.volume
+            )
+            .where(StockPrice.stock_info_id == stock_info_id)
+            .order_by(cast(Any, StockPrice.time))
+        )
+        rows = result.all()
+    if not rows:
+        return _empty_columns()
+    arrays = {"time": _to_datetime64([row[0] for row in rows])}
+    for i, column in enumerate(("open", "high", "low", "close", "volume"), start=1):
+        arrays[column] = np.array([row[i] for row in rows], dtype=COLUMNS[column])
+    _write(stock_info_id, arrays, changes)
+    return _open(stock_info_id) or PriceColumns(**arrays)
+
+
+def stored_version(stock_info_id: int) -> tuple[str, int] | None:
+    """
+    The (generation, rows) of a stock's stored columns, or None when it has no entry.
+    """
+    directory = _stock_dir(stock_info_id)
+    meta = _read_meta(directory) if directory is not None else None
+    return None if meta is None else (meta["generation"], meta["rows"])
+
+
+def is_current(stock_info_id: int, version: tuple[str, int] | None) -> bool:
+    """
+    Whether data built from columns of `version` still matches the store. Without a store
+    directory there is nothing shared to compare with, and in-process invalidation applies.
+    """
+    if settings.COLUMNAR_STORE_DIR is None:
+        return True
+    return version is not None and version == stored_version(stock_info_id)
+
+
+def append(stock_info_id: int, bars: Sequence[Any]) -> None:
+    """
+    Appends newly committed bars (objects with time, open, high, low, close and volume) to a
+    stored entry. Bars that do not come strictly after the stored ones drop the entry instead.
+    Stocks without an entry are left alone; their columns are built on the next read.
+    """
+    directory = _stock_dir(stock_info_id)
+    if directory is None or not bars:
+        return
+    with _locked(stock_info_id) as fd:
+        _record_change(fd)
+        meta = _read_meta(directory)
+        if meta is None:
+            return
+        bars = sorted(bars, key=lambda bar: as_utc(bar.time))
+        times = _to_datetime64([bar.time for bar in bars])
+        stored = _open(stock_info_id)
+        if stored is None or (len(stored) and times[0] <= stored.time[-1]) or len(np.unique(times)) < len(times):
+            _drop(stock_info_id, directory)
+            return
+
+        generation, rows = meta["generation"], meta["rows"]
+        for column, dtype in COLUMNS.items():
+            values = times if column == "time" else np.array([getattr(bar, column) for bar in bars], dtype=dtype)
+            with open(_column_path(directory, generation, column), "r+b") as file:
+                # Write after the published rows, overwriting any leftovers of an interrupted append
+                file.seek(rows * dtype.itemsize)
+                file.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+                file.truncate()
+        _write_meta(directory, {"generation": generation, "rows": rows + len(bars)})
+
+
+def _drop(stock_info_id: int, directory: Path) -> None:
+    _mapped.pop(stock_info_id, None)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def invalidate(stock_info_id: int | None = None) -> None:
+    """
+    Drops the stored columns of one stock, or of every stock when no id is given.
+    """
+    if settings.COLUMNAR_STORE_DIR is None:
+        _mapped.clear()
+        return
+    if stock_info_id is None:
+        _mapped.clear()
+        stock_ids = [int(path.name) for path in Path(settings.COLUMNAR_STORE_DIR).glob("*") if path.name.isdigit()]
+        for stock_id in stock_ids:
+            invalidate(stock_id)
+        return
+    with _locked(stock_info_id) as fd:
+        _record_change(fd)
+        _drop(stock_info_id, Path(settings.COLUMNAR_STORE_DIR) / str(stock_info_id))
@@ -0,0 +1,246 @@
+"""
+Service layer for corporate actions and adjusted prices.
+
+Bars are stored as traded. Splits and dividends are stored as events, and adjusted
+prices are derived on read: each event contributes a factor to every bar before its
+ex-date, and the cumulative factors are cached per stock as a suffix product over the
+events. Recording a new event is one small write plus a cache invalidation.
+"""
+
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, cast
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.database import after_commit, primary_reads
+from src.backend.models.corporate_action import (
+    AdjustedPriceRead,
+    CorporateActionType,
+    StockCorporateAction,
+    StockCorporateActionCreate,
+)
+from src.backend.models.stock import StockInfo
+from src.backend.services import columnar_store, indicator_service
+from src.backend.utils.datetime_utils import as_utc
+
+MAX_CACHED_STOCKS = 1024
+
+
+@dataclass
+class _AdjustmentFactors:
+    ex_dates: np.ndarray  # datetime64[ns] UTC, ascending
+    # price[i] / volume[i]: cumulative factor for a bar preceded by i events, i.e. the product
+    # over events i.. of their factors; the last entry (no later events) is 1.0
+    price: np.ndarray
+    volume: np.ndarray
+
+    def for_bars(self, times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # An event applies to the bars strictly before its ex-date
+        applied = np.searchsorted(self.ex_dates, times, side="right")
+        return self.price[applied], self.volume[applied]
+
+
+_cache: "OrderedDict[int, _AdjustmentFactors]" = OrderedDict()
+
+
+def invalidate(stock_info_id: int | None = None) -> None:
+    """
+    Drops the cached factors of one stock, or of every stock when no id is given.
+    """
+    if stock_info_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(stock_info_id, None)
+
+
+def _to_datetime64(times: Sequence[datetime]) -> np.ndarray:
+    return np.array([as_utc(t).replace(tzinfo=None) for t in times], dtype="datetime64[ns]")
+
+
+def compute_adjustment_factors(
+    ex_dates: np.ndarray,
+    action_types: Sequence[CorporateActionType],
+    values: np.ndarray,
+    close_times: np.ndarray,
+    closes: np.ndarray,
+) -> _AdjustmentFactors:
+    """
+    Computes cumulative adjustment factors for events sorted by ex-date.
+
+    A split of ratio r scales earlier prices by 1 / r and earlier volumes by r. A dividend D
+    scales earlier prices by 1 - D / P, with P the last close before the ex-date; dividends
+    without such a close are ignored.
+    """
+    is_split = np.array([t == CorporateActionType.SPLIT for t in action_types], dtype=bool)
+    previous = np.searchsorted(close_times, ex_dates, side="left") - 1
+    previous_close = np.where(previous >= 0, closes[np.clip(previous, 0, None)], np.nan) if len(closes) else np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dividend_factor = 1 - values / previous_close
+    dividend_factor = np.where(np.isfinite(dividend_factor) & (dividend_factor > 0), dividend_factor, 1.0)
+
+    price = np.where(is_split, 1 / values, dividend_factor)
+    volume = np.where(is_split, values, 1.0)
+    return _AdjustmentFactors(
+        ex_dates=ex_dates,
+        price=np.append(np.cumprod(price[::-1])[::-1], 1.0),
+        volume=np.append(np.cumprod(volume[::-1])[::-1], 1.0),
+    )
+
+
+async def _get_factors(*, session: AsyncSession, stock_info_id: int, ticker: str) -> _AdjustmentFactors:
+    factors = _cache.get(stock_info_id)
+    if factors is None:
+        # Read from the primary even for replica sessions, so the cached factors are never behind it
+        async with primary_reads(session) as primary:
+            result = await primary.execute(
+                select(StockCorporateAction)
+                .where(StockCorporateAction.stock_info_id == stock_info_id)
+                .order_by(cast(Any, StockCorporateAction.ex_date))
+            )
+            actions = result.scalars().all()
+            close_times, closes = np.array([], dtype="datetime64[ns]"), np.array([], dtype=float)
+            if any(action.action_type == CorporateActionType.DIVIDEND for action in actions):
+                series = await indicator_service.get_close_series(session=primary, ticker=ticker)
+                if series is not None:
+                    close_times, closes = series
+        factors = compute_adjustment_factors(
+            _to_datetime64([action.ex_date for action in actions]),
+            [action.action_type for action in actions],
+            np.array([action.value for action in actions], dtype=float),
+            close_times,
+            closes,
+        )
+        _cache[stock_info_id] = factors
+        while len(_cache) > MAX_CACHED_STOCKS:
+            _cache.popitem(last=False)
+    _cache.move_to_end(stock_info_id)
+    return factors
+
+
+async def create_corporate_action(
+    *, session: AsyncSession, action: StockCorporateActionCreate
+) -> StockCorporateAction | None:
+    """
+    Records a split or dividend. Returns None if the stock does not exist.
+    Raises ValueError if the same kind of event is already recorded on that ex-date.
+    """
+    if await session.get(StockInfo, action.stock_info_id) is None:
+        return None
+    existing = await session.execute(
+        select(StockCorporateAction.id).where(
+            StockCorporateAction.stock_info_id == action.stock_info_id,
+            StockCorporateAction.ex_date == as_utc(action.ex_date),
+            StockCorporateAction.action_type == action.action_type,
+        )
+    )
+    if existing.first() is not None:
+        raise ValueError("This corporate action is already recorded")
+
+    db_action = StockCorporateAction.model_validate(action)
+    db_action.ex_date = as_utc(db_action.ex_date)
+    session.add(db_action)
+    await session.flush()
+    after_commit(session, lambda: invalidate(action.stock_info_id))
+    return db_action
+
+
+async def record_corporate_actions(
+    *, session: AsyncSession, stock_info_id: int, actions: Sequence[tuple[datetime, CorporateActionType, float]]
+) -> int:
+    """
+    Adds the (ex_date, type, value) events that are not stored yet. The caller commits.
+    Returns the number of added events.
+    """
+    if not actions:
+        return 0
+    result = await session.execute(
+        select(StockCorporateAction.ex_date, StockCorporateAction.action_type).where(
+            StockCorporateAction.stock_info_id == stock_info_id
+        )
+    )
+    existing = {(as_utc(ex_date), action_type) for ex_date, action_type in result.tuples().all()}
+    added = 0
+    for ex_date, action_type, value in actions:
+        if (as_utc(ex_date), action_type) in existing:
+            continue
+        session.add(
+            StockCorporateAction(
+                stock_info_id=stock_info_id, ex_date=as_utc(ex_date), action_type=action_type, value=value
+            )
+        )
+        existing.add((as_utc(ex_date), action_type))
+        added += 1
+    if added:
+        after_commit(session, lambda: invalidate(stock_info_id))
+    return added
+
+
+async def get_corporate_actions(*, session: AsyncSession, ticker: str) -> list[StockCorporateAction]:
+    """
+    Reads the corporate actions of a ticker, oldest first.
+    """
+    result = await session.execute(
+        select(StockCorporateAction)
+        .join(StockInfo, cast(Any, StockInfo.id) == StockCorporateAction.stock_info_id)
+        .where(StockInfo.ticker == ticker)
+        .order_by(cast(Any, StockCorporateAction.ex_date))
+    )
+    return list(result.scalars().all())
+
+
+async def delete_corporate_action(*, session: AsyncSession, action_id: int) -> bool:
+    """
+    Deletes a corporate action; adjusted prices reflect it on the next read.
+    """
+    db_action = await session.get(StockCorporateAction, action_id)
+    if not db_action:
+        return False
+    stock_info_id = db_action.stock_info_id
+    await session.delete(db_action)
+    await session.flush()
+    after_commit(session, lambda: invalidate(stock_info_id))
+    return True
+
+
+async def get_adjusted_prices(
+    *, session: AsyncSession, ticker: str, start: datetime | None = None, end: datetime | None = None
+) -> list[AdjustedPriceRead] | None:
+    """
+    Reads a ticker's bars with start <= time < end, adjusted for later splits and dividends.
+    Returns None if the ticker is unknown.
+    """
+    result = await session.execute(select(StockInfo.id).where(StockInfo.ticker == ticker))
+    stock_info_id = result.scalar_one_or_none()
+    if stock_info_id is None:
+        return None
+
+    columns = await columnar_store.get_columns(session=session, stock_info_id=stock_info_id)
+    first = 0 if start is None else np.searchsorted(columns.time, _to_datetime64([start])[0], side="left")
+    last = len(columns) if end is None else np.searchsorted(columns.time, _to_datetime64([end])[0], side="left")
+    if first >= last:
+        return []
+
+    factors = await _get_factors(session=session, stock_info_id=stock_info_id, ticker=ticker)
+    times = columns.time[first:last]
+    price_factor, volume_factor = factors.for_bars(times)
+    bars = np.column_stack([getattr(columns, name)[first:last] for name in ("open", "high", "low", "close")])
+    adjusted = bars * price_factor[:, None]
+    volumes = columns.volume[first:last] * volume_factor
+    return [
+        AdjustedPriceRead(
+            time=time,
+            open=adjusted[i, 0],
+            high=adjusted[i, 1],
+            low=adjusted[i, 2],
+            close=adjusted[i, 3],
+            volume=volumes[i],
+            factor=price_factor[i],
+        )
+        for i, time in enumerate(pd.DatetimeIndex(times, tz="UTC").to_pydatetime())
+    ]
@@ -0,0 +1,201 @@
+"""
+Service layer for finding and repairing holes in stored price histories.
+
+The downloader only remembers the last date it fetched per ticker, so bars lost in the
+middle of a history (failed runs, partial outages) are never fetched again. The scanner
+reads each ticker's stored bar dates, aggregated per day in SQL and one stock at a time,
+compares them with its exchange's trading sessions using NumPy set differences, and merges
+the missing sessions into the fewest contiguous ranges to download again through the
+normal upsert path.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, cast
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend import metrics
+from src.backend.models.coverage import CoverageGap, CoverageRepairRead, TickerCoverageRead
+from src.backend.models.price import StockPrice
+from src.backend.models.stock import StockInfo
+from src.backend.services import stock_service
+from src.backend.services.trading_calendar import get_calendar
+
+STREAM_BATCH_SIZE = 10_000
+
+
+def find_gaps(stored: np.ndarray, sessions: np.ndarray) -> list[CoverageGap]:
+    """
+    Returns the sessions missing from `stored` (both datetime64[D]), grouped into runs of
+    consecutive sessions. Non-session days between missing sessions do not split a run.
+    """
+    missing = np.setdiff1d(sessions, stored, assume_unique=False)
+    if len(missing) == 0:
+        return []
+    positions = np.searchsorted(sessions, missing)
+    breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+    firsts = np.concatenate(([0], breaks))
+    lasts = np.concatenate((breaks - 1, [len(missing) - 1]))
+    return [
+        CoverageGap(
+            start=missing[first].item(),
+            end=missing[last].item(),
+            sessions=int(last - first + 1),
+        )
+        for first, last in zip(firsts, lasts, strict=True)
+    ]
+
+
+def _local_dates(times: Sequence[datetime], tz: str) -> np.ndarray:
+    index = pd.DatetimeIndex(pd.to_datetime(list(times), utc=True)).tz_convert(tz).tz_localize(None)
+    return np.unique(index.to_numpy().astype("datetime64[D]"))
+
+
+def _utc_day(session: AsyncSession) -> Any:
+    """
+    The UTC date of a bar as a SQL expression. PostgreSQL's date() of a timestamptz uses the
+    session time zone, so the time is converted to UTC first.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", StockPrice.time))
+    return func.date(StockPrice.time)
+
+
+async def _stored_dates(
+    *, session: AsyncSession, stock_ids: Sequence[int], start: date | None, end: date | None, tz: str
+) -> AsyncIterator[tuple[int, np.ndarray]]:
+    """
+    Yields each stock's distinct bar dates in `tz`, one stock at a time.
+
+    The database returns the first and last bar of every (stock, UTC date) instead of every bar.
+    A UTC day spans at most two local dates and bar times are ordered, so those two bars have
+    all the local dates of the day's bars.
+    """
+    # Pad the UTC bounds by a day so that bars whose local date is in range are not cut off
+    statement = (
+        select(StockPrice.stock_info_id, func.min(StockPrice.time), func.max(StockPrice.time))
+        .where(cast(Any, StockPrice.stock_info_id).in_(stock_ids))
+        .group_by(cast(Any, StockPrice.stock_info_id), _utc_day(session))
+        .order_by(cast(Any, StockPrice.stock_info_id))
+    )
+    if start is not None:
+        statement = statement.where(
+            cast(Any, StockPrice.time) >= datetime.combine(start - timedelta(days=1), time.min, tzinfo=timezone.utc)
+        )
+    if end is not None:
+        statement = statement.where(
+            cast(Any, StockPrice.time) < datetime.combine(end + timedelta(days=2), time.min, tzinfo=timezone.utc)
+        )
+    current: int | None = None
+    times: list[datetime] = []
+    result = await session.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+    async for stock_id, first, last in result.tuples():
+        if stock_id != current:
+            if current is not None:
+                yield current, _local_dates(times, tz)
+            current, times = stock_id, []
+        times += (first, last)
+    if current is not None:
+        yield current, _local_dates(times, tz)
+
+
+def _report(
+    stock_id: int, ticker: str, market: str | None, stored: np.ndarray, start: date | None, end: date | None
+) -> TickerCoverageRead:
+    report = TickerCoverageRead(stock_info_id=stock_id, ticker=ticker)
+    if start is not None:
+        stored = stored[stored >= np.datetime64(start, "D")]
+    if end is not None:
+        stored = stored[stored <= np.datetime64(end, "D")]
+    scan_start = start or (stored[0].item() if len(stored) else None)
+    scan_end = end or (stored[-1].item() if len(stored) else None)
+    if scan_start is not None and scan_end is not None and scan_start <= scan_end:
+        sessions = get_calendar(market).sessions(scan_start, scan_end)
+        report.start, report.end = scan_start, scan_end
+        report.expected_sessions = len(sessions)
+        report.gaps = find_gaps(stored, sessions)
+        report.missing_sessions = sum(gap.sessions for gap in report.gaps)
+    return report
+
+
+async def scan_coverage(
+    *,
+    session: AsyncSession,
+    tickers: Sequence[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    tz: str = "UTC",
+) -> list[TickerCoverageRead]:
+    """
+    Reports the missing sessions of each stock (or only the given tickers) between start and end.
+    Bar times are converted to dates in `tz`. Without a range, each stock is scanned between
+    its first and last stored bar. Only one stock's dates are held in memory at a time.
+    """
+    statement = select(StockInfo.id, StockInfo.ticker, StockInfo.market).order_by(cast(Any, StockInfo.ticker))
+    if tickers:
+        statement = statement.where(cast(Any, StockInfo.ticker).in_(tickers))
+    stocks = {stock_id: (ticker, market) for stock_id, ticker, market in (await session.execute(statement)).tuples()}
+
+    reports = {}
+    async for stock_id, stored in _stored_dates(session=session, stock_ids=list(stocks), start=start, end=end, tz=tz):
+        reports[stock_id] = _report(stock_id, *stocks[stock_id], stored, start, end)
+    no_bars = np.array([], dtype="datetime64[D]")
+    return [
+        reports.get(stock_id) or _report(stock_id, ticker, market, no_bars, start, end)
+        for stock_id, (ticker, market) in stocks.items()
+    ]
+
+
+async def repair_gaps(
+    *,
+    session: AsyncSession,
+    tickers: Sequence[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    auto_adjust: bool = True,
+    tz: str = "UTC",
+) -> list[CoverageRepairRead]:
+    """
+    Downloads every missing range found by `scan_coverage` and stores it through the normal upsert.
+    Unlike other services this commits, once per ticker, so a long repair does not hold the
+    write transaction open across its downloads.
+    """
+    results = []
+    for report in await scan_coverage(session=session, tickers=tickers, start=start, end=end, tz=tz):
+        if not report.gaps:
+            continue
+        stock_info = await session.get(StockInfo, report.stock_info_id)
+        assert stock_info is not None
+        saved = 0
+        for gap in report.gaps:
+            # yfinance's end date is exclusive
+            with metrics.DOWNLOAD_DURATION.time(ticker=report.ticker):
+                df = await asyncio.to_thread(
+                    yf.download,
+                    report.ticker,
+                    start=gap.start.isoformat(),
+                    end=(gap.end + timedelta(days=1)).isoformat(),
+                    auto_adjust=auto_adjust,
+                )
+            if df is None or len(df) == 0:
+                continue
+            saved += await stock_service.upsert_stocks_from_dataframe(
+                session=session,
+                df=df,
+                ticker=report.ticker,
+                name=stock_info.name,
+                market=stock_info.market,
+                currency=stock_info.currency or "USD",
+                auto_adjust=auto_adjust,
+                timezone=tz,
+            )
+        await session.commit()
+        results.append(CoverageRepairRead(ticker=report.ticker, gaps=len(report.gaps), saved=saved))
+    return results
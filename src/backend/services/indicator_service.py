@@ -0,0 +1,285 @@
+"""
+Service layer for technical indicators over stored closes.
+
+Indicators are computed with vectorized NumPy/pandas operations over the columnar price
+store and kept in a per-ticker in-process cache. When new bars are appended by the price upsert the cached results are
+extended from their last state instead of being recomputed over the whole history.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.models.indicator import IndicatorSeriesRead
+from src.backend.models.stock import StockInfo
+from src.backend.services import columnar_store
+from src.backend.utils.datetime_utils import as_utc
+
+INDICATOR_NAMES = ("sma", "ema", "rsi", "macd", "bollinger")
+MAX_CACHED_TICKERS = 256
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_WIDTH = 2.0
+
+Outputs = dict[str, np.ndarray]
+State = dict[str, float]
+
+
+# ----------------------------
+# Vectorized building blocks
+# ----------------------------
+def _ewm(values: np.ndarray, alpha: float, seed: float | None = None) -> np.ndarray:
+    """
+    Exponentially weighted mean y[t] = alpha * x[t] + (1 - alpha) * y[t - 1].
+    Starts from x[0], or continues the recursion from `seed` when given.
+    """
+    if seed is None:
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    extended = np.concatenate(([seed], values))
+    return pd.Series(extended).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        csum = np.cumsum(np.insert(values, 0, 0.0))
+        out[window - 1 :] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1 :] = sliding_window_view(values, window).std(axis=1)
+    return out
+
+
+# ----------------------------
+# Indicators
+# ----------------------------
+# Windowed indicators only depend on the last `window` closes and carry no state.
+# Recursive indicators are given only the new closes and continue from their previous state.
+def _sma(closes: np.ndarray, window: int, state: State | None) -> tuple[Outputs, State]:
+    return {"sma": _rolling_mean(closes, window)}, {}
+
+
+def _bollinger(closes: np.ndarray, window: int, state: State | None) -> tuple[Outputs, State]:
+    middle = _rolling_mean(closes, window)
+    band = BOLLINGER_WIDTH * _rolling_std(closes, window)
+    return {"bollinger_middle": middle, "bollinger_upper": middle + band, "bollinger_lower": middle - band}, {}
+
+
+def _ema(closes: np.ndarray, window: int, state: State | None) -> tuple[Outputs, State]:
+    ema = _ewm(closes, 2 / (window + 1), state["ema"] if state else None)
+    return {"ema": ema}, {"ema": float(ema[-1])}
+
+
+def _rsi(closes: np.ndarray, window: int, state: State | None) -> tuple[Outputs, State]:
+    if state:
+        deltas = np.diff(np.concatenate(([state["last_close"]], closes)))
+        avg_gain = _ewm(np.clip(deltas, 0, None), 1 / window, state["avg_gain"])
+        avg_loss = _ewm(np.clip(-deltas, 0, None), 1 / window, state["avg_loss"])
+    else:
+        deltas = np.diff(closes)
+        # The first close has no change; keep the arrays aligned with the closes
+        avg_gain = np.concatenate(([np.nan], _ewm(np.clip(deltas, 0, None), 1 / window)))
+        avg_loss = np.concatenate(([np.nan], _ewm(np.clip(-deltas, 0, None), 1 / window)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    rsi[np.isnan(avg_gain)] = np.nan
+    new_state = {"last_close": float(closes[-1]), "avg_gain": float(avg_gain[-1]), "avg_loss": float(avg_loss[-1])}
+    return {"rsi": rsi}, new_state
+
+
+def _macd(closes: np.ndarray, window: int, state: State | None) -> tuple[Outputs, State]:
+    fast = _ewm(closes, 2 / (MACD_FAST + 1), state["fast"] if state else None)
+    slow = _ewm(closes, 2 / (MACD_SLOW + 1), state["slow"] if state else None)
+    macd = fast - slow
+    signal = _ewm(macd, 2 / (MACD_SIGNAL + 1), state["signal"] if state else None)
+    new_state = {"fast": float(fast[-1]), "slow": float(slow[-1]), "signal": float(signal[-1])}
+    return {"macd": macd, "macd_signal": signal, "macd_hist": macd - signal}, new_state
+
+
+_INDICATORS: dict[str, Callable[[np.ndarray, int, State | None], tuple[Outputs, State]]] = {
+    "sma": _sma,
+    "ema": _ema,
+    "rsi": _rsi,
+    "macd": _macd,
+    "bollinger": _bollinger,
+}
+_WINDOWED = {"sma", "bollinger"}
+
+
+def sma(closes: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple moving average of a close series; NaN until `window` closes are available.
+    """
+    return _rolling_mean(closes, window)
+
+
+def rsi(closes: np.ndarray, window: int) -> np.ndarray:
+    """
+    Wilder's RSI of a close series; NaN until `window` changes are available.
+    """
+    values = _rsi(closes, window, None)[0]["rsi"]
+    values[:window] = np.nan
+    return values
+
+
+def _warmup(output: str, window: int) -> int:
+    """
+    Number of leading points of an output that are not yet meaningful.
+    """
+    if output == "rsi":
+        return window
+    if output == "macd":
+        return MACD_SLOW - 1
+    if output in ("macd_signal", "macd_hist"):
+        return MACD_SLOW + MACD_SIGNAL - 2
+    return window - 1
+
+
+def _effective_window(name: str, window: int) -> int:
+    # MACD uses the standard 12/26/9 spans regardless of the requested window
+    return 0 if name == "macd" else window
+
+
+# ----------------------------
+# Per-ticker cache
+# ----------------------------
+@dataclass
+class _IndicatorResult:
+    values: Outputs
+    state: State
+
+
+@dataclass
+class _TickerSeries:
+    times: np.ndarray  # datetime64[ns], UTC
+    closes: np.ndarray
+    version: tuple[str, int] | None = None  # of the columnar store entry the series was read from
+    results: dict[tuple[str, int], _IndicatorResult] = field(default_factory=dict)
+
+    def compute(self, name: str, window: int) -> _IndicatorResult:
+        key = (name, _effective_window(name, window))
+        if key not in self.results:
+            values, state = _INDICATORS[name](self.closes, window, None)
+            self.results[key] = _IndicatorResult(values=values, state=state)
+        return self.results[key]
+
+    def append(self, times: np.ndarray, closes: np.ndarray) -> None:
+        self.times = np.concatenate((self.times, times))
+        self.closes = np.concatenate((self.closes, closes))
+        new_count = len(closes)
+        for (name, window), result in self.results.items():
+            if name in _WINDOWED:
+                tail = self.closes[-(new_count + window - 1) :]
+                values, _ = _INDICATORS[name](tail, window, None)
+                new_values = {key: array[-new_count:] for key, array in values.items()}
+            else:
+                new_values, result.state = _INDICATORS[name](closes, window, result.state or None)
+            result.values = {key: np.concatenate((result.values[key], new_values[key])) for key in result.values}
+
+
+_cache: "OrderedDict[int, _TickerSeries]" = OrderedDict()
+
+
+def _to_datetime64(times: Sequence[datetime]) -> np.ndarray:
+    return np.array([as_utc(t).replace(tzinfo=None) for t in times], dtype="datetime64[ns]")
+
+
+def invalidate(stock_info_id: int | None = None) -> None:
+    """
+    Drops the cached series of one stock, or of every stock when no id is given.
+    """
+    if stock_info_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(stock_info_id, None)
+
+
+def extend_cache(stock_info_id: int, times: Sequence[datetime], closes: Sequence[float]) -> None:
+    """
+    Appends newly stored bars to a cached series and extends its cached indicators.
+    Bars that do not come strictly after the cached history invalidate the series instead.
+    """
+    series = _cache.get(stock_info_id)
+    if series is None or not times:
+        return
+    new_times = _to_datetime64(times)
+    order = np.argsort(new_times, kind="stable")
+    new_times = new_times[order]
+    if len(series.times) and new_times[0] <= series.times[-1]:
+        invalidate(stock_info_id)
+        return
+    series.append(new_times, np.asarray(closes, dtype=float)[order])
+    # Still current if the store entry received exactly the same bars; otherwise the next read reloads it
+    if series.version is not None:
+        appended = (series.version[0], series.version[1] + len(new_times))
+        if columnar_store.stored_version(stock_info_id) == appended:
+            series.version = appended
+
+
+async def _load_series(*, session: AsyncSession, stock_info_id: int) -> _TickerSeries:
+    series = _cache.get(stock_info_id)
+    if series is not None and not columnar_store.is_current(stock_info_id, series.version):
+        # Another process appended to or dropped the stored columns
+        series = None
+    if series is None:
+        columns = await columnar_store.get_columns(session=session, stock_info_id=stock_info_id)
+        series = _TickerSeries(times=columns.time, closes=columns.close, version=columns.version)
+        # Columns come from the primary even for replica sessions, so any current series can be cached
+        if not columnar_store.is_current(stock_info_id, columns.version):
+            return series
+        _cache[stock_info_id] = series
+        while len(_cache) > MAX_CACHED_TICKERS:
+            _cache.popitem(last=False)
+    _cache.move_to_end(stock_info_id)
+    return series
+
+
+async def _find_stock_info_id(*, session: AsyncSession, ticker: str) -> int | None:
+    result = await session.execute(select(StockInfo.id).where(StockInfo.ticker == ticker))
+    return result.scalar_one_or_none()
+
+
+async def get_close_series(*, session: AsyncSession, ticker: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Returns the cached (times, closes) arrays of a ticker, oldest first, or None if the ticker is unknown.
+    Times are UTC datetime64 values. The arrays are shared with the cache and must not be modified.
+    """
+    stock_info_id = await _find_stock_info_id(session=session, ticker=ticker)
+    if stock_info_id is None:
+        return None
+    series = await _load_series(session=session, stock_info_id=stock_info_id)
+    return series.times, series.closes
+
+
+async def get_indicators(
+    *, session: AsyncSession, ticker: str, names: Sequence[str], window: int
+) -> IndicatorSeriesRead | None:
+    """
+    Returns the requested indicators for a ticker, or None if the ticker is unknown.
+    `names` must be a subset of INDICATOR_NAMES.
+    """
+    stock_info_id = await _find_stock_info_id(session=session, ticker=ticker)
+    if stock_info_id is None:
+        return None
+
+    series = await _load_series(session=session, stock_info_id=stock_info_id)
+    values: dict[str, list[float | None]] = {}
+    if len(series.closes):
+        for name in names:
+            for output, array in series.compute(name, window).values.items():
+                masked = array.astype(object)
+                masked[: _warmup(output, window)] = None
+                masked[np.isnan(array)] = None
+                values[output] = masked.tolist()
+    times = pd.DatetimeIndex(series.times, tz="UTC").to_pydatetime().tolist()
+    return IndicatorSeriesRead(ticker=ticker, window=window, times=times, values=values)
@@ -0,0 +1,329 @@
+"""
+Service layer for lot-level cost basis tracking.
+
+Every buy opens a StockLot and every sell is matched against the open lots of the same
+user and stock, producing StockLotRealization rows. Holdings, cost basis and realized
+profit can then be read with aggregate queries instead of replaying the ledger.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any, cast
+
+from sqlalchemy import delete, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.models.holding import StockHoldingDetail
+from src.backend.models.lot import (
+    CostBasisMethod,
+    StockLot,
+    StockLotRealization,
+    StockProfitLossRead,
+    UserCostBasisSetting,
+)
+from src.backend.models.price import StockPrice
+from src.backend.models.transaction import StockTransaction
+
+BUY = "매수"
+SELL = "매도"
+
+
+def apply_transaction(
+    lots: list[StockLot], transaction: StockTransaction, method: CostBasisMethod
+) -> tuple[StockLot | None, list[tuple[StockLot, StockLotRealization]]]:
+    """
+    Applies a single transaction to the open lots of one user and stock, in place.
+
+    `lots` must be ordered by acquisition. A buy appends a new lot and returns it; a sell
+    consumes the oldest lots first and returns one (lot, realization) pair per lot touched. With the
+    average method the open lots are re-priced to the average cost before the sell, so the
+    remaining cost basis is the average cost times the remaining quantity.
+    Sell quantity beyond the open position is ignored.
+    """
+    if transaction.transaction_type == BUY:
+        lot = StockLot(
+            user_id=transaction.user_id,
+            stock_info_id=transaction.stock_info_id,
+            ticker=transaction.ticker,
+            transaction_id=transaction.id,
+            acquired_at=transaction.transaction_date,
+            quantity=transaction.quantity,
+            remaining_quantity=transaction.quantity,
+            unit_cost=transaction.total_amount / transaction.quantity if transaction.quantity else 0.0,
+        )
+        lots.append(lot)
+        return lot, []
+
+    if transaction.transaction_type != SELL or transaction.quantity <= 0:
+        return None, []
+
+    open_lots = [lot for lot in lots if lot.remaining_quantity > 0]
+    if method == CostBasisMethod.AVERAGE and open_lots:
+        open_quantity = sum(lot.remaining_quantity for lot in open_lots)
+        average_cost = sum(lot.remaining_quantity * lot.unit_cost for lot in open_lots) / open_quantity
+        for lot in open_lots:
+            lot.unit_cost = average_cost
+
+    unit_proceeds = transaction.total_amount / transaction.quantity
+    to_sell = transaction.quantity
+    matches = []
+    for lot in open_lots:
+        if to_sell <= 0:
+            break
+        matched = min(lot.remaining_quantity, to_sell)
+        lot.remaining_quantity -= matched
+        to_sell -= matched
+        proceeds = unit_proceeds * matched
+        cost_basis = lot.unit_cost * matched
+        realization = StockLotRealization(
+            user_id=transaction.user_id,
+            stock_info_id=transaction.stock_info_id,
+            ticker=transaction.ticker,
+            sell_transaction_id=transaction.id,
+            lot_id=lot.id,
+            realized_at=transaction.transaction_date,
+            quantity=matched,
+            proceeds=proceeds,
+            cost_basis=cost_basis,
+            realized_profit=proceeds - cost_basis,
+        )
+        matches.append((lot, realization))
+    return None, matches
+
+
+def replay_transactions(
+    transactions: Iterable[StockTransaction], method: CostBasisMethod, lots: list[StockLot] | None = None
+) -> tuple[list[StockLot], list[StockLotRealization]]:
+    """
+    Replays transactions, ordered by date, on top of `lots` and returns all lots and realizations.
+    """
+    lots = lots if lots is not None else []
+    realizations: list[StockLotRealization] = []
+    for transaction in transactions:
+        _, matches = apply_transaction(lots, transaction, method)
+        realizations.extend(realization for _, realization in matches)
+    return lots, realizations
+
+
+async def get_cost_basis_method(*, session: AsyncSession, user_id: int) -> CostBasisMethod:
+    """
+    Returns the user's cost basis method, defaulting to the average method.
+    """
+    result = await session.execute(
+        select(UserCostBasisSetting.cost_basis_method).where(UserCostBasisSetting.user_id == user_id)
+    )
+    method = result.scalar_one_or_none()
+    return CostBasisMethod(method) if method else CostBasisMethod.AVERAGE
+
+
+async def set_cost_basis_method(*, session: AsyncSession, user_id: int, method: CostBasisMethod) -> CostBasisMethod:
+    """
+    Stores the user's cost basis method and rebuilds all of the user's lots with it.
+    """
+    result = await session.execute(select(UserCostBasisSetting).where(UserCostBasisSetting.user_id == user_id))
+    db_setting = result.scalar_one_or_none()
+    if db_setting is None:
+        db_setting = UserCostBasisSetting(user_id=user_id, cost_basis_method=method)
+    else:
+        db_setting.cost_basis_method = method
+        db_setting.updated_at = datetime.now(timezone.utc)
+    session.add(db_setting)
+
+    pairs = await session.execute(
+        select(StockTransaction.stock_info_id, StockTransaction.ticker)
+        .where(StockTransaction.user_id == user_id)
+        .distinct()
+    )
+    for stock_info_id, ticker in pairs.all():
+        await rebuild_lots(session=session, user_id=user_id, stock_info_id=stock_info_id, ticker=ticker)
+    await session.flush()
+    return method
+
+
+async def rebuild_lots(*, session: AsyncSession, user_id: int, stock_info_id: int, ticker: str) -> None:
+    """
+    Discards the lots of one user and stock and rebuilds them from the full ledger.
+    Used when a transaction is edited, deleted or inserted before the latest one.
+    """
+    await session.execute(
+        delete(StockLotRealization).where(
+            cast(Any, StockLotRealization.user_id) == user_id,
+            cast(Any, StockLotRealization.stock_info_id) == stock_info_id,
+        )
+    )
+    await session.execute(
+        delete(StockLot).where(
+            cast(Any, StockLot.user_id) == user_id,
+            cast(Any, StockLot.stock_info_id) == stock_info_id,
+        )
+    )
+
+    method = await get_cost_basis_method(session=session, user_id=user_id)
+    result = await session.execute(
+        select(StockTransaction)
+        .where(StockTransaction.user_id == user_id, StockTransaction.stock_info_id == stock_info_id)
+        .order_by(cast(Any, StockTransaction.transaction_date), cast(Any, StockTransaction.id))
+    )
+
+    lots: list[StockLot] = []
+    matches: list[tuple[StockLot, StockLotRealization]] = []
+    for transaction in result.scalars().all():
+        _, matched = apply_transaction(lots, transaction, method)
+        matches.extend(matched)
+
+    session.add_all(lots)
+    await session.flush()
+    # Lot ids only exist after the flush above
+    for lot, realization in matches:
+        realization.lot_id = lot.id
+    session.add_all([realization for _, realization in matches])
+    await session.flush()
+
+
+async def record_transaction_lots(*, session: AsyncSession, transaction: StockTransaction) -> None:
+    """
+    Updates the lots for a newly written transaction.
+
+    When the transaction is the latest one for its user and stock only the open lots are
+    loaded and the transaction is applied on top of them. A back-dated transaction changes
+    the matching of every later sell, so the pair is rebuilt from the ledger instead.
+    """
+    later = await session.execute(
+        select(StockTransaction.id)
+        .where(
+            StockTransaction.user_id == transaction.user_id,
+            StockTransaction.stock_info_id == transaction.stock_info_id,
+            StockTransaction.id != transaction.id,
+            or_(
+                cast(Any, StockTransaction.transaction_date) > transaction.transaction_date,
+                (cast(Any, StockTransaction.transaction_date) == transaction.transaction_date)
+                & (cast(Any, StockTransaction.id) > transaction.id),
+            ),
+        )
+        .limit(1)
+    )
+    if later.first() is not None:
+        await rebuild_lots(
+            session=session,
+            user_id=transaction.user_id,
+            stock_info_id=transaction.stock_info_id,
+            ticker=transaction.ticker,
+        )
+        return
+
+    method = await get_cost_basis_method(session=session, user_id=transaction.user_id)
+    result = await session.execute(
+        select(StockLot)
+        .where(
+            StockLot.user_id == transaction.user_id,
+            StockLot.stock_info_id == transaction.stock_info_id,
+            StockLot.remaining_quantity > 0,
+        )
+        .order_by(cast(Any, StockLot.acquired_at), cast(Any, StockLot.id))
+    )
+    lots = list(result.scalars().all())
+    now = datetime.now(timezone.utc)
+    for lot in lots:
+        lot.updated_at = now
+    _, matches = apply_transaction(lots, transaction, method)
+    session.add_all(lots)
+    session.add_all([realization for _, realization in matches])
+    await session.flush()
+
+
+async def get_open_position(*, session: AsyncSession, user_id: int, stock_info_id: int) -> tuple[int, float]:
+    """
+    Returns the open quantity and its remaining cost basis for one user and stock.
+    """
+    result = await session.execute(
+        select(
+            func.coalesce(func.sum(StockLot.remaining_quantity), 0),
+            func.coalesce(func.sum(StockLot.remaining_quantity * StockLot.unit_cost), 0.0),
+        ).where(
+            StockLot.user_id == user_id,
+            StockLot.stock_info_id == stock_info_id,
+            StockLot.remaining_quantity > 0,
+        )
+    )
+    quantity, cost_basis = result.one()
+    return int(quantity), float(cost_basis)
+
+
+async def get_open_lots(*, session: AsyncSession, user_id: int, ticker: str) -> list[StockLot]:
+    """
+    Retrieves the open lots of a user for a ticker, oldest first.
+    """
+    result = await session.execute(
+        select(StockLot)
+        .where(StockLot.user_id == user_id, StockLot.ticker == ticker, StockLot.remaining_quantity > 0)
+        .order_by(cast(Any, StockLot.acquired_at), cast(Any, StockLot.id))
+    )
+    return list(result.scalars().all())
+
+
+def latest_price_subquery(user_id: int | None = None) -> Any:
+    """
+    Returns a subquery with the time of the latest stored bar per stock.
+    With `user_id` only the stocks the user holds are looked up.
+    """
+    query = select(StockPrice.stock_info_id, func.max(StockPrice.time).label("max_time"))
+    if user_id is not None:
+        held = select(StockHoldingDetail.stock_info_id).where(StockHoldingDetail.user_id == user_id)
+        query = query.where(cast(Any, StockPrice.stock_info_id).in_(held))
+    return query.group_by(cast(Any, StockPrice.stock_info_id)).subquery()
+
+
+async def get_user_profit_loss(*, session: AsyncSession, user_id: int) -> list[StockProfitLossRead]:
+    """
+    Returns realized and unrealized profit per stock for a user.
+
+    Unrealized profit uses the latest stored close; realized profit is summed from the
+    realization rows, so fully closed positions are reported as well.
+    """
+    latest = latest_price_subquery(user_id)
+    holdings = await session.execute(
+        select(StockHoldingDetail, StockPrice.close)
+        .outerjoin(latest, latest.c.stock_info_id == StockHoldingDetail.stock_info_id)
+        .outerjoin(
+            StockPrice,
+            (StockPrice.stock_info_id == latest.c.stock_info_id) & (StockPrice.time == latest.c.max_time),
+        )
+        .where(StockHoldingDetail.user_id == user_id)
+    )
+    realized = await session.execute(
+        select(
+            StockLotRealization.stock_info_id,
+            StockLotRealization.ticker,
+            func.sum(StockLotRealization.realized_profit),
+        )
+        .where(StockLotRealization.user_id == user_id)
+        .group_by(cast(Any, StockLotRealization.stock_info_id), cast(Any, StockLotRealization.ticker))
+    )
+    realized_by_stock = {stock_info_id: (ticker, float(profit)) for stock_info_id, ticker, profit in realized.all()}
+
+    rows: dict[int, StockProfitLossRead] = {}
+    for holding, close in holdings.all():
+        market_value = close * holding.holding_quantity if close is not None else None
+        rows[holding.stock_info_id] = StockProfitLossRead(
+            stock_info_id=holding.stock_info_id,
+            ticker=holding.ticker,
+            holding_quantity=holding.holding_quantity,
+            cost_basis=holding.total_buy_amount,
+            average_cost=holding.average_buy_price,
+            market_price=close,
+            market_value=market_value,
+            unrealized_profit=market_value - holding.total_buy_amount if market_value is not None else None,
+            realized_profit=realized_by_stock.get(holding.stock_info_id, (holding.ticker, 0.0))[1],
+        )
+    for stock_info_id, (ticker, profit) in realized_by_stock.items():
+        if stock_info_id not in rows:
+            rows[stock_info_id] = StockProfitLossRead(
+                stock_info_id=stock_info_id,
+                ticker=ticker,
+                holding_quantity=0,
+                cost_basis=0.0,
+                average_cost=0.0,
+                realized_profit=profit,
+            )
+    return sorted(rows.values(), key=lambda row: row.ticker)
@@ -0,0 +1,100 @@
+"""
+Service layer for portfolio-level aggregates.
+"""
+
+from typing import Any, cast
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.models.holding import StockHoldingDetail
+from src.backend.models.portfolio import (
+    PortfolioCurrencySummary,
+    PortfolioPositionSummary,
+    PortfolioSummaryRead,
+)
+from src.backend.models.price import StockPrice
+from src.backend.models.stock import StockInfo
+from src.backend.services.lot_service import latest_price_subquery
+
+
+def _profit_percent(profit: float, invested_amount: float) -> float | None:
+    return profit / invested_amount * 100 if invested_amount else None
+
+
+async def get_portfolio_summary(*, session: AsyncSession, user_id: int) -> PortfolioSummaryRead:
+    """
+    Returns a user's invested amount, market value and profit per ticker, per currency and,
+    when all positions share one currency, in total.
+
+    The per-ticker figures come from a single GROUP BY over the holdings joined with each
+    stock's latest stored close; positions without any price are valued at cost.
+    """
+    latest = latest_price_subquery(user_id)
+    market_value = func.sum(
+        func.coalesce(StockHoldingDetail.holding_quantity * StockPrice.close, StockHoldingDetail.total_buy_amount)
+    )
+    result = await session.execute(
+        select(
+            StockHoldingDetail.ticker,
+            StockInfo.currency,
+            func.sum(StockHoldingDetail.holding_quantity),
+            func.sum(StockHoldingDetail.total_buy_amount),
+            market_value,
+            func.count(StockPrice.id),
+        )
+        .join(StockInfo, cast(Any, StockInfo.id) == StockHoldingDetail.stock_info_id)
+        .outerjoin(latest, latest.c.stock_info_id == StockHoldingDetail.stock_info_id)
+        .outerjoin(
+            StockPrice,
+            (StockPrice.stock_info_id == latest.c.stock_info_id) & (StockPrice.time == latest.c.max_time),
+        )
+        .where(StockHoldingDetail.user_id == user_id)
+        .group_by(cast(Any, StockHoldingDetail.ticker), cast(Any, StockInfo.currency))
+        .order_by(cast(Any, StockHoldingDetail.ticker))
+    )
+    rows = result.all()
+
+    currency_totals: dict[str | None, list[float]] = {}
+    for _, currency, _, invested, value, _ in rows:
+        totals = currency_totals.setdefault(currency, [0.0, 0.0])
+        totals[0] += float(invested)
+        totals[1] += float(value)
+
+    positions = [
+        PortfolioPositionSummary(
+            ticker=ticker,
+            currency=currency,
+            holding_quantity=int(quantity),
+            invested_amount=float(invested),
+            market_value=float(value),
+            profit=float(value) - float(invested),
+            weight=float(value) / currency_totals[currency][1] if currency_totals[currency][1] else 0.0,
+            priced=priced_count > 0,
+        )
+        for ticker, currency, quantity, invested, value, priced_count in rows
+    ]
+    currencies = [
+        PortfolioCurrencySummary(
+            currency=currency,
+            invested_amount=invested,
+            market_value=value,
+            profit=value - invested,
+            profit_percent=_profit_percent(value - invested, invested),
+        )
+        for currency, (invested, value) in currency_totals.items()
+    ]
+    if len(currencies) > 1:
+        return PortfolioSummaryRead(user_id=user_id, currencies=currencies, positions=positions)
+    total = currencies[0] if currencies else PortfolioCurrencySummary(invested_amount=0.0, market_value=0.0, profit=0.0)
+    return PortfolioSummaryRead(
+        user_id=user_id,
+        currency=total.currency,
+        invested_amount=total.invested_amount,
+        market_value=total.market_value,
+        profit=total.profit,
+        profit_percent=total.profit_percent,
+        currencies=currencies,
+        positions=positions,
+    )
@@ -0,0 +1,76 @@
+"""
+Shared process pool for CPU-bound work.
+
+NumPy-heavy jobs such as backtest parameter sweeps would block the event loop and are
+limited by the GIL, so they are fanned out to worker processes. The pool is created on
+first use with `settings.PROCESS_POOL_WORKERS` workers and shut down with the app.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TypeVar
+
+from src.backend.config import settings
+
+T = TypeVar("T")
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def worker_count() -> int:
+    """
+    Returns the configured number of worker processes.
+    """
+    return settings.PROCESS_POOL_WORKERS or os.cpu_count() or 1
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Returns the shared executor, creating it on first use.
+    """
+    global _executor
+    if _executor is None:
+        # Workers are spawned rather than forked so they do not inherit the event loop or open connections
+        _executor = ProcessPoolExecutor(max_workers=worker_count(), mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def run_in_pool(fn: Callable[..., T], *args: Any) -> T:
+    """
+    Runs a picklable top-level function in the pool without blocking the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), fn, *args)
+
+
+async def map_in_pool(fn: Callable[..., T], chunks: Sequence[Any], *args: Any) -> list[T]:
+    """
+    Runs `fn(chunk, *args)` for every chunk concurrently in the pool and returns the results in order.
+    """
+    return list(await asyncio.gather(*(run_in_pool(fn, chunk, *args) for chunk in chunks)))
+
+
+def split(items: Sequence[T], parts: int) -> list[list[T]]:
+    """
+    Splits items into at most `parts` contiguous chunks of nearly equal size.
+    """
+    parts = max(1, min(parts, len(items)))
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(list(items[start:end]))
+        start = end
+    return chunks
+
+
+def shutdown_pool() -> None:
+    """
+    Shuts the shared executor down, waiting for running work to finish.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
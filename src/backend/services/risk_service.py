@@ -0,0 +1,180 @@
+"""
+Service layer for Monte Carlo Value-at-Risk of user holdings.
+
+Daily log returns of the held tickers are estimated from stored closes (via the analytics
+panel cache) and horizon returns are drawn from the fitted multivariate normal. Paths are
+simulated in fixed-size chunks on the shared process pool; each chunk gets its own child
+of the request's SeedSequence, so results depend on the seed but not on the worker count.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, cast
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.models.holding import StockHoldingDetail
+from src.backend.models.price import StockPrice
+from src.backend.models.risk import RiskPositionRead, ValueAtRiskRead
+from src.backend.models.stock import StockInfo
+from src.backend.services import analytics_service, process_pool
+from src.backend.services.lot_service import latest_price_subquery
+from src.backend.utils.datetime_utils import as_utc
+
+PATHS_PER_CHUNK = 50_000
+MAX_PATHS = 5_000_000
+MAX_CACHED_RESULTS = 128
+
+_cache: "OrderedDict[tuple[Any, ...], ValueAtRiskRead]" = OrderedDict()
+
+
+def covariance_factor(covariance: np.ndarray) -> np.ndarray:
+    """
+    Returns L with L @ L.T == covariance. Falls back to a clipped eigendecomposition when the
+    sample covariance is only positive semi-definite (e.g. perfectly correlated tickers).
+    """
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def simulate_pnl(
+    chunk: tuple[int, np.random.SeedSequence], mean: np.ndarray, factor: np.ndarray, values: np.ndarray
+) -> np.ndarray:
+    """
+    Simulates the profit and loss of `chunk[0]` paths seeded by `chunk[1]`.
+    """
+    paths, seed = chunk
+    rng = np.random.default_rng(seed)
+    log_returns = mean + rng.standard_normal((paths, len(values))) @ factor.T
+    return np.expm1(log_returns) @ values
+
+
+def tail_risk(pnl: np.ndarray, confidence: float) -> tuple[float, float]:
+    """
+    Returns (VaR, expected shortfall) of simulated P&L as positive losses.
+    """
+    cutoff = float(np.quantile(pnl, 1 - confidence))
+    return -cutoff, -float(pnl[pnl <= cutoff].mean())
+
+
+def invalidate() -> None:
+    """
+    Drops every cached estimate, e.g. after back-filled or purged prices changed the return history.
+    """
+    _cache.clear()
+
+
+async def get_value_at_risk(
+    *,
+    session: AsyncSession,
+    user_id: int,
+    confidence: float = 0.99,
+    horizon_days: int = 1,
+    paths: int = 100_000,
+    lookback: int = 252,
+    seed: int | None = None,
+    currency: str | None = None,
+) -> ValueAtRiskRead:
+    """
+    Estimates VaR and expected shortfall of a user's priced holdings.
+
+    Results for an explicit seed are cached by holdings, latest price date and parameters.
+    Raises ValueError if holdings span several currencies and none is chosen, or if there
+    are too few aligned returns to estimate a covariance.
+    """
+    latest = latest_price_subquery(user_id)
+    result = await session.execute(
+        select(
+            StockHoldingDetail.ticker,
+            StockHoldingDetail.holding_quantity,
+            StockInfo.currency,
+            StockPrice.close,
+            StockPrice.time,
+        )
+        .join(StockInfo, cast(Any, StockInfo.id) == StockHoldingDetail.stock_info_id)
+        .outerjoin(latest, latest.c.stock_info_id == StockHoldingDetail.stock_info_id)
+        .outerjoin(
+            StockPrice,
+            (StockPrice.stock_info_id == latest.c.stock_info_id) & (StockPrice.time == latest.c.max_time),
+        )
+        .where(StockHoldingDetail.user_id == user_id, cast(Any, StockHoldingDetail.holding_quantity) > 0)
+        .order_by(cast(Any, StockHoldingDetail.ticker))
+    )
+    rows = result.tuples().all()
+    currencies = {row[2] for row in rows}
+    if currency is not None:
+        rows = [row for row in rows if row[2] == currency]
+    elif len(currencies) > 1:
+        raise ValueError("Holdings span several currencies; choose one with `currency`")
+    else:
+        currency = next(iter(currencies), None)
+
+    priced = [row for row in rows if row[3] is not None]
+    unpriced = [row[0] for row in rows if row[3] is None]
+    price_date: datetime | None = max((as_utc(row[4]) for row in priced), default=None)
+    cacheable = seed is not None
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+    # The holdings themselves act as their version: any trade changes a quantity
+    key = (user_id, currency, tuple((row[0], row[1]) for row in priced), price_date)
+    key += (confidence, horizon_days, paths, lookback, seed)
+    if cacheable and key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key].model_copy()
+
+    values = np.array([row[1] * row[3] for row in priced], dtype=float)
+    portfolio_value = float(values.sum())
+    estimate = ValueAtRiskRead(
+        user_id=user_id,
+        currency=currency,
+        price_date=price_date,
+        confidence=confidence,
+        horizon_days=horizon_days,
+        paths=paths,
+        observations=0,
+        seed=seed,
+        portfolio_value=portfolio_value,
+        value_at_risk=0.0,
+        expected_shortfall=0.0,
+        positions=[
+            RiskPositionRead(
+                ticker=row[0],
+                holding_quantity=row[1],
+                market_value=float(value),
+                weight=float(value) / portfolio_value if portfolio_value else 0.0,
+            )
+            for row, value in zip(priced, values, strict=True)
+        ],
+        unpriced_tickers=unpriced,
+    )
+    if priced:
+        aligned = await analytics_service.get_log_returns(
+            session=session, tickers=[row[0] for row in priced], window=lookback
+        )
+        assert aligned is not None, "held tickers always exist"
+        returns = aligned[1]
+        if len(returns) < 2:
+            raise ValueError("Not enough overlapping price history to estimate returns")
+
+        # Daily returns are treated as independent, so horizon moments scale linearly
+        mean = returns.mean(axis=0) * horizon_days
+        factor = covariance_factor(np.atleast_2d(np.cov(returns, rowvar=False)) * horizon_days)
+        chunk_sizes = [PATHS_PER_CHUNK] * (paths // PATHS_PER_CHUNK)
+        if paths % PATHS_PER_CHUNK:
+            chunk_sizes.append(paths % PATHS_PER_CHUNK)
+        chunks = list(zip(chunk_sizes, np.random.SeedSequence(seed).spawn(len(chunk_sizes)), strict=True))
+        pnl = np.concatenate(await process_pool.map_in_pool(simulate_pnl, chunks, mean, factor, values))
+        estimate.observations = len(returns)
+        estimate.value_at_risk, estimate.expected_shortfall = tail_risk(pnl, confidence)
+
+    if cacheable:
+        _cache[key] = estimate
+        while len(_cache) > MAX_CACHED_RESULTS:
+            _cache.popitem(last=False)
+    return estimate.model_copy()
@@ -0,0 +1,130 @@
+"""
+Service layer for the per-stock rolling statistics table.
+
+Statistics only depend on the trailing 52 weeks of bars, so they are recomputed from
+at most YEAR_BARS rows, and only when a change touches that window.
+"""
+
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any, cast
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.models.price import StockPrice
+from src.backend.models.rolling_stat import StockRollingStat
+from src.backend.models.stock import StockInfo
+from src.backend.utils.datetime_utils import as_utc
+
+YEAR_BARS = 252
+VOLUME_BARS = 20
+SMA_BARS = 200
+
+
+def compute_rolling_stats(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray
+) -> dict[str, float | None]:
+    """
+    Computes the statistics from trailing bars ordered oldest first.
+    """
+    sma = float(close[-SMA_BARS:].mean()) if len(close) >= SMA_BARS else None
+    return {
+        "high_52w": float(high.max()),
+        "low_52w": float(low.min()),
+        "avg_volume_20d": float(volume[-VOLUME_BARS:].mean()),
+        "sma_200": sma,
+        "distance_from_sma_200_percent": (float(close[-1]) / sma - 1) * 100 if sma else None,
+    }
+
+
+async def refresh_rolling_stats(
+    *, session: AsyncSession, stock_info_id: int, ticker: str, newest_change: datetime | None = None
+) -> StockRollingStat | None:
+    """
+    Recomputes the statistics of a stock from its trailing bars. The caller commits.
+
+    `newest_change` is the time of the newest bar added or removed; when it lies before a
+    full stored window the statistics are unaffected and nothing is read.
+    """
+    result = await session.execute(select(StockRollingStat).where(StockRollingStat.stock_info_id == stock_info_id))
+    stat = result.scalar_one_or_none()
+    if (
+        stat is not None
+        and stat.bar_count >= YEAR_BARS
+        and newest_change is not None
+        and as_utc(newest_change) < as_utc(stat.window_start)
+    ):
+        return stat
+
+    result = await session.execute(
+        select(StockPrice.time, StockPrice.high, StockPrice.low, StockPrice.close, StockPrice.volume)
+        .where(StockPrice.stock_info_id == stock_info_id)
+        .order_by(cast(Any, StockPrice.time).desc())
+        .limit(YEAR_BARS)
+    )
+    rows = result.all()[::-1]
+    if not rows:
+        if stat is not None:
+            await session.delete(stat)
+        return None
+
+    columns = np.array([row[1:] for row in rows], dtype=float)
+    values = compute_rolling_stats(columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3])
+    if stat is None:
+        stat = StockRollingStat(
+            stock_info_id=stock_info_id,
+            ticker=ticker,
+            as_of=rows[-1][0],
+            window_start=rows[0][0],
+            bar_count=len(rows),
+            **values,
+        )
+    else:
+        stat.sqlmodel_update(
+            {"ticker": ticker, "as_of": rows[-1][0], "window_start": rows[0][0], "bar_count": len(rows), **values}
+        )
+        stat.updated_at = datetime.now(timezone.utc)
+    session.add(stat)
+    return stat
+
+
+async def refresh_rolling_stats_before(
+    *, session: AsyncSession, end: datetime, tickers: Sequence[str] | None = None
+) -> None:
+    """
+    Recomputes the statistics whose window starts before `end`, after bars older than `end`
+    were removed for all tickers or only the given ones. The caller commits.
+    """
+    statement = select(StockRollingStat).where(cast(Any, StockRollingStat.window_start) < as_utc(end))
+    if tickers:
+        statement = statement.where(cast(Any, StockRollingStat.ticker).in_(tickers))
+    result = await session.execute(statement)
+    for stat in result.scalars().all():
+        await refresh_rolling_stats(session=session, stock_info_id=stat.stock_info_id, ticker=stat.ticker)
+
+
+async def rebuild_rolling_stats(*, session: AsyncSession) -> int:
+    """
+    Recomputes the statistics of every stock, e.g. for a database that predates the table.
+    Returns the number of stocks with statistics.
+    """
+    result = await session.execute(select(StockInfo.id, StockInfo.ticker))
+    count = 0
+    for stock_info_id, ticker in result.tuples().all():
+        if await refresh_rolling_stats(session=session, stock_info_id=stock_info_id, ticker=ticker) is not None:
+            count += 1
+    await session.flush()
+    return count
+
+
+async def get_rolling_stats(*, session: AsyncSession, tickers: Sequence[str] | None = None) -> list[StockRollingStat]:
+    """
+    Reads the stored statistics of the given tickers, or of every stock, in one query.
+    """
+    statement = select(StockRollingStat).order_by(cast(Any, StockRollingStat.ticker))
+    if tickers is not None:
+        statement = statement.where(cast(Any, StockRollingStat.ticker).in_(tickers))
+    result = await session.execute(statement)
+    return list(result.scalars().all())
@@ -0,0 +1,202 @@
+"""
+Service layer for screening stored bars with a small filter language.
+
+A filter such as `change_percent > 5 AND volume > 1000000` is parsed into a SQLAlchemy
+expression and run as a single query over the requested date range, which the
+(time, change_percent) and (time, volume) indexes on `stockprice` narrow down.
+
+Grammar (keywords are case-insensitive):
+
+    expr       := term (OR term)*
+    term       := factor (AND factor)*
+    factor     := NOT factor | "(" expr ")" | comparison
+    comparison := operand (> | >= | < | <= | = | == | !=) operand
+    operand    := FIELD | NUMBER
+"""
+
+import re
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, cast
+
+from sqlalchemy import and_, literal, not_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import select
+
+from src.backend.models.price import StockPrice
+from src.backend.models.screener import ScreenerMatch
+from src.backend.models.stock import StockInfo
+from src.backend.utils.datetime_utils import as_utc
+
+FIELDS: dict[str, Any] = {
+    name: getattr(StockPrice, name)
+    for name in (
+        "open",
+        "high",
+        "low",
+        "close",
+        "previous_close",
+        "change",
+        "change_percent",
+        "adjusted_close",
+        "volume",
+    )
+}
+MAX_FILTER_LENGTH = 1000
+# Parentheses and NOTs nest the recursive descent; bound it well below Python's recursion limit
+MAX_NESTING = 32
+MAX_RESULTS = 5000
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)|(?P<op>>=|<=|!=|==|=|>|<)|(?P<paren>[()])"
+    r"|(?P<word>[A-Za-z_][A-Za-z_0-9]*))"
+)
+_COMPARISONS = {
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    "=": lambda a, b: a == b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+}
+
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unexpected character at position {position}: {text[position : position + 10]!r}")
+        kind = cast(str, match.lastgroup)
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self.depth = 0
+
+    def _peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise ValueError("Unexpected end of filter")
+        self.position += 1
+        return token
+
+    def _accept_keyword(self, keyword: str) -> bool:
+        token = self._peek()
+        if token is not None and token[0] == "word" and token[1].upper() == keyword:
+            self.position += 1
+            return True
+        return False
+
+    def parse(self) -> ColumnElement[bool]:
+        expression = self._expr()
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected {self._peek()[1]!r}")  # type: ignore[index]
+        return expression
+
+    def _expr(self) -> ColumnElement[bool]:
+        terms = [self._term()]
+        while self._accept_keyword("OR"):
+            terms.append(self._term())
+        return terms[0] if len(terms) == 1 else or_(*terms)
+
+    def _term(self) -> ColumnElement[bool]:
+        factors = [self._factor()]
+        while self._accept_keyword("AND"):
+            factors.append(self._factor())
+        return factors[0] if len(factors) == 1 else and_(*factors)
+
+    def _nested(self) -> None:
+        self.depth += 1
+        if self.depth > MAX_NESTING:
+            raise ValueError(f"The filter is limited to {MAX_NESTING} levels of parentheses and NOT")
+
+    def _factor(self) -> ColumnElement[bool]:
+        if self._accept_keyword("NOT"):
+            self._nested()
+            expression = not_(self._factor())
+            self.depth -= 1
+            return expression
+        if self._peek() == ("paren", "("):
+            self.position += 1
+            self._nested()
+            expression = self._expr()
+            if self._next() != ("paren", ")"):
+                raise ValueError("Missing ')'")
+            self.depth -= 1
+            return expression
+        left = self._operand()
+        kind, op = self._next()
+        if kind != "op":
+            raise ValueError(f"Expected a comparison operator, got {op!r}")
+        right = self._operand()
+        return _COMPARISONS[op](left, right)
+
+    def _operand(self) -> Any:
+        kind, value = self._next()
+        if kind == "number":
+            return literal(float(value))
+        if kind == "word" and value.lower() in FIELDS:
+            return FIELDS[value.lower()]
+        raise ValueError(f"Unknown field {value!r}; expected one of {', '.join(FIELDS)}")
+
+
+def compile_filter(text: str) -> ColumnElement[bool]:
+    """
+    Compiles a filter expression into a SQL condition on `stockprice`.
+    Raises ValueError if the expression is invalid or uses an unknown field.
+    """
+    if not text.strip():
+        raise ValueError("The filter is empty")
+    if len(text) > MAX_FILTER_LENGTH:
+        raise ValueError(f"The filter is limited to {MAX_FILTER_LENGTH} characters")
+    return _Parser(text).parse()
+
+
+async def screen(
+    *,
+    session: AsyncSession,
+    expression: str,
+    start: datetime,
+    end: datetime,
+    tickers: Sequence[str] | None = None,
+    limit: int = 500,
+) -> list[ScreenerMatch]:
+    """
+    Returns the bars with start <= time < end that satisfy the filter, ordered by time and ticker.
+    Raises ValueError if the filter is invalid.
+    """
+    condition = compile_filter(expression)
+    statement = (
+        select(
+            StockPrice.stock_info_id,
+            StockInfo.ticker,
+            StockPrice.time,
+            StockPrice.open,
+            StockPrice.high,
+            StockPrice.low,
+            StockPrice.close,
+            StockPrice.volume,
+            StockPrice.change,
+            StockPrice.change_percent,
+        )
+        .join(StockInfo, cast(Any, StockInfo.id) == StockPrice.stock_info_id)
+        .where(cast(Any, StockPrice.time) >= as_utc(start), cast(Any, StockPrice.time) < as_utc(end), condition)
+        .order_by(cast(Any, StockPrice.time), cast(Any, StockInfo.ticker))
+        .limit(min(limit, MAX_RESULTS))
+    )
+    if tickers:
+        statement = statement.where(cast(Any, StockInfo.ticker).in_(tickers))
+    result = await session.execute(statement)
+    return [ScreenerMatch.model_validate(row._mapping) for row in result.all()]
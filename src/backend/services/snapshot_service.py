@@ -0,0 +1,235 @@
+"""
+Service layer for periodic holdings snapshots.
+
+Positions are checkpointed per user, stock and calendar month. An as-of query reads the
+nearest snapshot before the requested date and replays only the transactions after it.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, cast
+
+from sqlalchemy import and_, delete, func, or_, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.models.lot import CostBasisMethod, StockLot
+from src.backend.models.snapshot import StockHoldingAsOfRead, StockHoldingSnapshot
+from src.backend.models.transaction import StockTransaction
+from src.backend.services import lot_service
+from src.backend.utils.datetime_utils import as_utc, month_start, next_month_start
+
+
+def _lots_from_snapshot(snapshot: StockHoldingSnapshot) -> list[StockLot]:
+    """
+    Restores the open lots stored in a snapshot as transient StockLot objects.
+    """
+    return [
+        StockLot(
+            user_id=snapshot.user_id,
+            stock_info_id=snapshot.stock_info_id,
+            ticker=snapshot.ticker,
+            transaction_id=transaction_id,
+            acquired_at=datetime.fromisoformat(acquired_at),
+            quantity=remaining_quantity,
+            remaining_quantity=remaining_quantity,
+            unit_cost=unit_cost,
+        )
+        for acquired_at, remaining_quantity, unit_cost, transaction_id in snapshot.open_lots
+    ]
+
+
+def _build_snapshot(
+    *,
+    user_id: int,
+    stock_info_id: int,
+    ticker: str,
+    period_end: datetime,
+    lots: list[StockLot],
+    realized_profit: float,
+    method: CostBasisMethod,
+) -> StockHoldingSnapshot:
+    """
+    Creates a snapshot row from the open lots at the end of a period.
+    """
+    open_lots = [lot for lot in lots if lot.remaining_quantity > 0]
+    return StockHoldingSnapshot(
+        user_id=user_id,
+        stock_info_id=stock_info_id,
+        ticker=ticker,
+        period_end=period_end,
+        holding_quantity=sum(lot.remaining_quantity for lot in open_lots),
+        cost_basis=sum(lot.remaining_quantity * lot.unit_cost for lot in open_lots),
+        realized_profit=realized_profit,
+        cost_basis_method=method,
+        open_lots=[
+            [as_utc(lot.acquired_at).isoformat(), lot.remaining_quantity, lot.unit_cost, lot.transaction_id]
+            for lot in open_lots
+        ],
+    )
+
+
+async def invalidate_snapshots(*, session: AsyncSession, user_id: int, stock_info_id: int, since: datetime) -> None:
+    """
+    Deletes the snapshots of one user and stock that include a transaction dated `since`.
+    Must be called whenever a transaction is inserted, edited or deleted.
+    """
+    await session.execute(
+        delete(StockHoldingSnapshot).where(
+            cast(Any, StockHoldingSnapshot.user_id) == user_id,
+            cast(Any, StockHoldingSnapshot.stock_info_id) == stock_info_id,
+            cast(Any, StockHoldingSnapshot.period_end) > since,
+        )
+    )
+
+
+async def checkpoint_holdings(
+    *, session: AsyncSession, user_id: int, stock_info_id: int, ticker: str, now: datetime | None = None
+) -> int:
+    """
+    Writes a snapshot at the end of every completed month with activity since the latest snapshot.
+
+    Only the transactions after the latest valid snapshot are replayed. Snapshots written
+    with another cost basis method are discarded first. Returns the number of snapshots written.
+    """
+    method = await lot_service.get_cost_basis_method(session=session, user_id=user_id)
+    await session.execute(
+        delete(StockHoldingSnapshot).where(
+            cast(Any, StockHoldingSnapshot.user_id) == user_id,
+            cast(Any, StockHoldingSnapshot.stock_info_id) == stock_info_id,
+            cast(Any, StockHoldingSnapshot.cost_basis_method) != method,
+        )
+    )
+    result = await session.execute(
+        select(StockHoldingSnapshot)
+        .where(StockHoldingSnapshot.user_id == user_id, StockHoldingSnapshot.stock_info_id == stock_info_id)
+        .order_by(cast(Any, StockHoldingSnapshot.period_end).desc())
+        .limit(1)
+    )
+    latest = result.scalar_one_or_none()
+    cutoff = month_start(now or datetime.now(timezone.utc))
+
+    query = select(StockTransaction).where(
+        StockTransaction.user_id == user_id,
+        StockTransaction.stock_info_id == stock_info_id,
+        StockTransaction.transaction_date < cutoff,
+    )
+    if latest is not None:
+        query = query.where(StockTransaction.transaction_date >= as_utc(latest.period_end))
+    result = await session.execute(
+        query.order_by(cast(Any, StockTransaction.transaction_date), cast(Any, StockTransaction.id))
+    )
+    transactions = result.scalars().all()
+    if not transactions:
+        return 0
+
+    lots = _lots_from_snapshot(latest) if latest is not None else []
+    realized_profit = latest.realized_profit if latest is not None else 0.0
+    snapshots = []
+    period_end = next_month_start(transactions[0].transaction_date)
+    for transaction in transactions:
+        if as_utc(transaction.transaction_date) >= period_end:
+            snapshots.append(
+                _build_snapshot(
+                    user_id=user_id,
+                    stock_info_id=stock_info_id,
+                    ticker=ticker,
+                    period_end=period_end,
+                    lots=lots,
+                    realized_profit=realized_profit,
+                    method=method,
+                )
+            )
+            period_end = next_month_start(transaction.transaction_date)
+        _, matches = lot_service.apply_transaction(lots, transaction, method)
+        realized_profit += sum(realization.realized_profit for _, realization in matches)
+    snapshots.append(
+        _build_snapshot(
+            user_id=user_id,
+            stock_info_id=stock_info_id,
+            ticker=ticker,
+            period_end=period_end,
+            lots=lots,
+            realized_profit=realized_profit,
+            method=method,
+        )
+    )
+    session.add_all(snapshots)
+    await session.flush()
+    return len(snapshots)
+
+
+async def get_holdings_as_of(*, session: AsyncSession, user_id: int, as_of: datetime) -> list[StockHoldingAsOfRead]:
+    """
+    Returns the user's open positions including every transaction dated at or before `as_of`.
+    """
+    method = await lot_service.get_cost_basis_method(session=session, user_id=user_id)
+    nearest = (
+        select(
+            StockHoldingSnapshot.stock_info_id,
+            func.max(StockHoldingSnapshot.period_end).label("period_end"),
+        )
+        .where(
+            StockHoldingSnapshot.user_id == user_id,
+            StockHoldingSnapshot.cost_basis_method == method,
+            StockHoldingSnapshot.period_end <= as_of,
+        )
+        .group_by(cast(Any, StockHoldingSnapshot.stock_info_id))
+        .subquery()
+    )
+    result = await session.execute(
+        select(StockHoldingSnapshot)
+        .join(
+            nearest,
+            (StockHoldingSnapshot.stock_info_id == nearest.c.stock_info_id)
+            & (StockHoldingSnapshot.period_end == nearest.c.period_end),
+        )
+        .where(StockHoldingSnapshot.user_id == user_id, StockHoldingSnapshot.cost_basis_method == method)
+    )
+    snapshots = {snapshot.stock_info_id: snapshot for snapshot in result.scalars().all()}
+
+    # Only the tail after each stock's snapshot is read; stocks without a snapshot are replayed in full
+    tails = [
+        and_(
+            cast(Any, StockTransaction.stock_info_id) == stock_info_id,
+            cast(Any, StockTransaction.transaction_date) >= as_utc(snapshot.period_end),
+        )
+        for stock_info_id, snapshot in snapshots.items()
+    ]
+    without_snapshot = cast(Any, StockTransaction.stock_info_id).notin_(list(snapshots)) if snapshots else true()
+    result = await session.execute(
+        select(StockTransaction)
+        .where(
+            StockTransaction.user_id == user_id,
+            StockTransaction.transaction_date <= as_of,
+            or_(without_snapshot, *tails),
+        )
+        .order_by(cast(Any, StockTransaction.transaction_date), cast(Any, StockTransaction.id))
+    )
+
+    positions: dict[int, tuple[str, list[StockLot], float]] = {
+        stock_info_id: (snapshot.ticker, _lots_from_snapshot(snapshot), snapshot.realized_profit)
+        for stock_info_id, snapshot in snapshots.items()
+    }
+    for transaction in result.scalars().all():
+        ticker, lots, realized_profit = positions.get(transaction.stock_info_id, (transaction.ticker, [], 0.0))
+        _, matches = lot_service.apply_transaction(lots, transaction, method)
+        realized_profit += sum(realization.realized_profit for _, realization in matches)
+        positions[transaction.stock_info_id] = (ticker, lots, realized_profit)
+
+    holdings = []
+    for stock_info_id, (ticker, lots, realized_profit) in positions.items():
+        quantity = sum(lot.remaining_quantity for lot in lots)
+        if quantity <= 0:
+            continue
+        cost_basis = sum(lot.remaining_quantity * lot.unit_cost for lot in lots)
+        holdings.append(
+            StockHoldingAsOfRead(
+                stock_info_id=stock_info_id,
+                ticker=ticker,
+                holding_quantity=quantity,
+                cost_basis=cost_basis,
+                average_cost=cost_basis / quantity,
+                realized_profit=realized_profit,
+            )
+        )
+    return sorted(holdings, key=lambda holding: holding.ticker)
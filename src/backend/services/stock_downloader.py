@@ -6,6 +6,9 @@ from pathlib import Path
 import pandas as pd
 import yfinance as yf
 
+from src.backend import metrics
+from src.backend.services.trading_calendar import get_calendar
+
 
 class StockDownloader:
     """
@@ -43,6 +46,7 @@ class StockDownloader:
         start_date: str,
         end_date: str,
         auto_adjust: bool = True,
+        market: str | None = None,
     ) -> pd.DataFrame | None:
         """
         지정된 Ticker의 주식 데이터를 다운로드합니다.
@@ -54,28 +58,36 @@ class StockDownloader:
             start_date (str): 데이터를 다운로드할 시작 날짜 (YYYY-MM-DD).
             end_date (str): 데이터를 다운로드할 종료 날짜 (YYYY-MM-DD).
             auto_adjust (bool): yfinance의 auto_adjust 옵션.
+            market (str | None): 거래소 캘린더를 고를 시장 (예: "NASDAQ", "KOSPI").
 
         Returns:
             pd.DataFrame | None: 다운로드한 주식 데이터. 새로운 데이터가 없으면 None을 반환합니다.
         """
-        effective_start_date = self._get_effective_start_date(ticker, start_date)
+        calendar = get_calendar(market)
+        effective_start_date = self._get_effective_start_date(ticker, start_date, market)
         end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
 
         if effective_start_date > end_dt:
             print(f"[{ticker}] No new data to download. Already up-to-date.")
             return None
 
+        # 주말이나 휴장일만 포함된 구간에는 새 데이터가 있을 수 없으므로 요청하지 않습니다.
+        if not calendar.has_session(effective_start_date, end_dt):
+            print(f"[{ticker}] No trading sessions between {effective_start_date} and {end_date}. Skipping.")
+            return None
+
         print(f"[{ticker}] Downloading data from {effective_start_date.strftime('%Y-%m-%d')} to {end_date}")
 
         # yfinance는 end_date를 포함하지 않으므로 하루를 더해줍니다.
         download_end_date = (end_dt + timedelta(days=1)).strftime("%Y-%m-%d")
 
-        data = yf.download(
-            ticker,
-            start=effective_start_date.strftime("%Y-%m-%d"),
-            end=download_end_date,
-            auto_adjust=auto_adjust,
-        )
+        with metrics.DOWNLOAD_DURATION.time(ticker=ticker):
+            data = yf.download(
+                ticker,
+                start=effective_start_date.strftime("%Y-%m-%d"),
+                end=download_end_date,
+                auto_adjust=auto_adjust,
+            )
 
         if data.empty:
             print(f"[{ticker}] No data found for the given period.")
@@ -95,13 +107,14 @@ class StockDownloader:
 
         return data
 
-    def _get_effective_start_date(self, ticker: str, requested_start_date: str) -> date:
+    def _get_effective_start_date(self, ticker: str, requested_start_date: str, market: str | None = None) -> date:
         """
         메타데이터를 기반으로 실제 다운로드를 시작할 날짜를 결정합니다.
 
         Args:
             ticker (str): 확인할 Ticker.
             requested_start_date (str): 사용자가 요청한 시작 날짜.
+            market (str | None): 거래소 캘린더를 고를 시장.
 
         Returns:
             datetime.date: 실제 다운로드를 시작해야 하는 날짜.
@@ -109,7 +122,7 @@ class StockDownloader:
         if ticker in self.ticker_metadata:
             last_download_date_str = self.ticker_metadata[ticker]
             last_download_date = datetime.strptime(last_download_date_str, "%Y-%m-%d").date()
-            # 마지막으로 받은 날짜의 다음 날부터 다운로드 시작
-            return last_download_date + timedelta(days=1)
+            # 마지막으로 받은 날짜 이후의 첫 거래일부터 다운로드 시작
+            return get_calendar(market).next_session(last_download_date + timedelta(days=1))
 
         return datetime.strptime(requested_start_date, "%Y-%m-%d").date()
@@ -3,20 +3,29 @@ Service layer for stock-related business logic.
 """
 
 from datetime import datetime, timezone
+from types import SimpleNamespace
 from typing import Any, cast
 
 import pandas as pd
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
 
+from src.backend import metrics, partitioning
+from src.backend.database import after_commit
+from src.backend.models.corporate_action import StockCorporateAction
 from src.backend.models.holding import (
     StockHoldingDetail,
     StockHoldingDetailCreate,
     StockHoldingDetailRead,
     StockHoldingDetailUpdate,
 )
+from src.backend.models.lot import StockLot, StockLotRealization
 from src.backend.models.price import StockPrice
+from src.backend.models.rolling_stat import StockRollingStat
+from src.backend.models.snapshot import StockHoldingSnapshot
 from src.backend.models.stock import (
     StockInfo,
     StockInfoCreate,
@@ -30,7 +39,19 @@ from src.backend.models.transaction import (
     StockTransactionRead,
     StockTransactionUpdate,
 )
-from src.backend.services.yf_adapter import df_to_stockbase
+from src.backend.query_stats import recorded
+from src.backend.services import (
+    analytics_service,
+    columnar_store,
+    corporate_action_service,
+    indicator_service,
+    lot_service,
+    risk_service,
+    rolling_stats_service,
+    snapshot_service,
+)
+from src.backend.services.yf_adapter import df_to_corporate_actions, df_to_stockbase
+from src.backend.utils.datetime_utils import as_utc
 
 
 async def get_or_create_stock_info(*, session: AsyncSession, ticker: str, stock_info_data: dict) -> StockInfo:
@@ -42,8 +63,7 @@ async def get_or_create_stock_info(*, session: AsyncSession, ticker: str, stock_
     if not db_stock_info:
         db_stock_info = StockInfo.model_validate(StockInfoCreate(**stock_info_data))
         session.add(db_stock_info)
-        await session.commit()
-        await session.refresh(db_stock_info)
+        await session.flush()
     return db_stock_info
 
 
@@ -63,6 +83,8 @@ async def get_stock_info(*, session: AsyncSession, stock_info_id: int) -> StockI
 async def get_stock_info_by_ticker(*, session: AsyncSession, ticker: str) -> StockInfoReadWithPrices | None:
     """
     Retrieves a stock info entry by its ticker with all its prices, using eager loading.
+    The prices are not read from the columnar store: it keeps only time and OHLCV, while
+    StockPriceRead also returns each row's id, change fields and timestamps.
     """
     result = await session.execute(
         select(StockInfo).where(StockInfo.ticker == ticker).options(selectinload(cast(Any, StockInfo.prices)))
@@ -73,6 +95,17 @@ async def get_stock_info_by_ticker(*, session: AsyncSession, ticker: str) -> Sto
     return StockInfoReadWithPrices.model_validate(stock_info)
 
 
+async def get_stock_info_summary_by_ticker(*, session: AsyncSession, ticker: str) -> StockInfoRead | None:
+    """
+    Retrieves a stock info entry by its ticker, without loading its prices.
+    """
+    result = await session.execute(select(StockInfo).where(StockInfo.ticker == ticker))
+    stock_info = result.scalar_one_or_none()
+    if not stock_info:
+        return None
+    return StockInfoRead.model_validate(stock_info)
+
+
 async def get_all_stock_infos(*, session: AsyncSession) -> list[StockInfoRead]:
     """
     Retrieves all stock info entries from the database, without prices.
@@ -92,16 +125,17 @@ async def create_stock_transaction(
     """
     db_transaction = StockTransaction.model_validate(transaction)
     session.add(db_transaction)
-    await session.commit()
-    await session.refresh(db_transaction)
+    await session.flush()
 
-    # Update StockHoldingDetail based on the new transaction
-    await _update_stock_holding_detail(
+    # Apply the new transaction to the open lots, then update StockHoldingDetail from them
+    await lot_service.record_transaction_lots(session=session, transaction=db_transaction)
+    await _write_stock_holding_detail(
         session=session,
         user_id=db_transaction.user_id,
         stock_info_id=db_transaction.stock_info_id,
         ticker=db_transaction.ticker,
     )
+    await _refresh_holding_snapshots(session=session, transaction=db_transaction)
 
     return db_transaction
 
@@ -143,8 +177,7 @@ async def update_stock_transaction(
 
     db_transaction.updated_at = datetime.now(timezone.utc)
     session.add(db_transaction)
-    await session.commit()
-    await session.refresh(db_transaction)
+    await session.flush()
 
     # Update StockHoldingDetail after transaction update
     await _update_stock_holding_detail(
@@ -153,6 +186,7 @@ async def update_stock_transaction(
         stock_info_id=db_transaction.stock_info_id,
         ticker=db_transaction.ticker,
     )
+    await _refresh_holding_snapshots(session=session, transaction=db_transaction)
 
     return db_transaction
 
@@ -168,7 +202,7 @@ async def delete_stock_transaction(*, session: AsyncSession, transaction_id: int
         return False
 
     await session.delete(db_transaction)
-    await session.commit()
+    await session.flush()
 
     # Update StockHoldingDetail after transaction deletion
     await _update_stock_holding_detail(
@@ -177,10 +211,29 @@ async def delete_stock_transaction(*, session: AsyncSession, transaction_id: int
         stock_info_id=db_transaction.stock_info_id,
         ticker=db_transaction.ticker,
     )
+    await _refresh_holding_snapshots(session=session, transaction=db_transaction)
 
     return True
 
 
+async def _refresh_holding_snapshots(*, session: AsyncSession, transaction: StockTransaction) -> None:
+    """
+    Drops the holdings snapshots that include a written transaction and checkpoints completed months again.
+    """
+    await snapshot_service.invalidate_snapshots(
+        session=session,
+        user_id=transaction.user_id,
+        stock_info_id=transaction.stock_info_id,
+        since=transaction.transaction_date,
+    )
+    await snapshot_service.checkpoint_holdings(
+        session=session,
+        user_id=transaction.user_id,
+        stock_info_id=transaction.stock_info_id,
+        ticker=transaction.ticker,
+    )
+
+
 async def update_stock_info(
     *, session: AsyncSession, stock_info_id: int, stock_update: StockInfoUpdate
 ) -> StockInfoRead | None:
@@ -199,31 +252,160 @@ async def update_stock_info(
 
     db_stock_info.updated_at = datetime.now(timezone.utc)
     session.add(db_stock_info)
-    await session.commit()
-    await session.refresh(db_stock_info)
+    await session.flush()
     return StockInfoRead.model_validate(db_stock_info)
 
 
 async def delete_stock_info(*, session: AsyncSession, stock_info_id: int) -> bool:
     """
-    Deletes a stock info and its associated prices from the database.
+    Deletes a stock info and everything that references it: prices, rolling statistics,
+    corporate actions, transactions, holdings, lots and snapshots. Each table is cleared
+    with one set-based DELETE in a single transaction, so no rows are loaded into the session.
     """
-    result = await session.execute(select(StockInfo).where(StockInfo.id == stock_info_id))
-    db_stock_info = result.scalar_one_or_none()
-
-    if not db_stock_info:
+    result = await session.execute(select(StockInfo.id).where(StockInfo.id == stock_info_id))
+    if result.scalar_one_or_none() is None:
         return False
 
-    # Delete associated prices first
-    price_result = await session.execute(select(StockPrice).where(StockPrice.stock_info_id == stock_info_id))
-    for price in price_result.scalars().all():
-        await session.delete(price)
-
-    await session.delete(db_stock_info)
-    await session.commit()
+    # Children first, so foreign keys are satisfied on databases that enforce them
+    for model in (
+        StockLotRealization,
+        StockLot,
+        StockHoldingSnapshot,
+        StockHoldingDetail,
+        StockTransaction,
+        StockRollingStat,
+        StockCorporateAction,
+        StockPrice,
+    ):
+        await session.execute(
+            delete(model)
+            .where(cast(Any, model.stock_info_id) == stock_info_id)
+            .execution_options(synchronize_session=False)
+        )
+    await session.execute(
+        delete(StockInfo).where(cast(Any, StockInfo.id) == stock_info_id).execution_options(synchronize_session=False)
+    )
+    after_commit(session, lambda: _invalidate_caches(stock_info_id))
     return True
 
 
+async def purge_stock_prices(
+    *, session: AsyncSession, start: datetime, end: datetime, tickers: list[str] | None = None
+) -> int:
+    """
+    Deletes the stored bars with `start <= time < end`, for all tickers or only the given ones.
+    Returns the number of deleted rows.
+    """
+    statement = delete(StockPrice).where(
+        cast(Any, StockPrice.time) >= as_utc(start),
+        cast(Any, StockPrice.time) < as_utc(end),
+    )
+    if tickers:
+        ticker_ids = select(StockInfo.id).where(cast(Any, StockInfo.ticker).in_(tickers))
+        statement = statement.where(cast(Any, StockPrice.stock_info_id).in_(ticker_ids))
+    result = await session.execute(statement.execution_options(synchronize_session=False))
+    await rolling_stats_service.refresh_rolling_stats_before(session=session, end=end, tickers=tickers)
+    await session.flush()
+    after_commit(session, _invalidate_caches)
+    return cast(Any, result).rowcount
+
+
+def _invalidate_caches(stock_info_id: int | None = None) -> None:
+    """
+    Drops the cached series of one stock, or of every stock, after its stored data changed.
+    """
+    columnar_store.invalidate(stock_info_id)
+    indicator_service.invalidate(stock_info_id)
+    analytics_service.invalidate(stock_info_id)
+    risk_service.invalidate()
+    corporate_action_service.invalidate(stock_info_id)
+
+
+# Columns of StockPrice that come from the converted frame
+_PRICE_COLUMNS = {
+    "time",
+    "open",
+    "high",
+    "low",
+    "close",
+    "previous_close",
+    "change",
+    "change_percent",
+    "adjusted_close",
+    "volume",
+}
+_STAGED_COLUMNS = ["stock_info_id", *sorted(_PRICE_COLUMNS), "created_at", "updated_at"]
+INSERT_BATCH_SIZE = 5_000
+
+
+def _price_rows(records: list[Any], stock_info_id: int) -> list[dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            **record.model_dump(include=_PRICE_COLUMNS),
+            "time": as_utc(record.time),
+            "stock_info_id": stock_info_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for record in records
+    ]
+
+
+async def _insert_new_prices(*, session: AsyncSession, rows: list[dict[str, Any]]) -> list[Any]:
+    """
+    Inserts the rows in executemany batches with ON CONFLICT DO NOTHING, so bars stored
+    concurrently by another writer are skipped instead of failing the transaction. The rows'
+    times must be distinct. Returns the inserted rows (RETURNING needs SQLite 3.35 or later).
+    """
+    dialect_insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert
+    table = cast(Any, StockPrice).__table__
+    statement = (
+        dialect_insert(table)
+        .on_conflict_do_nothing(index_elements=["stock_info_id", "time"])
+        .returning(table.c.time, table.c.open, table.c.high, table.c.low, table.c.close, table.c.volume)
+    )
+    inserted = []
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        result = await session.execute(statement, rows[start : start + INSERT_BATCH_SIZE])
+        # SQLite returns naive datetimes, so report every time as UTC
+        inserted += [SimpleNamespace(**{**row._mapping, "time": as_utc(row.time)}) for row in result]
+    return inserted
+
+
+async def _copy_new_prices(*, session: AsyncSession, rows: list[dict[str, Any]]) -> list[Any]:
+    """
+    PostgreSQL path: streams the rows into a temporary staging table with COPY, then merges
+    them into stockprice with ON CONFLICT DO NOTHING. The rows' times must be distinct.
+    Returns the inserted rows.
+    """
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    driver = cast(Any, raw).driver_connection
+    columns = ", ".join(_STAGED_COLUMNS)
+    statement = "DROP TABLE IF EXISTS stockprice_staging"
+    async with recorded(statement):
+        await driver.execute(statement)
+    statement = (
+        f"CREATE TEMPORARY TABLE stockprice_staging ON COMMIT DROP AS SELECT {columns} FROM stockprice WITH NO DATA"
+    )
+    async with recorded(statement):
+        await driver.execute(statement)
+    async with recorded(f"COPY stockprice_staging ({columns}) FROM STDIN"):
+        await driver.copy_records_to_table(
+            "stockprice_staging",
+            records=[tuple(row[column] for column in _STAGED_COLUMNS) for row in rows],
+            columns=_STAGED_COLUMNS,
+        )
+    statement = (
+        f"INSERT INTO stockprice ({columns}) SELECT {columns} FROM stockprice_staging "
+        "ON CONFLICT (stock_info_id, time) DO NOTHING RETURNING time, open, high, low, close, volume"
+    )
+    async with recorded(statement):
+        merged = await driver.fetch(statement)
+    return [SimpleNamespace(**dict(row)) for row in merged]
+
+
 async def upsert_stocks_from_dataframe(
     *,
     session: AsyncSession,
@@ -237,12 +419,15 @@ async def upsert_stocks_from_dataframe(
 ) -> int:
     """
     Converts a yfinance DataFrame to standard models and saves them to the DB.
-    Skips duplicate records (based on time and ticker) and only saves new data.
+    Skips duplicate records (based on time and ticker) and only saves new data, refreshing the
+    ticker's rolling statistics in the same transaction. For unadjusted downloads, dividends and
+    splits found in the frame are recorded as corporate actions.
     Returns the number of newly saved records.
     """
     stock_info_data = {"ticker": ticker, "name": name, "market": market, "currency": currency}
     stock_info = await get_or_create_stock_info(session=session, ticker=ticker, stock_info_data=stock_info_data)
     assert stock_info.id is not None, "StockInfo must have an ID after creation"
+    stock_info_id = stock_info.id
 
     records = df_to_stockbase(
         df, ticker=ticker, name=name, market=market, currency=currency, auto_adjust=auto_adjust, timezone=timezone
@@ -251,36 +436,62 @@ async def upsert_stocks_from_dataframe(
     if not records:
         return 0
 
-    times = [r.time for r in records]
-    min_time, max_time = min(times), max(times)
-
-    existing = await session.execute(
-        select(StockPrice.time).where(
-            StockPrice.stock_info_id == stock_info.id,
-            StockPrice.time >= min_time,
-            StockPrice.time <= max_time,
-        )
+    # Adjusted downloads already have the actions applied to their prices
+    actions = [] if auto_adjust else df_to_corporate_actions(df, ticker=ticker, timezone=timezone)
+    await corporate_action_service.record_corporate_actions(
+        session=session, stock_info_id=stock_info_id, actions=actions
     )
-    existing_times = set(existing.scalars().all())
+    new_records = await store_price_rows(
+        session=session, stock_info_id=stock_info_id, ticker=ticker, rows=_price_rows(records, stock_info_id)
+    )
+    after_commit(session, lambda: metrics.record_ingest(len(records), len(new_records)))
+
+    return len(new_records)
 
-    inserted_count = 0
-    for record in records:
-        if record.time not in existing_times:
-            price_data = record.model_dump()
-            # Remove fields that are not in StockPrice
-            price_data.pop("ticker", None)
-            price_data.pop("name", None)
-            price_data.pop("market", None)
-            price_data.pop("currency", None)
 
-            db_price = StockPrice(**price_data, stock_info_id=stock_info.id)
-            session.add(db_price)
-            inserted_count += 1
+async def store_price_rows(
+    *, session: AsyncSession, stock_info_id: int, ticker: str, rows: list[dict[str, Any]]
+) -> list[Any]:
+    """
+    Stores price rows of one stock, skipping bars that are already stored, then refreshes the
+    stock's rolling statistics once. Each row holds the StockPrice columns with a UTC `time`,
+    so bulk loaders can build them without converting a frame. Returns the inserted rows.
+    """
+    if not rows:
+        return []
+    # A batch may repeat a time; both backends keep the last row for it
+    rows = list({row["time"]: row for row in rows}.values())
+    connection = await session.connection()
+    if partitioning.is_enabled(connection.sync_connection):
+        await connection.run_sync(
+            partitioning.ensure_partitions, min(row["time"] for row in rows), max(row["time"] for row in rows)
+        )
+    if session.get_bind().dialect.driver == "asyncpg":
+        new_records = await _copy_new_prices(session=session, rows=rows)
+    else:
+        new_records = await _insert_new_prices(session=session, rows=rows)
+
+    if new_records:
+        await rolling_stats_service.refresh_rolling_stats(
+            session=session,
+            stock_info_id=stock_info_id,
+            ticker=ticker,
+            newest_change=max(r.time for r in new_records),
+        )
+        await session.flush()
+        after_commit(session, lambda: _extend_caches(stock_info_id, new_records))
+    return new_records
 
-    if inserted_count > 0:
-        await session.commit()
 
-    return inserted_count
+def _extend_caches(stock_info_id: int, new_records: list[Any]) -> None:
+    """
+    Appends committed bars to the cached series that can be extended, and drops the others.
+    """
+    columnar_store.append(stock_info_id, new_records)
+    indicator_service.extend_cache(stock_info_id, [r.time for r in new_records], [r.close for r in new_records])
+    analytics_service.invalidate(stock_info_id)
+    risk_service.invalidate()
+    corporate_action_service.invalidate(stock_info_id)
 
 
 # ----------------------------
@@ -294,8 +505,7 @@ async def create_stock_holding_detail(
     """
     db_holding_detail = StockHoldingDetail.model_validate(holding_detail)
     session.add(db_holding_detail)
-    await session.commit()
-    await session.refresh(db_holding_detail)
+    await session.flush()
     return db_holding_detail
 
 
@@ -320,31 +530,23 @@ async def get_user_stock_holding_details(*, session: AsyncSession, user_id: int)
 
 async def _update_stock_holding_detail(*, session: AsyncSession, user_id: int, stock_info_id: int, ticker: str) -> None:
     """
-    Calculates and updates the StockHoldingDetail for a given user and stock based on all transactions.
+    Rebuilds the lots for a given user and stock from all transactions and updates the StockHoldingDetail.
     """
-    # 1. Get all transactions for the user and stock
-    result = await session.execute(
-        select(StockTransaction).where(
-            StockTransaction.user_id == user_id, StockTransaction.stock_info_id == stock_info_id
-        )
-    )
-    transactions = result.scalars().all()
-
-    # 2. Calculate holding quantity, total buy amount, and average buy price
-    holding_quantity = 0
-    total_buy_amount = 0.0
+    await lot_service.rebuild_lots(session=session, user_id=user_id, stock_info_id=stock_info_id, ticker=ticker)
+    await _write_stock_holding_detail(session=session, user_id=user_id, stock_info_id=stock_info_id, ticker=ticker)
 
-    for t in transactions:
-        if t.transaction_type == "매수":
-            holding_quantity += t.quantity
-            total_buy_amount += t.total_amount
-        elif t.transaction_type == "매도":
-            holding_quantity -= t.quantity
-            total_buy_amount -= t.total_amount  # Adjust total_buy_amount for sales
 
+async def _write_stock_holding_detail(*, session: AsyncSession, user_id: int, stock_info_id: int, ticker: str) -> None:
+    """
+    Updates the StockHoldingDetail for a given user and stock from its open lots.
+    """
+    # 1. Sum the remaining quantity and cost basis of the open lots
+    holding_quantity, total_buy_amount = await lot_service.get_open_position(
+        session=session, user_id=user_id, stock_info_id=stock_info_id
+    )
     average_buy_price = total_buy_amount / holding_quantity if holding_quantity > 0 else 0.0
 
-    # 3. Get or create StockHoldingDetail
+    # 2. Get or create StockHoldingDetail
     result = await session.execute(
         select(StockHoldingDetail).where(
             StockHoldingDetail.user_id == user_id, StockHoldingDetail.stock_info_id == stock_info_id
@@ -355,7 +557,7 @@ async def _update_stock_holding_detail(*, session: AsyncSession, user_id: int, s
     if holding_quantity <= 0:
         if db_holding_detail:
             await session.delete(db_holding_detail)
-            await session.commit()
+            await session.flush()
         return
 
     if db_holding_detail:
@@ -378,8 +580,7 @@ async def _update_stock_holding_detail(*, session: AsyncSession, user_id: int, s
         db_holding_detail = StockHoldingDetail.model_validate(new_holding_detail)
         session.add(db_holding_detail)
 
-    await session.commit()
-    await session.refresh(db_holding_detail)
+    await session.flush()
 
 
 async def get_user_stock_holding_detail_by_ticker(
@@ -415,8 +616,7 @@ async def update_stock_holding_detail(
 
     db_holding_detail.updated_at = datetime.now(timezone.utc)
     session.add(db_holding_detail)
-    await session.commit()
-    await session.refresh(db_holding_detail)
+    await session.flush()
     return db_holding_detail
 
 
@@ -431,5 +631,5 @@ async def delete_stock_holding_detail(*, session: AsyncSession, holding_id: int)
         return False
 
     await session.delete(db_holding_detail)
-    await session.commit()
+    await session.flush()
     return True
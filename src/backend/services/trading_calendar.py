@@ -0,0 +1,250 @@
+"""
+Exchange trading calendars.
+
+A calendar knows which days an exchange trades, from its weekmask and holiday rules.
+Calendars are looked up by `StockInfo.market`; markets without a known calendar use a
+plain weekday calendar. Holiday rules are deliberately conservative: a missing holiday
+costs an empty download and shows up as a gap in coverage scans, while a wrong one would
+skip a real session.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+
+# ----------------------------
+# Holiday rules
+# ----------------------------
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    The n-th given weekday (Monday = 0) of a month; n = -1 is the last one.
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """
+    Western Easter Sunday (Meeus/Jones/Butcher algorithm).
+    """
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (b - (b + 8) // 25 + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    weekday_offset = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * weekday_offset) // 451
+    month, day = divmod(h + weekday_offset - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> date:
+    """
+    US rule for fixed-date holidays: Saturday moves to Friday, Sunday to Monday.
+    """
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def no_holidays(year: int) -> set[date]:
+    return set()
+
+
+def us_holidays(year: int) -> set[date]:
+    """
+    Full-day closures of the NYSE and Nasdaq.
+    """
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),
+    }
+    # A Saturday New Year's Day is not observed on the Friday before
+    if date(year, 1, 1).weekday() != 5:
+        holidays.add(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return holidays
+
+
+# Korean lunar-calendar public holidays by year: (Seollal, Buddha's Birthday, Chuseok) in
+# Korea Standard Time, which can differ by a day from the Chinese calendar. Seollal and
+# Chuseok also close the day before and the day after.
+KRX_LUNAR_HOLIDAYS: dict[int, tuple[date, date, date]] = {
+    2015: (date(2015, 2, 19), date(2015, 5, 25), date(2015, 9, 27)),
+    2016: (date(2016, 2, 8), date(2016, 5, 14), date(2016, 9, 15)),
+    2017: (date(2017, 1, 28), date(2017, 5, 3), date(2017, 10, 4)),
+    2018: (date(2018, 2, 16), date(2018, 5, 22), date(2018, 9, 24)),
+    2019: (date(2019, 2, 5), date(2019, 5, 12), date(2019, 9, 13)),
+    2020: (date(2020, 1, 25), date(2020, 4, 30), date(2020, 10, 1)),
+    2021: (date(2021, 2, 12), date(2021, 5, 19), date(2021, 9, 21)),
+    2022: (date(2022, 2, 1), date(2022, 5, 8), date(2022, 9, 10)),
+    2023: (date(2023, 1, 22), date(2023, 5, 27), date(2023, 9, 29)),
+    2024: (date(2024, 2, 10), date(2024, 5, 15), date(2024, 9, 17)),
+    2025: (date(2025, 1, 29), date(2025, 5, 5), date(2025, 10, 6)),
+    2026: (date(2026, 2, 17), date(2026, 5, 24), date(2026, 9, 25)),
+    2027: (date(2027, 2, 7), date(2027, 5, 13), date(2027, 9, 15)),
+    2028: (date(2028, 1, 27), date(2028, 5, 2), date(2028, 10, 3)),
+    2029: (date(2029, 2, 13), date(2029, 5, 20), date(2029, 9, 22)),
+    2030: (date(2030, 2, 3), date(2030, 5, 9), date(2030, 9, 12)),
+}
+
+# One-off closures of the Korea Exchange: election days and temporary public holidays
+KRX_SPECIAL_CLOSURES: frozenset[date] = frozenset(
+    {
+        date(2015, 8, 14),
+        date(2016, 4, 13),
+        date(2016, 5, 6),
+        date(2017, 5, 9),
+        date(2017, 10, 2),
+        date(2018, 6, 13),
+        date(2020, 4, 15),
+        date(2020, 8, 17),
+        date(2022, 3, 9),
+        date(2022, 6, 1),
+        date(2023, 10, 2),
+        date(2024, 4, 10),
+        date(2024, 10, 1),
+        date(2025, 1, 27),
+        date(2025, 6, 3),
+        date(2026, 6, 3),
+    }
+)
+
+
+def _korean_substitutes(holidays: list[tuple[tuple[date, ...], bool, tuple[int, ...]]]) -> set[date]:
+    """
+    Substitute holidays for (days, eligible, weekdays) entries: an eligible holiday that falls on
+    one of the given weekdays, or on a day an earlier entry already closed, adds the next day
+    after it that is neither a Sunday nor a holiday.
+    """
+    closed = {day for days, _, _ in holidays for day in days}
+    taken: set[date] = set()
+    substitutes: set[date] = set()
+    for days, eligible, weekdays in holidays:
+        if eligible and any(day.weekday() in weekdays or day in taken for day in days):
+            substitute = days[-1] + timedelta(days=1)
+            while substitute.weekday() == 6 or substitute in closed or substitute in substitutes:
+                substitute += timedelta(days=1)
+            substitutes.add(substitute)
+        taken.update(days)
+    return substitutes
+
+
+def krx_holidays(year: int) -> set[date]:
+    """
+    Closures of the Korea Exchange: public holidays with their substitute holidays, Labor Day,
+    one-off closures and the year-end closing. Lunar holidays are only known for the years in
+    KRX_LUNAR_HOLIDAYS; in other years Seollal, Buddha's Birthday and Chuseok count as sessions.
+    """
+    weekend = (5, 6)
+    # Substitutes exist for Children's Day since 2014, for the national days since 2021 and for
+    # Buddha's Birthday and Christmas since 2023
+    holidays = [
+        ((date(year, 1, 1),), False, weekend),
+        ((date(year, 3, 1),), year >= 2021, weekend),  # Independence Movement Day
+        ((date(year, 5, 1),), False, weekend),  # Labor Day
+        ((date(year, 5, 5),), year >= 2014, weekend),  # Children's Day
+        ((date(year, 6, 6),), False, weekend),  # Memorial Day
+        ((date(year, 8, 15),), year >= 2021, weekend),  # Liberation Day
+        ((date(year, 10, 3),), year >= 2021, weekend),  # National Foundation Day
+        ((date(year, 10, 9),), year >= 2021, weekend),  # Hangul Day
+        ((date(year, 12, 25),), year >= 2023, weekend),
+    ]
+    if year in KRX_LUNAR_HOLIDAYS:
+        seollal, buddha, chuseok = KRX_LUNAR_HOLIDAYS[year]
+        holidays.append(((buddha,), year >= 2023, weekend))
+        # Three-day holidays are only substituted for a Sunday or an overlap, and come last so
+        # that they get the substitute when they overlap another holiday
+        for day in (seollal, chuseok):
+            holidays.append((tuple(day + timedelta(days=offset) for offset in (-1, 0, 1)), year >= 2014, (6,)))
+
+    closures = {day for days, _, _ in holidays for day in days} | _korean_substitutes(holidays)
+    closures |= {day for day in KRX_SPECIAL_CLOSURES if day.year == year}
+    # The year-end closing moves back to the last business day when December 31 is not one
+    year_end = date(year, 12, 31)
+    while year_end.weekday() >= 5 or year_end in closures:
+        year_end -= timedelta(days=1)
+    return closures | {year_end}
+
+
+# ----------------------------
+# Calendars
+# ----------------------------
+@dataclass(frozen=True)
+class ExchangeCalendar:
+    """
+    Trading days of an exchange. Dates are local exchange dates.
+    """
+
+    name: str
+    holidays: Callable[[int], set[date]] = no_holidays
+    weekmask: str = "1111100"
+
+    def sessions(self, start: date, end: date) -> np.ndarray:
+        """
+        Returns the sessions from start to end inclusive, as datetime64[D] values.
+        """
+        if start > end:
+            return np.array([], dtype="datetime64[D]")
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        return days[np.is_busday(days, busdaycal=_busdaycalendar(self, start.year, end.year))]
+
+    def is_session(self, day: date) -> bool:
+        return bool(np.is_busday(np.datetime64(day, "D"), busdaycal=_busdaycalendar(self, day.year, day.year)))
+
+    def next_session(self, day: date) -> date:
+        """
+        Returns the first session on or after `day`.
+        """
+        calendar = _busdaycalendar(self, day.year, day.year + 1)
+        return np.busday_offset(np.datetime64(day, "D"), 0, roll="forward", busdaycal=calendar).item()
+
+    def has_session(self, start: date, end: date) -> bool:
+        return start <= end and self.next_session(start) <= end
+
+
+@lru_cache(maxsize=64)
+def _busdaycalendar(calendar: ExchangeCalendar, first_year: int, last_year: int) -> np.busdaycalendar:
+    holidays = sorted(day for year in range(first_year, last_year + 1) for day in calendar.holidays(year))
+    return np.busdaycalendar(weekmask=calendar.weekmask, holidays=np.array(holidays, dtype="datetime64[D]"))
+
+
+WEEKDAYS = ExchangeCalendar("weekdays")
+XNYS = ExchangeCalendar("XNYS", us_holidays)
+XKRX = ExchangeCalendar("XKRX", krx_holidays)
+
+CALENDARS: dict[str, ExchangeCalendar] = {
+    "NYSE": XNYS,
+    "NASDAQ": XNYS,
+    "AMEX": XNYS,
+    "NYSEARCA": XNYS,
+    "US": XNYS,
+    "KRX": XKRX,
+    "KOSPI": XKRX,
+    "KOSDAQ": XKRX,
+}
+
+
+def get_calendar(market: str | None) -> ExchangeCalendar:
+    """
+    Returns the calendar of a `StockInfo.market` value, or the weekday calendar if it is unknown.
+    """
+    if market is None:
+        return WEEKDAYS
+    return CALENDARS.get(market.strip().upper(), WEEKDAYS)
@@ -2,10 +2,13 @@
 Adapter for converting yfinance data to the application's data models.
 """
 
+from datetime import datetime
+
 import numpy as np
 import pandas as pd
 import pytz
 
+from src.backend.models.corporate_action import CorporateActionType
 from src.backend.models.price import StockPriceBase
 from src.backend.models.stock import StockInfoBase
 
@@ -115,3 +118,39 @@ def df_to_stockbase(
         records.append(StockData(**record_data))
 
     return records
+
+
+def df_to_corporate_actions(
+    df: pd.DataFrame, ticker: str, timezone: str
+) -> list[tuple[datetime, CorporateActionType, float]]:
+    """
+    Extracts (ex_date, type, value) events from the "Dividends" and "Stock Splits" columns
+    that yfinance adds with `actions=True`. Returns an empty list when they are absent.
+    """
+    if df.empty:
+        return []
+
+    def pick(colname: str) -> pd.Series | None:
+        if isinstance(df.columns, pd.MultiIndex):
+            for key in ((colname, ticker), (ticker, colname)):
+                if key in df.columns:
+                    return df[key]
+            return None
+        return df[colname] if colname in df.columns else None
+
+    index = pd.to_datetime(df.index)
+    index = index.tz_localize(pytz.utc) if index.tz is None else index
+    index = index.tz_convert(timezone)
+
+    events = []
+    for colname, action_type in (
+        ("Stock Splits", CorporateActionType.SPLIT),
+        ("Dividends", CorporateActionType.DIVIDEND),
+    ):
+        column = pick(colname)
+        if column is None:
+            continue
+        values = pd.to_numeric(column, errors="coerce").to_numpy()
+        for position in np.flatnonzero(np.nan_to_num(values) > 0):
+            events.append((index[position].to_pydatetime(), action_type, float(values[position])))
+    return sorted(events)
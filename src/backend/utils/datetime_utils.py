@@ -0,0 +1,33 @@
+"""
+Datetime helpers shared by the backend services.
+"""
+
+from datetime import datetime, timezone
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Returns `value` as a timezone-aware UTC datetime.
+    SQLite drops the offset of DateTime(timezone=True) columns, so naive values are treated as UTC.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def month_start(value: datetime) -> datetime:
+    """
+    Returns midnight UTC on the first day of the month containing `value`.
+    """
+    value = as_utc(value)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month_start(value: datetime) -> datetime:
+    """
+    Returns midnight UTC on the first day of the month after the one containing `value`.
+    """
+    start = month_start(value)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
@@ -1,5 +1,10 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable, Generator, Sequence
+from pathlib import Path
+from typing import Any
 
+import numpy as np
+import pandas as pd
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import (
@@ -12,8 +17,15 @@ from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel
 
 from src.backend.config import settings
-from src.backend.database import get_db
+from src.backend.database import get_db, get_read_db
 from src.backend.main import app as main_app
+from src.backend.services import (
+    analytics_service,
+    columnar_store,
+    corporate_action_service,
+    indicator_service,
+    risk_service,
+)
 
 
 @pytest_asyncio.fixture(scope="session")
@@ -29,6 +41,42 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def columnar_store_dir(tmp_path_factory: pytest.TempPathFactory) -> Generator[Path, None, None]:
+    """
+    Keeps the columnar price store of the test run out of the development data directory.
+    """
+    original = settings.COLUMNAR_STORE_DIR
+    settings.COLUMNAR_STORE_DIR = tmp_path_factory.mktemp("columnar")
+    yield settings.COLUMNAR_STORE_DIR
+    settings.COLUMNAR_STORE_DIR = original
+
+
+@pytest.fixture
+def price_frame() -> Callable[..., pd.DataFrame]:
+    """
+    Returns a builder of yfinance-shaped frames with the given closes as open, high, low and
+    close: `price_frame(closes, start="2025-01-01")` for daily bars, or `index=` for other
+    dates. Keyword columns, e.g. `High=`, `Volume=` or `**{"Stock Splits": [...]}`, are added
+    or replace the defaults.
+    """
+
+    def build(
+        closes: Sequence[float] | np.ndarray,
+        *,
+        start: str = "2025-01-01",
+        index: pd.DatetimeIndex | None = None,
+        **columns: Any,
+    ) -> pd.DataFrame:
+        closes = np.asarray(closes, dtype=float)
+        if index is None:
+            index = pd.date_range(start, periods=len(closes), freq="D", tz="UTC")
+        data = {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 1000, **columns}
+        return pd.DataFrame(data, index=index.rename("Date"))
+
+    return build
+
+
 @pytest_asyncio.fixture(scope="session")
 async def create_test_engine_fixture() -> AsyncGenerator[AsyncEngine, None]:
     """
@@ -59,6 +107,12 @@ async def get_test_db_session(create_test_engine_fixture: AsyncEngine) -> AsyncG
 
     async with create_test_engine_fixture.begin() as conn:
         await conn.run_sync(SQLModel.metadata.drop_all)
+    # Cached series are keyed by ids that the next test will reuse
+    columnar_store.invalidate()
+    indicator_service.invalidate()
+    analytics_service.invalidate()
+    corporate_action_service.invalidate()
+    risk_service.invalidate()
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -68,10 +122,20 @@ async def client(get_test_db_session: AsyncSession) -> AsyncGenerator[AsyncClien
     This client uses the isolated database session provided by the `get_test_db_session` fixture.
     """
 
-    def get_session_override() -> AsyncSession:
+    async def get_session_override() -> AsyncGenerator[AsyncSession, None]:
+        # Like get_db, every request commits its work once, or rolls it back on error
+        try:
+            yield get_test_db_session
+            await get_test_db_session.commit()
+        except BaseException:
+            await get_test_db_session.rollback()
+            raise
+
+    def get_read_session_override() -> AsyncSession:
         return get_test_db_session
 
     main_app.dependency_overrides[get_db] = get_session_override
+    main_app.dependency_overrides[get_read_db] = get_read_session_override
 
     transport = ASGITransport(app=main_app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
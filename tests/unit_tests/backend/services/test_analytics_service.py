@@ -0,0 +1,78 @@
+"""
+Tests for the cross-ticker analytics service.
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.services import analytics_service, stock_service
+
+
+@pytest.mark.asyncio
+async def test_return_statistics_align_dates_and_match_numpy(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Only dates with a close for every ticker are used, and the matrices match a direct computation.
+    """
+    session = get_test_db_session
+    rng = np.random.default_rng(11)
+    dates = pd.date_range("2025-01-01", periods=30, freq="D", tz="UTC")
+    closes = {ticker: 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 30))) for ticker in ["AAA", "BBB", "CCC"]}
+    for ticker, series in closes.items():
+        # BBB misses one day in the middle of its history
+        keep = np.arange(30) != 10 if ticker == "BBB" else np.ones(30, dtype=bool)
+        df = price_frame(series[keep], index=dates[keep])
+        await stock_service.upsert_stocks_from_dataframe(session=session, df=df, ticker=ticker)
+
+    statistics = await analytics_service.get_return_statistics(session=session, tickers=["CCC", "AAA", "BBB"])
+    assert statistics is not None
+
+    aligned = np.column_stack([np.delete(closes[t], 10) for t in ["CCC", "AAA", "BBB"]])
+    expected = np.diff(np.log(aligned), axis=0)
+    assert statistics.observations == 28
+    assert np.allclose(statistics.covariance, np.cov(expected, rowvar=False))
+    assert np.allclose(np.array(statistics.correlation, dtype=float), np.corrcoef(expected, rowvar=False))
+
+    windowed = await analytics_service.get_return_statistics(session=session, tickers=["CCC", "AAA", "BBB"], window=5)
+    assert windowed is not None
+    assert windowed.observations == 5
+    assert np.allclose(windowed.mean_returns, expected[-5:].mean(axis=0))
+    assert windowed.end == dates[-1].to_pydatetime()
+
+    assert await analytics_service.get_return_statistics(session=session, tickers=["AAA", "NOPE"]) is None
+
+
+@pytest.mark.asyncio
+async def test_cached_panel_is_refreshed_after_upsert(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Appending bars invalidates the cached panel of every ticker set containing the ticker.
+    """
+    session = get_test_db_session
+    dates = pd.date_range("2025-01-01", periods=10, freq="D", tz="UTC")
+    for ticker in ["AAA", "BBB"]:
+        df = price_frame(np.linspace(10, 14, 5), index=dates[:5])
+        await stock_service.upsert_stocks_from_dataframe(session=session, df=df, ticker=ticker)
+    await session.commit()
+
+    response = await client.post("/stock/analytics/returns", json={"tickers": ["AAA", "BBB"]})
+    assert response.status_code == 200
+    assert response.json()["observations"] == 4
+
+    for ticker in ["AAA", "BBB"]:
+        df = price_frame(np.linspace(15, 19, 5), index=dates[5:])
+        await stock_service.upsert_stocks_from_dataframe(session=session, df=df, ticker=ticker)
+    await session.commit()
+
+    response = await client.post("/stock/analytics/returns", json={"tickers": ["AAA", "BBB"], "window": 20})
+    assert response.json()["observations"] == 9
+
+    response = await client.post("/stock/analytics/returns", json={"tickers": ["AAA", "ZZZ"]})
+    assert response.status_code == 404
@@ -0,0 +1,115 @@
+"""
+Tests for the backtest service.
+"""
+
+import asyncio
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.config import settings
+from src.backend.models.backtest import BacktestJob, BacktestJobStatus, BacktestStrategy
+from src.backend.services import backtest_service, process_pool, stock_service
+
+
+def loop_crossover_equity(closes: np.ndarray, fast: int, slow: int, fee_rate: float) -> list[float]:
+    """Reference bar-by-bar simulation of the moving-average crossover."""
+    equity, position = [1.0], 0.0
+    for t in range(1, len(closes)):
+        target = 0.0
+        if t - 1 >= slow - 1:
+            target = float(closes[t - fast : t].mean() > closes[t - slow : t].mean())
+        fee = fee_rate * abs(target - position)
+        position = target
+        equity.append(equity[-1] * (1 + position * (closes[t] / closes[t - 1] - 1) - fee))
+    return equity
+
+
+def test_vectorized_crossover_matches_loop():
+    """
+    The vectorized simulation reproduces a bar-by-bar loop, fees included.
+    """
+    closes = 100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.02, 300)))
+    run = backtest_service.simulate(BacktestStrategy.MA_CROSSOVER, closes, {"fast": 5, "slow": 20}, fee_rate=0.001)
+
+    expected = loop_crossover_equity(closes, 5, 20, 0.001)
+    assert run["equity_curve"] == pytest.approx(expected)
+    assert run["total_return"] == pytest.approx(expected[-1] - 1)
+    peak = np.maximum.accumulate(expected)
+    assert run["max_drawdown"] == pytest.approx(float((1 - np.array(expected) / peak).max()))
+
+
+def test_rsi_threshold_holds_between_signals():
+    """
+    A position opened below the lower band is held until RSI rises above the upper band.
+    """
+    closes = np.array([10.0, 9.0, 8.0, 7.0, 6.0, 6.5, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0])
+    held = backtest_service.positions(BacktestStrategy.RSI_THRESHOLD, closes, {"window": 3, "lower": 30, "upper": 70})
+    assert held.tolist() == [0, 0, 0, 1, 1, 1, 1, 1, 0, 0, 0, 0]
+
+
+def test_expand_grid_rejects_invalid_parameters():
+    """
+    Unknown parameters and grids without a valid combination are rejected.
+    """
+    grid = backtest_service.expand_grid(BacktestStrategy.MA_CROSSOVER, {"fast": [5, 50], "slow": [20, 50]})
+    assert grid == [{"fast": 5, "slow": 20}, {"fast": 5, "slow": 50}]
+    with pytest.raises(ValueError):
+        backtest_service.expand_grid(BacktestStrategy.MA_CROSSOVER, {"fast": [5], "window": [20]})
+    with pytest.raises(ValueError):
+        backtest_service.expand_grid(BacktestStrategy.MA_CROSSOVER, {"fast": [50], "slow": [20]})
+
+
+@pytest.mark.asyncio
+async def test_backtest_job_sweeps_grid_in_process_pool(
+    client: AsyncClient,
+    get_test_db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    price_frame: Callable[..., pd.DataFrame],
+):
+    """
+    A submitted grid runs across worker processes and is reported best run first, with
+    equity curves for the best runs only. The job is stored for every API process to read.
+    """
+    monkeypatch.setattr(settings, "PROCESS_POOL_WORKERS", 2)
+    monkeypatch.setattr(backtest_service, "EQUITY_CURVE_RUNS", 2)
+    closes = 100 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.02, 200)))
+    df = price_frame(closes, start="2024-01-01", Volume=1)
+    await stock_service.upsert_stocks_from_dataframe(session=get_test_db_session, df=df, ticker="BT")
+
+    payload = {"ticker": "BT", "strategy": "ma_crossover", "parameters": {"fast": [3, 5, 10], "slow": [20, 40]}}
+    try:
+        response = await client.post("/stock/backtest/jobs", json=payload)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        for _ in range(300):
+            job = (await client.get(f"/stock/backtest/jobs/{job_id}")).json()
+            if job["status"] in ("done", "failed"):
+                break
+            await asyncio.sleep(0.1)
+    finally:
+        process_pool.shutdown_pool()
+
+    assert job["status"] == "done", job["error"]
+    assert job["combinations"] == 6
+    assert len(job["times"]) == 200
+    returns = [run["total_return"] for run in job["runs"]]
+    assert returns == sorted(returns, reverse=True)
+    best = job["runs"][0]
+    expected = backtest_service.simulate(BacktestStrategy.MA_CROSSOVER, closes, best["parameters"])
+    assert best["equity_curve"] == pytest.approx(expected["equity_curve"])
+    assert job["runs"][1]["equity_curve"] is not None
+    assert all(run["equity_curve"] is None for run in job["runs"][2:])
+
+    stored = await get_test_db_session.get(BacktestJob, job_id, populate_existing=True)
+    assert stored is not None and stored.status == BacktestJobStatus.DONE
+
+    response = await client.post("/stock/backtest/jobs", json={**payload, "parameters": {"fast": [3]}})
+    assert response.status_code == 400
+    response = await client.get("/stock/backtest/jobs/unknown")
+    assert response.status_code == 404
@@ -0,0 +1,149 @@
+"""
+Tests for the memory-mapped columnar price store.
+"""
+
+import json
+from collections.abc import Callable
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.config import settings
+from src.backend.services import columnar_store, indicator_service, stock_service
+
+
+def read_meta(stock_info_id: int) -> dict:
+    return json.loads((settings.COLUMNAR_STORE_DIR / str(stock_info_id) / columnar_store.META_FILE).read_text())
+
+
+@pytest.mark.asyncio
+async def test_columns_are_built_on_read_and_appended_on_upsert(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    New bars are appended to the mapped columns in place; back-dated bars rebuild them.
+    """
+    session = get_test_db_session
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame([1, 2, 3], start="2025-01-01"), ticker="CS"
+    )
+    await session.commit()
+    stock_info = await stock_service.get_stock_info_by_ticker(session=session, ticker="CS")
+    assert stock_info is not None
+
+    columns = await columnar_store.get_columns(session=session, stock_info_id=stock_info.id)
+    assert columns.close.tolist() == [1, 2, 3]
+    assert isinstance(columns.close.base, np.memmap)
+    assert not columns.close.flags.writeable
+    generation = read_meta(stock_info.id)["generation"]
+
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame([4, 5], start="2025-01-04"), ticker="CS"
+    )
+    await session.commit()
+    assert read_meta(stock_info.id) == {"generation": generation, "rows": 5}
+    columns = await columnar_store.get_columns(session=session, stock_info_id=stock_info.id)
+    assert columns.close.tolist() == [1, 2, 3, 4, 5]
+    assert columns.volume.tolist() == [1000] * 5
+    assert pd.DatetimeIndex(columns.time)[-1] == pd.Timestamp("2025-01-05")
+
+    # Another process maps the same files from the published meta
+    columnar_store._mapped.clear()
+    columns = await columnar_store.get_columns(session=session, stock_info_id=stock_info.id)
+    assert columns.close.tolist() == [1, 2, 3, 4, 5]
+
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame([0], start="2024-12-31"), ticker="CS"
+    )
+    await session.commit()
+    assert not (settings.COLUMNAR_STORE_DIR / str(stock_info.id)).exists()
+    columns = await columnar_store.get_columns(session=session, stock_info_id=stock_info.id)
+    assert columns.close.tolist() == [0, 1, 2, 3, 4, 5]
+    assert read_meta(stock_info.id)["generation"] != generation
+
+
+@pytest.mark.asyncio
+async def test_deleted_stock_drops_its_columns(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Deleting a stock removes its stored columns.
+    """
+    session = get_test_db_session
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame([1, 2], start="2025-01-01"), ticker="CD"
+    )
+    await session.commit()
+    stock_info = await stock_service.get_stock_info_by_ticker(session=session, ticker="CD")
+    assert stock_info is not None
+    await columnar_store.get_columns(session=session, stock_info_id=stock_info.id)
+    assert (settings.COLUMNAR_STORE_DIR / str(stock_info.id)).exists()
+
+    assert await stock_service.delete_stock_info(session=session, stock_info_id=stock_info.id)
+    await session.commit()
+    assert not (settings.COLUMNAR_STORE_DIR / str(stock_info.id)).exists()
+    assert len(await columnar_store.get_columns(session=session, stock_info_id=stock_info.id)) == 0
+
+
+def bar(day: int, close: float) -> SimpleNamespace:
+    time = datetime(2025, 1, day, tzinfo=timezone.utc)
+    return SimpleNamespace(time=time, open=close, high=close, low=close, close=close, volume=1000)
+
+
+@pytest.mark.asyncio
+async def test_cached_series_follow_changes_of_other_processes(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    A cached series is reloaded once the stored entry was appended to or dropped elsewhere.
+    """
+    session = get_test_db_session
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame([1, 2, 3], start="2025-01-01"), ticker="CP"
+    )
+    await session.commit()
+    stock_info = await stock_service.get_stock_info_by_ticker(session=session, ticker="CP")
+    assert stock_info is not None
+    _, closes = await indicator_service.get_close_series(session=session, ticker="CP")
+    assert closes.tolist() == [1, 2, 3]
+
+    # Another worker's upsert appends to the shared files, but not to this process's cache
+    columnar_store.append(stock_info.id, [bar(4, 4.0)])
+    _, closes = await indicator_service.get_close_series(session=session, ticker="CP")
+    assert closes.tolist() == [1, 2, 3, 4]
+
+    columnar_store.invalidate(stock_info.id)
+    _, closes = await indicator_service.get_close_series(session=session, ticker="CP")
+    assert closes.tolist() == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_is_not_published_after_a_concurrent_append(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Rows read before bars were committed and appended elsewhere are returned but not stored.
+    """
+    session = get_test_db_session
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame([1, 2], start="2025-01-01"), ticker="CR"
+    )
+    await session.commit()
+    stock_info = await stock_service.get_stock_info_by_ticker(session=session, ticker="CR")
+    assert stock_info is not None
+    columnar_store.invalidate(stock_info.id)
+
+    changes = columnar_store._changes(stock_info.id)
+    columnar_store.append(stock_info.id, [bar(3, 3.0)])
+    columnar_store._write(stock_info.id, {c: np.zeros(2, dtype=d) for c, d in columnar_store.COLUMNS.items()}, changes)
+    assert columnar_store.stored_version(stock_info.id) is None
+
+    columns = await columnar_store.get_columns(session=session, stock_info_id=stock_info.id)
+    assert columns.close.tolist() == [1, 2]
+    assert (
+        columns.version == columnar_store.stored_version(stock_info.id) == (read_meta(stock_info.id)["generation"], 2)
+    )
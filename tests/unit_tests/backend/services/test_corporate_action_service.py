@@ -0,0 +1,83 @@
+"""
+Tests for corporate actions and adjusted prices.
+"""
+
+from collections.abc import Callable
+
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.services import corporate_action_service, stock_service
+
+# Six unadjusted daily bars with a 2-for-1 split on day 3 and a 1.0 dividend on day 5
+CLOSES = [200.0, 210.0, 105.0, 100.0, 49.0, 50.0]
+COLUMNS = {
+    "Volume": [100, 100, 200, 200, 200, 200],
+    "Dividends": [0.0, 0.0, 0.0, 0.0, 1.0, 0.0],
+    "Stock Splits": [0.0, 0.0, 2.0, 0.0, 0.0, 0.0],
+}
+
+
+@pytest.mark.asyncio
+async def test_unadjusted_download_records_actions_and_adjusts_on_read(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Splits and dividends in the frame become events, and bars before each ex-date are adjusted on read.
+    """
+    session = get_test_db_session
+    raw_frame = price_frame(CLOSES, **COLUMNS)
+    saved = await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=raw_frame, ticker="ACT", auto_adjust=False
+    )
+    assert saved == 6
+
+    actions = await corporate_action_service.get_corporate_actions(session=session, ticker="ACT")
+    assert [(a.action_type.value, a.value) for a in actions] == [("split", 2.0), ("dividend", 1.0)]
+
+    prices = await corporate_action_service.get_adjusted_prices(session=session, ticker="ACT")
+    assert prices is not None
+    dividend_factor = 1 - 1.0 / 100.0
+    assert [p.factor for p in prices] == pytest.approx(
+        [0.5 * dividend_factor, 0.5 * dividend_factor, dividend_factor, dividend_factor, 1.0, 1.0]
+    )
+    assert prices[0].close == pytest.approx(100.0 * dividend_factor)
+    assert [p.volume for p in prices] == pytest.approx([200, 200, 200, 200, 200, 200])
+
+    # Downloading the same range again does not duplicate the events
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=raw_frame, ticker="ACT", auto_adjust=False)
+    assert len(await corporate_action_service.get_corporate_actions(session=session, ticker="ACT")) == 2
+
+
+@pytest.mark.asyncio
+async def test_new_action_changes_adjusted_prices_without_rewriting_bars(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Recording or deleting an event only invalidates the cached factors; stored bars stay raw.
+    """
+    df = price_frame(CLOSES, Volume=COLUMNS["Volume"])
+    await stock_service.upsert_stocks_from_dataframe(
+        session=get_test_db_session, df=df, ticker="NEW", auto_adjust=False
+    )
+    stock_info_id = (await client.get("/stock/info/ticker/NEW")).json()["id"]
+
+    response = await client.get("/stock/price/adjusted/NEW")
+    assert [p["factor"] for p in response.json()] == [1.0] * 6
+
+    payload = {"stock_info_id": stock_info_id, "ex_date": "2025-01-03T00:00:00Z", "action_type": "split", "value": 2}
+    response = await client.post("/stock/corporate-action/", json=payload)
+    assert response.status_code == 200
+    action_id = response.json()["id"]
+    assert (await client.post("/stock/corporate-action/", json=payload)).status_code == 409
+
+    response = await client.get("/stock/price/adjusted/NEW", params={"end": "2025-01-03T00:00:00Z"})
+    assert [p["close"] for p in response.json()] == pytest.approx([100.0, 105.0])
+    stored = (await client.get("/stock/info/ticker/NEW")).json()["prices"]
+    assert stored[0]["close"] == 200.0
+
+    assert (await client.delete(f"/stock/corporate-action/{action_id}")).status_code == 200
+    response = await client.get("/stock/price/adjusted/NEW")
+    assert response.json()[0]["close"] == pytest.approx(200.0)
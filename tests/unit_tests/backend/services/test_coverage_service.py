@@ -0,0 +1,89 @@
+"""
+Tests for the price coverage scanner and gap repair.
+"""
+
+from collections.abc import Callable
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.services import coverage_service, stock_service, trading_calendar
+
+
+def test_find_gaps_merges_runs_across_weekends():
+    """
+    Missing sessions separated only by a weekend form one range; a stored session splits ranges.
+    """
+    sessions = trading_calendar.WEEKDAYS.sessions(date(2025, 1, 6), date(2025, 1, 17))
+    stored = np.array(["2025-01-06", "2025-01-07", "2025-01-14", "2025-01-17"], dtype="datetime64[D]")
+    gaps = coverage_service.find_gaps(stored, sessions)
+    assert [(g.start, g.end, g.sessions) for g in gaps] == [
+        (date(2025, 1, 8), date(2025, 1, 13), 4),
+        (date(2025, 1, 15), date(2025, 1, 16), 2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_scan_and_repair_fill_interior_holes(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Holes in the middle of a history are reported and filled with one download per gap.
+    """
+    index = pd.bdate_range("2025-01-06", "2025-01-31", tz="UTC")
+    full = price_frame(np.arange(1.0, len(index) + 1), index=index, Volume=1)
+    stored = full.drop(full.index[[3, 4, 5, 12]])
+    await stock_service.upsert_stocks_from_dataframe(session=get_test_db_session, df=stored, ticker="GAP")
+
+    response = await client.get("/stock/coverage/", params={"tickers": "GAP"})
+    report = response.json()[0]
+    assert report["expected_sessions"] == 20
+    assert report["missing_sessions"] == 4
+    assert [(g["start"], g["end"]) for g in report["gaps"]] == [
+        ("2025-01-09", "2025-01-13"),
+        ("2025-01-22", "2025-01-22"),
+    ]
+
+    def download(ticker, start, end, **kwargs):
+        return full.loc[pd.Timestamp(start, tz="UTC") : pd.Timestamp(end, tz="UTC") - pd.Timedelta(days=1)]
+
+    with patch("yfinance.download", side_effect=download) as mock:
+        response = await client.post("/stock/coverage/repair", json={"tickers": ["GAP"]})
+    assert response.json() == [{"ticker": "GAP", "gaps": 2, "saved": 4}]
+    assert mock.call_count == 2
+
+    response = await client.get("/stock/coverage/", params={"tickers": "GAP"})
+    assert response.json()[0]["gaps"] == []
+
+
+@pytest.mark.asyncio
+async def test_scan_converts_intraday_bars_to_local_dates(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    A UTC day of hourly bars can fall on two local dates, and both count as stored.
+    """
+    days = [d for d in pd.bdate_range("2025-01-06", "2025-01-10", tz="UTC") if d.day != 8]
+    index = pd.DatetimeIndex([day + pd.Timedelta(hours=hour) for day in days for hour in range(14, 21)])
+    df = price_frame(np.arange(1.0, len(index) + 1), index=index)
+    await stock_service.upsert_stocks_from_dataframe(session=get_test_db_session, df=df, ticker="HOURLY")
+
+    reports = await coverage_service.scan_coverage(
+        session=get_test_db_session, tickers=["HOURLY"], start=date(2025, 1, 6), end=date(2025, 1, 10), tz="UTC"
+    )
+    assert [(g.start, g.end) for g in reports[0].gaps] == [(date(2025, 1, 8), date(2025, 1, 8))]
+
+    # 14:00 UTC is 23:00 in Seoul and 15:00 UTC is already the next day, so Tuesday's bars cover Wednesday
+    reports = await coverage_service.scan_coverage(
+        session=get_test_db_session,
+        tickers=["HOURLY"],
+        start=date(2025, 1, 6),
+        end=date(2025, 1, 10),
+        tz="Asia/Seoul",
+    )
+    assert reports[0].gaps == []
@@ -0,0 +1,136 @@
+"""
+Tests for the technical indicator service.
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from src.backend.models.stock import StockInfo
+from src.backend.services import indicator_service, stock_service
+
+NAMES = ["sma", "ema", "rsi", "macd", "bollinger"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_extension_matches_full_recompute(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Bars appended by the upsert extend the cached indicators to the same values as a cold computation.
+    """
+    session = get_test_db_session
+    closes = list(100 + np.cumsum(np.random.default_rng(7).normal(0, 1, 80)))
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame(closes[:60], start="2025-01-01"), ticker="IND"
+    )
+    await session.commit()
+
+    warm = await indicator_service.get_indicators(session=session, ticker="IND", names=NAMES, window=14)
+    assert warm is not None
+    assert len(warm.times) == 60
+
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame(closes[60:], start="2025-03-02"), ticker="IND"
+    )
+    await session.commit()
+    extended = await indicator_service.get_indicators(session=session, ticker="IND", names=NAMES, window=14)
+
+    indicator_service.invalidate()
+    cold = await indicator_service.get_indicators(session=session, ticker="IND", names=NAMES, window=14)
+
+    assert extended is not None and cold is not None
+    assert extended.times == cold.times
+    assert len(cold.times) == 80
+    for key, values in cold.values.items():
+        assert extended.values[key] == pytest.approx(values, nan_ok=True), key
+
+
+@pytest.mark.asyncio
+async def test_replica_reads_fill_the_cache_from_the_primary(
+    create_test_engine_fixture: AsyncEngine,
+    get_test_db_session: AsyncSession,
+    price_frame: Callable[..., pd.DataFrame],
+    tmp_path: Path,
+):
+    """
+    A read through a replica that has not received the bars yet still caches the primary's series.
+    """
+    session = get_test_db_session
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame([1, 2, 3], start="2025-01-01"), ticker="REP"
+    )
+    await session.commit()
+    stock_info = await stock_service.get_stock_info_by_ticker(session=session, ticker="REP")
+    assert stock_info is not None
+
+    # The replica already has the stock but none of its bars
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    primary = async_sessionmaker(bind=create_test_engine_fixture, class_=AsyncSession, expire_on_commit=False)
+    replica = async_sessionmaker(bind=replica_engine, class_=AsyncSession, info={"replica": True, "primary": primary})
+    try:
+        async with replica() as replica_session:
+            replica_session.add(StockInfo(id=stock_info.id, ticker="REP"))
+            await replica_session.commit()
+            _, closes = await indicator_service.get_close_series(session=replica_session, ticker="REP")
+    finally:
+        await replica_engine.dispose()
+
+    assert closes.tolist() == [1, 2, 3]
+    assert indicator_service._cache[stock_info.id].closes.tolist() == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_indicator_values(get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]):
+    """
+    Windowed and recursive indicators agree with their textbook definitions.
+    """
+    session = get_test_db_session
+    closes = [1.0, 2.0, 3.0, 4.0, 5.0, 4.0]
+    await stock_service.upsert_stocks_from_dataframe(
+        session=session, df=price_frame(closes, start="2025-01-01"), ticker="VAL"
+    )
+
+    result = await indicator_service.get_indicators(
+        session=session, ticker="VAL", names=["sma", "ema", "rsi", "bollinger"], window=3
+    )
+    assert result is not None
+    assert result.values["sma"] == pytest.approx([None, None, 2.0, 3.0, 4.0, 13 / 3])
+    assert result.values["ema"][2] == pytest.approx(2.25)
+    assert result.values["rsi"][:3] == [None, None, None]
+    assert result.values["rsi"][3] == pytest.approx(100.0)
+    assert result.values["bollinger_upper"][2] == pytest.approx(2.0 + 2 * np.std([1.0, 2.0, 3.0]))
+
+
+@pytest.mark.asyncio
+async def test_indicators_endpoint(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    The endpoint validates indicator names and reports unknown tickers.
+    """
+    await stock_service.upsert_stocks_from_dataframe(
+        session=get_test_db_session, df=price_frame([float(i) for i in range(1, 41)], start="2025-01-01"), ticker="API"
+    )
+
+    response = await client.get("/stock/indicators/API", params={"names": "sma,macd", "window": 5})
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["values"]) == {"sma", "macd", "macd_signal", "macd_hist"}
+    assert data["values"]["sma"][4] == pytest.approx(3.0)
+    assert data["values"]["macd"][24] is None
+    assert data["values"]["macd"][25] is not None
+
+    response = await client.get("/stock/indicators/API", params={"names": "sma,vwap"})
+    assert response.status_code == 400
+
+    response = await client.get("/stock/indicators/NOPE", params={"names": "sma"})
+    assert response.status_code == 404
@@ -0,0 +1,142 @@
+"""
+Tests for the lot-level cost basis service.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.models.lot import CostBasisMethod
+from src.backend.models.stock import StockInfo
+from src.backend.models.transaction import StockTransaction, StockTransactionCreate
+from src.backend.services import lot_service, stock_service
+
+
+def make_transaction(day: int, transaction_type: str, price: float, quantity: int) -> StockTransaction:
+    """Builds an unsaved transaction for ticker LOT on 2025-01-<day>."""
+    return StockTransaction(
+        user_id=1,
+        stock_info_id=1,
+        transaction_date=datetime(2025, 1, day, tzinfo=timezone.utc),
+        brokerage="BrokerA",
+        transaction_type=transaction_type,
+        ticker="LOT",
+        transaction_price=price,
+        quantity=quantity,
+        total_amount=price * quantity,
+    )
+
+
+def test_fifo_consumes_oldest_lot_first():
+    """
+    FIFO matches a sell against the oldest lots and keeps the newer lots at their own cost.
+    """
+    transactions = [make_transaction(1, "매수", 100.0, 10), make_transaction(2, "매수", 120.0, 10)]
+    transactions.append(make_transaction(3, "매도", 130.0, 15))
+
+    lots, realizations = lot_service.replay_transactions(transactions, CostBasisMethod.FIFO)
+
+    assert [lot.remaining_quantity for lot in lots] == [0, 5]
+    assert lots[1].unit_cost == 120.0
+    assert sum(r.cost_basis for r in realizations) == pytest.approx(1000.0 + 600.0)
+    assert sum(r.realized_profit for r in realizations) == pytest.approx(15 * 130.0 - 1600.0)
+
+
+def test_average_method_reprices_open_lots():
+    """
+    The average method realizes the sell at the average cost and keeps it for the remainder.
+    """
+    transactions = [make_transaction(1, "매수", 100.0, 10), make_transaction(2, "매수", 120.0, 10)]
+    transactions.append(make_transaction(3, "매도", 130.0, 5))
+
+    lots, realizations = lot_service.replay_transactions(transactions, CostBasisMethod.AVERAGE)
+
+    assert sum(lot.remaining_quantity for lot in lots) == 15
+    assert sum(lot.remaining_quantity * lot.unit_cost for lot in lots) == pytest.approx(15 * 110.0)
+    assert sum(r.realized_profit for r in realizations) == pytest.approx(5 * (130.0 - 110.0))
+
+
+@pytest.mark.asyncio
+async def test_back_dated_transaction_rebuilds_lots(get_test_db_session: AsyncSession):
+    """
+    A transaction dated before the latest one re-matches later sells against the ledger.
+    """
+    session = get_test_db_session
+    stock_info = StockInfo(ticker="LOT")
+    session.add(stock_info)
+    await session.commit()
+    await session.refresh(stock_info)
+    assert stock_info.id is not None
+    await lot_service.set_cost_basis_method(session=session, user_id=1, method=CostBasisMethod.FIFO)
+
+    for day, transaction_type, price, quantity in [
+        (2, "매수", 120.0, 10),
+        (3, "매도", 130.0, 5),
+        (1, "매수", 100.0, 10),
+    ]:
+        await stock_service.create_stock_transaction(
+            session=session,
+            transaction=StockTransactionCreate(
+                user_id=1,
+                stock_info_id=stock_info.id,
+                transaction_date=datetime(2025, 1, day, tzinfo=timezone.utc),
+                brokerage="BrokerA",
+                transaction_type=transaction_type,
+                ticker="LOT",
+                transaction_price=price,
+                quantity=quantity,
+                total_amount=price * quantity,
+            ),
+        )
+
+    lots = await lot_service.get_open_lots(session=session, user_id=1, ticker="LOT")
+    # The Jan 3 sell now consumes the back-dated Jan 1 lot
+    assert [(lot.unit_cost, lot.remaining_quantity) for lot in lots] == [(100.0, 5), (120.0, 10)]
+
+    holding = await stock_service.get_user_stock_holding_detail_by_ticker(session=session, user_id=1, ticker="LOT")
+    assert holding is not None
+    assert holding.holding_quantity == 15
+    assert holding.total_buy_amount == pytest.approx(500.0 + 1200.0)
+
+    rows = await lot_service.get_user_profit_loss(session=session, user_id=1)
+    assert rows[0].realized_profit == pytest.approx(5 * (130.0 - 100.0))
+
+
+@pytest.mark.asyncio
+async def test_profit_loss_endpoint_reports_closed_positions(client: AsyncClient, get_test_db_session: AsyncSession):
+    """
+    A fully sold position has no holding but still reports its realized profit.
+    """
+    session = get_test_db_session
+    stock_info = StockInfo(ticker="PNL")
+    session.add(stock_info)
+    await session.commit()
+    await session.refresh(stock_info)
+
+    for transaction_type, price in [("매수", 10.0), ("매도", 12.0)]:
+        payload = {
+            "user_id": 7,
+            "stock_info_id": stock_info.id,
+            "transaction_date": "2025-01-02T00:00:00Z",
+            "brokerage": "BrokerA",
+            "transaction_type": transaction_type,
+            "ticker": "PNL",
+            "transaction_price": price,
+            "quantity": 3,
+            "total_amount": price * 3,
+        }
+        response = await client.post("/stock/transaction/", json=payload)
+        assert response.status_code == 200
+
+    response = await client.get("/stock/pnl/user/7")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["holding_quantity"] == 0
+    assert data[0]["realized_profit"] == pytest.approx(6.0)
+
+    response = await client.put("/stock/cost-basis/user/7", json={"cost_basis_method": "fifo"})
+    assert response.status_code == 200
+    assert response.json()["cost_basis_method"] == "fifo"
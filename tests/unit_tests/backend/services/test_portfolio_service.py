@@ -0,0 +1,81 @@
+"""
+Tests for the portfolio summary service.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.models.holding import StockHoldingDetail
+from src.backend.models.price import StockPrice
+from src.backend.models.stock import StockInfo
+
+
+@pytest.mark.asyncio
+async def test_portfolio_summary_uses_latest_close(client: AsyncClient, get_test_db_session: AsyncSession):
+    """
+    Positions are valued at their latest close and weighted within their currency, and
+    only a single-currency portfolio has top-level totals.
+    """
+    session = get_test_db_session
+    usd_a = StockInfo(ticker="AAA", currency="USD")
+    usd_b = StockInfo(ticker="BBB", currency="USD")
+    krw = StockInfo(ticker="KKK", currency="KRW")
+    session.add_all([usd_a, usd_b, krw])
+    await session.commit()
+
+    for stock, closes in [(usd_a, [9.0, 12.0]), (usd_b, [20.0, 30.0])]:
+        for day, close in enumerate(closes, start=1):
+            session.add(
+                StockPrice(
+                    stock_info_id=stock.id,
+                    time=datetime(2025, 1, day, tzinfo=timezone.utc),
+                    open=close,
+                    high=close,
+                    low=close,
+                    close=close,
+                    volume=100,
+                )
+            )
+    holdings = {
+        stock.ticker: StockHoldingDetail(
+            user_id=3,
+            stock_info_id=stock.id,
+            ticker=stock.ticker,
+            holding_quantity=quantity,
+            average_buy_price=invested / quantity,
+            total_buy_amount=invested,
+        )
+        for stock, quantity, invested in [(usd_a, 10, 100.0), (usd_b, 1, 25.0), (krw, 2, 1000.0)]
+    }
+    session.add_all(holdings.values())
+    await session.commit()
+
+    response = await client.get("/stock/portfolio/3/summary")
+    assert response.status_code == 200
+    data = response.json()
+
+    positions = {p["ticker"]: p for p in data["positions"]}
+    assert positions["AAA"]["market_value"] == pytest.approx(120.0)
+    assert positions["AAA"]["weight"] == pytest.approx(120.0 / 150.0)
+    assert positions["BBB"]["profit"] == pytest.approx(5.0)
+    # No stored price: valued at cost
+    assert positions["KKK"]["priced"] is False
+    assert positions["KKK"]["weight"] == pytest.approx(1.0)
+
+    currencies = {c["currency"]: c for c in data["currencies"]}
+    assert currencies["USD"]["invested_amount"] == pytest.approx(125.0)
+    assert currencies["USD"]["profit_percent"] == pytest.approx(20.0)
+    # USD and KRW amounts are not added up
+    assert data["currency"] is None
+    assert data["market_value"] is None
+    assert data["profit_percent"] is None
+
+    await session.delete(holdings["KKK"])
+    await session.commit()
+    data = (await client.get("/stock/portfolio/3/summary")).json()
+    assert data["currency"] == "USD"
+    assert data["market_value"] == pytest.approx(150.0)
+    assert data["profit_percent"] == pytest.approx(20.0)
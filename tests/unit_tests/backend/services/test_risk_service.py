@@ -0,0 +1,110 @@
+"""
+Tests for the Monte Carlo Value-at-Risk service.
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.config import settings
+from src.backend.models.holding import StockHoldingDetail
+from src.backend.services import process_pool, risk_service, stock_service
+
+
+def test_tail_risk_of_known_distribution():
+    """
+    VaR and expected shortfall of standard normal P&L match their closed forms.
+    """
+    pnl = np.random.default_rng(0).standard_normal(1_000_000)
+    value_at_risk, expected_shortfall = risk_service.tail_risk(pnl, 0.99)
+    assert value_at_risk == pytest.approx(2.326, abs=0.02)
+    assert expected_shortfall == pytest.approx(2.665, abs=0.02)
+
+
+def test_covariance_factor_handles_singular_covariance():
+    """
+    Perfectly correlated assets still get a factor that reproduces the covariance.
+    """
+    covariance = np.array([[1.0, 1.0], [1.0, 1.0]])
+    factor = risk_service.covariance_factor(covariance)
+    assert factor @ factor.T == pytest.approx(covariance)
+
+
+def random_closes(seed: int) -> np.ndarray:
+    return 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, 120)))
+
+
+async def _hold(session: AsyncSession, df: pd.DataFrame, ticker: str, currency: str, quantity: float) -> None:
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=df, ticker=ticker, currency=currency)
+    stock_info = await stock_service.get_stock_info_by_ticker(session=session, ticker=ticker)
+    assert stock_info is not None
+    session.add(
+        StockHoldingDetail(
+            user_id=7,
+            stock_info_id=stock_info.id,
+            ticker=ticker,
+            holding_quantity=quantity,
+            average_buy_price=100.0,
+            total_buy_amount=100.0 * quantity,
+        )
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_value_at_risk_is_reproducible_across_worker_counts(
+    client: AsyncClient,
+    get_test_db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    price_frame: Callable[..., pd.DataFrame],
+):
+    """
+    A seeded estimate does not depend on how many processes simulate the chunks.
+    """
+    session = get_test_db_session
+    await _hold(session, price_frame(random_closes(1), start="2024-01-01"), "VA", "USD", 10)
+    await _hold(session, price_frame(random_closes(2), start="2024-01-01"), "VB", "USD", 5)
+    params = {"paths": 120_000, "seed": 42, "confidence": 0.95}
+    try:
+        monkeypatch.setattr(settings, "PROCESS_POOL_WORKERS", 1)
+        single = await risk_service.get_value_at_risk(session=session, user_id=7, **params)
+        process_pool.shutdown_pool()
+        risk_service.invalidate()
+
+        monkeypatch.setattr(settings, "PROCESS_POOL_WORKERS", 2)
+        response = await client.get("/stock/portfolio/7/var", params=params)
+    finally:
+        process_pool.shutdown_pool()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["value_at_risk"] == pytest.approx(single.value_at_risk)
+    assert data["expected_shortfall"] == pytest.approx(single.expected_shortfall)
+    assert data["expected_shortfall"] >= data["value_at_risk"] > 0
+    assert data["observations"] == 119
+    assert sum(p["weight"] for p in data["positions"]) == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_value_at_risk_requires_a_currency_for_mixed_holdings(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Holdings in several currencies cannot be summed without choosing one.
+    """
+    await _hold(get_test_db_session, price_frame(random_closes(3), start="2024-01-01"), "VU", "USD", 1)
+    await _hold(get_test_db_session, price_frame(random_closes(4), start="2024-01-01"), "VK", "KRW", 1)
+
+    response = await client.get("/stock/portfolio/7/var", params={"paths": 1000})
+    assert response.status_code == 400
+
+    try:
+        response = await client.get("/stock/portfolio/7/var", params={"paths": 1000, "currency": "KRW"})
+    finally:
+        process_pool.shutdown_pool()
+    assert response.status_code == 200
+    assert [p["ticker"] for p in response.json()["positions"]] == ["VK"]
@@ -0,0 +1,82 @@
+"""
+Tests for the rolling statistics service.
+"""
+
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.services import rolling_stats_service, stock_service
+
+
+@pytest.mark.asyncio
+async def test_upsert_maintains_trailing_window_stats(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    The statistics follow the trailing 252 bars as bars are appended, and back-dated bars outside
+    the window leave them untouched.
+    """
+    session = get_test_db_session
+    dates = pd.date_range("2024-01-01", periods=300, freq="D", tz="UTC")
+    closes = np.arange(1.0, 301.0)
+    volumes = np.arange(300) * 10
+    frame = price_frame(closes, index=dates, High=closes + 1, Low=closes - 1, Volume=volumes)
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=frame.iloc[50:250], ticker="ROLL")
+
+    stats = await rolling_stats_service.get_rolling_stats(session=session, tickers=["ROLL"])
+    assert stats[0].bar_count == 200
+    assert stats[0].sma_200 == pytest.approx(closes[50:250].mean())
+    assert stats[0].avg_volume_20d == pytest.approx(volumes[230:250].mean())
+
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=frame.iloc[250:], ticker="ROLL")
+    response = await client.get("/stock/rolling-stats/", params={"tickers": "ROLL"})
+    data = response.json()[0]
+    assert data["bar_count"] == 250
+    assert data["high_52w"] == pytest.approx(301.0)
+    assert data["low_52w"] == pytest.approx(50.0)
+    assert data["sma_200"] == pytest.approx(closes[100:].mean())
+    assert data["distance_from_sma_200_percent"] == pytest.approx((300.0 / closes[100:].mean() - 1) * 100)
+
+    # Two older bars complete the 52-week window; bars older than it are ignored
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=frame.iloc[:50], ticker="ROLL")
+    stats = await rolling_stats_service.get_rolling_stats(session=session, tickers=["ROLL"])
+    assert stats[0].bar_count == 252
+    assert stats[0].low_52w == pytest.approx(48.0)
+    window_start = stats[0].window_start
+
+    await stock_service.purge_stock_prices(
+        session=session, start=datetime(2024, 1, 1, tzinfo=timezone.utc), end=datetime(2024, 2, 1, tzinfo=timezone.utc)
+    )
+    stats = await rolling_stats_service.get_rolling_stats(session=session, tickers=["ROLL"])
+    assert stats[0].window_start == window_start
+
+
+@pytest.mark.asyncio
+async def test_purge_inside_window_refreshes_stats(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Removing bars from the trailing window recomputes the statistics, and removing all bars drops them.
+    """
+    session = get_test_db_session
+    closes = np.arange(1.0, 31.0)
+    frame = price_frame(closes, start="2025-01-01", High=closes + 1, Low=closes - 1, Volume=100)
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=frame, ticker="PURGE")
+
+    await stock_service.purge_stock_prices(
+        session=session, start=datetime(2025, 1, 1, tzinfo=timezone.utc), end=datetime(2025, 1, 11, tzinfo=timezone.utc)
+    )
+    stats = await rolling_stats_service.get_rolling_stats(session=session)
+    assert stats[0].bar_count == 20
+    assert stats[0].low_52w == pytest.approx(10.0)
+
+    await stock_service.purge_stock_prices(
+        session=session, start=datetime(2025, 1, 1, tzinfo=timezone.utc), end=datetime(2025, 3, 1, tzinfo=timezone.utc)
+    )
+    assert await rolling_stats_service.get_rolling_stats(session=session) == []
@@ -0,0 +1,86 @@
+"""
+Tests for the stock screener service.
+"""
+
+from collections.abc import Callable
+
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.services import screener_service, stock_service
+
+
+def test_compile_filter_respects_precedence_and_whitelist():
+    """
+    AND binds tighter than OR, keywords are case-insensitive, and only price columns are allowed.
+    """
+    condition = screener_service.compile_filter("volume > 10 or Change_Percent >= -2.5 and NOT close = open")
+    sql = str(condition.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    assert sql == (
+        "stockprice.volume > 10.0 OR stockprice.change_percent >= -2.5 AND stockprice.close != stockprice.open"
+    )
+
+    for invalid in ["", "ticker = 1", "volume >", "volume > 1 AND", "(close > 1", "close > 1; DROP TABLE x"]:
+        with pytest.raises(ValueError):
+            screener_service.compile_filter(invalid)
+
+
+def test_compile_filter_bounds_nesting():
+    """
+    Deep nesting that fits the length limit is rejected as invalid instead of exhausting the stack.
+    """
+    depth = screener_service.MAX_NESTING
+    assert screener_service.compile_filter("(" * depth + "close > 1" + ")" * depth) is not None
+    assert screener_service.compile_filter("NOT " * depth + "close > 1") is not None
+
+    for too_deep in [
+        "(" * 490 + "close > 1" + ")" * 490,
+        "NOT " * 240 + "close > 1",
+        "(NOT " * 17 + "close > 1" + ")" * 17,
+    ]:
+        assert len(too_deep) <= screener_service.MAX_FILTER_LENGTH
+        with pytest.raises(ValueError, match="levels"):
+            screener_service.compile_filter(too_deep)
+
+
+@pytest.mark.asyncio
+async def test_screener_endpoint_returns_matching_bars(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Only bars on the requested day that satisfy every condition are returned.
+    """
+    frames = {
+        "UP": ([100.0, 110.0, 111.0], [5000, 5000, 5000]),
+        "THIN": ([100.0, 110.0, 130.0], [10, 10, 10]),
+        "FLAT": ([100.0, 100.0, 120.0], [5000, 5000, 5000]),
+    }
+    for ticker, (closes, volumes) in frames.items():
+        df = price_frame(closes, Volume=volumes)
+        await stock_service.upsert_stocks_from_dataframe(session=get_test_db_session, df=df, ticker=ticker)
+
+    params = {"filter": "change_percent > 5 AND volume > 1000", "on": "2025-01-02"}
+    response = await client.get("/stock/screener/", params=params)
+    assert response.status_code == 200
+    assert [(m["ticker"], m["change_percent"]) for m in response.json()] == [("UP", pytest.approx(10.0))]
+
+    params = {"filter": "change_percent > 5", "start": "2025-01-01T00:00:00Z", "end": "2025-01-04T00:00:00Z"}
+    response = await client.get("/stock/screener/", params=params)
+    assert [(m["ticker"], m["time"][:10]) for m in response.json()] == [
+        ("THIN", "2025-01-02"),
+        ("UP", "2025-01-02"),
+        ("FLAT", "2025-01-03"),
+        ("THIN", "2025-01-03"),
+    ]
+
+    response = await client.get("/stock/screener/", params={"filter": "name = 1", "on": "2025-01-02"})
+    assert response.status_code == 400
+    response = await client.get("/stock/screener/", params={"filter": "volume > 1"})
+    assert response.status_code == 400
+    response = await client.get(
+        "/stock/screener/", params={"filter": "(" * 490 + "close > 1" + ")" * 490, "on": "2025-01-02"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,79 @@
+"""
+Tests for the holdings snapshot service.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.models.snapshot import StockHoldingSnapshot
+from src.backend.models.stock import StockInfo
+from src.backend.models.transaction import StockTransactionCreate
+from src.backend.services import snapshot_service, stock_service
+
+
+async def create_transaction(
+    session: AsyncSession, stock_info_id: int, when: datetime, transaction_type: str, price: float, quantity: int
+) -> None:
+    """Writes a transaction for user 1 through the service layer."""
+    await stock_service.create_stock_transaction(
+        session=session,
+        transaction=StockTransactionCreate(
+            user_id=1,
+            stock_info_id=stock_info_id,
+            transaction_date=when,
+            brokerage="BrokerA",
+            transaction_type=transaction_type,
+            ticker="SNAP",
+            transaction_price=price,
+            quantity=quantity,
+            total_amount=price * quantity,
+        ),
+    )
+
+
+async def snapshot_periods(session: AsyncSession) -> list[tuple[str, int]]:
+    """Returns (period_end date, holding_quantity) for every stored snapshot."""
+    result = await session.execute(select(StockHoldingSnapshot))
+    snapshots = sorted(result.scalars().all(), key=lambda s: s.period_end)
+    return [(s.period_end.strftime("%Y-%m-%d"), s.holding_quantity) for s in snapshots]
+
+
+@pytest.mark.asyncio
+async def test_as_of_query_uses_snapshots_and_back_dated_inserts_invalidate(
+    get_test_db_session: AsyncSession, client: AsyncClient
+):
+    """
+    Completed months are checkpointed, and a back-dated transaction rewrites every later checkpoint.
+    """
+    session = get_test_db_session
+    stock_info = StockInfo(ticker="SNAP")
+    session.add(stock_info)
+    await session.commit()
+    await session.refresh(stock_info)
+    assert stock_info.id is not None
+
+    await create_transaction(session, stock_info.id, datetime(2025, 1, 10, tzinfo=timezone.utc), "매수", 10.0, 10)
+    await create_transaction(session, stock_info.id, datetime(2025, 3, 5, tzinfo=timezone.utc), "매도", 12.0, 4)
+    assert await snapshot_periods(session) == [("2025-02-01", 10), ("2025-04-01", 6)]
+
+    holdings = await snapshot_service.get_holdings_as_of(
+        session=session, user_id=1, as_of=datetime(2025, 3, 1, tzinfo=timezone.utc)
+    )
+    assert [(h.ticker, h.holding_quantity) for h in holdings] == [("SNAP", 10)]
+
+    # Back-dated buy in February: the April checkpoint must include it
+    await create_transaction(session, stock_info.id, datetime(2025, 2, 20, tzinfo=timezone.utc), "매수", 11.0, 5)
+    assert await snapshot_periods(session) == [("2025-02-01", 10), ("2025-03-01", 15), ("2025-04-01", 11)]
+
+    response = await client.get("/stock/holding/user/1/as-of/2025-03-05")
+    assert response.status_code == 200
+    data = response.json()
+    assert data[0]["holding_quantity"] == 11
+    assert data[0]["realized_profit"] == pytest.approx(4 * (12.0 - 155.0 / 15))
+
+    response = await client.get("/stock/holding/user/1/as-of/2024-12-31")
+    assert response.json() == []
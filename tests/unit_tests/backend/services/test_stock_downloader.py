@@ -95,3 +95,20 @@ def test_download_scenarios(mock_yf_download: MagicMock, tmp_metadata_file: Path
     with open(tmp_metadata_file, encoding="utf-8") as f:
         metadata = json.load(f)
     assert metadata["SOXL"] == "2025-08-22"
+
+
+@patch("yfinance.download")
+def test_download_skips_ranges_without_sessions(mock_yf_download: MagicMock, tmp_metadata_file: Path):
+    """
+    거래일이 없는 구간은 요청하지 않고, 다음 다운로드는 다음 거래일부터 시작합니다.
+    """
+    tmp_metadata_file.write_text(json.dumps({"AAPL": "2025-07-03"}), encoding="utf-8")
+    downloader = StockDownloader(metadata_path=str(tmp_metadata_file))
+
+    # 7월 4일(휴장)과 주말만 남은 경우
+    assert downloader.download("AAPL", start_date="2025-01-01", end_date="2025-07-06", market="NASDAQ") is None
+    mock_yf_download.assert_not_called()
+
+    mock_yf_download.return_value = create_mock_data("2025-07-07", "2025-07-08")
+    downloader.download("AAPL", start_date="2025-01-01", end_date="2025-07-08", market="NASDAQ")
+    mock_yf_download.assert_called_once_with("AAPL", start="2025-07-07", end="2025-07-09", auto_adjust=True)
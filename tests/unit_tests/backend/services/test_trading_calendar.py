@@ -0,0 +1,59 @@
+"""
+Tests for the exchange trading calendars.
+"""
+
+from datetime import date
+
+from src.backend.services import trading_calendar
+
+
+def test_us_calendar_closes_on_exchange_holidays():
+    """
+    NYSE holidays, including Good Friday and observed dates, are not sessions.
+    """
+    holidays = trading_calendar.us_holidays(2025)
+    assert date(2025, 4, 18) in holidays  # Good Friday
+    assert date(2025, 11, 27) in holidays  # Thanksgiving
+    assert date(2026, 7, 3) in trading_calendar.us_holidays(2026)  # July 4th on a Saturday
+    # New Year's Day 2022 fell on a Saturday and was not observed
+    assert date(2021, 12, 31) not in trading_calendar.us_holidays(2021)
+
+    calendar = trading_calendar.get_calendar("NASDAQ")
+    assert len(calendar.sessions(date(2025, 1, 1), date(2025, 12, 31))) == 251
+    assert calendar.next_session(date(2025, 7, 4)) == date(2025, 7, 7)
+    assert not calendar.has_session(date(2025, 7, 4), date(2025, 7, 6))
+
+
+def test_krx_calendar_closes_on_lunar_and_substitute_holidays():
+    """
+    Seollal, Chuseok and Buddha's Birthday close the Korea Exchange, with substitute holidays for
+    weekends and overlaps, and the year-end closing moves back from a weekend.
+    """
+    holidays = trading_calendar.krx_holidays(2025)
+    assert {date(2025, 1, 28), date(2025, 1, 29), date(2025, 1, 30)} <= holidays  # Seollal
+    assert {date(2025, 10, 6), date(2025, 10, 7), date(2025, 10, 8)} <= holidays  # Chuseok, substitute for Sunday
+    assert date(2025, 5, 6) in holidays  # Buddha's Birthday on Children's Day
+    assert date(2025, 3, 3) in holidays  # Independence Movement Day on a Saturday
+    assert date(2025, 6, 3) in holidays  # Presidential election
+    assert date(2017, 10, 6) in trading_calendar.krx_holidays(2017)  # Chuseok overlapping Oct 3
+    assert date(2018, 2, 19) not in trading_calendar.krx_holidays(2018)  # Seollal on Thu-Sat has no substitute
+    assert date(2023, 12, 29) in trading_calendar.krx_holidays(2023)
+
+    calendar = trading_calendar.get_calendar("KOSPI")
+    assert len(calendar.sessions(date(2024, 1, 1), date(2024, 12, 31))) == 244
+    assert calendar.next_session(date(2025, 10, 2)) == date(2025, 10, 2)
+    assert calendar.next_session(date(2025, 10, 3)) == date(2025, 10, 10)
+
+
+def test_unknown_markets_use_weekdays():
+    """
+    Markets without a calendar only skip weekends.
+    """
+    calendar = trading_calendar.get_calendar("UNLISTED")
+    assert calendar is trading_calendar.WEEKDAYS
+    assert calendar.is_session(date(2025, 12, 25))
+    assert not calendar.is_session(date(2025, 12, 27))
+    assert trading_calendar.get_calendar(" kospi ").sessions(date(2025, 2, 28), date(2025, 3, 4)).tolist() == [
+        date(2025, 2, 28),
+        date(2025, 3, 4),
+    ]
@@ -2,14 +2,25 @@
 Tests for database initialization and session management.
 """
 
+import itertools
+from datetime import datetime, timezone
+
 import pytest
 import pytest_asyncio
-from sqlalchemy import inspect
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.types import DateTime, Float, String
-from sqlmodel import SQLModel
+from sqlmodel import SQLModel, select
 
-from src.backend.database import get_db, init_db
+from src.backend import database
+from src.backend.config import settings
+from src.backend.database import after_commit, create_engine, get_db, get_read_db, init_db, unit_of_work
+from src.backend.models.holding import StockHoldingDetail
+from src.backend.models.stock import StockInfo
+from src.backend.models.transaction import StockTransaction, StockTransactionCreate
+from src.backend.services import lot_service, stock_service
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -145,3 +156,127 @@ async def test_get_db_yields_async_session() -> None:
     async for session in get_db():
         assert isinstance(session, AsyncSession)
         break
+
+
+@pytest.mark.asyncio
+async def test_create_engine_applies_profile(tmp_path):
+    """
+    Tests that engines get the pool settings and SQLite pragmas of the engine profile.
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}", profile=settings)
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+            assert (await conn.exec_driver_sql("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert (await conn.exec_driver_sql("PRAGMA cache_size")).scalar() == settings.SQLITE_CACHE_SIZE
+        assert engine.pool.size() == settings.DB_POOL_SIZE
+        assert engine.echo is False
+    finally:
+        await engine.dispose()
+
+    profile = settings.model_copy(update={"SQLITE_JOURNAL_MODE": None, "DB_POOL_SIZE": 2})
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'default.db'}", profile=profile)
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "delete"
+        assert engine.pool.size() == 2
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_read_sessions_rotate_over_replicas_and_stick_to_primary(
+    create_test_engine_fixture: AsyncEngine, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Tests that reads rotate over the replicas, unless the request already has a read-write session.
+    """
+    replicas = [
+        async_sessionmaker(bind=create_test_engine_fixture, class_=AsyncSession, info={"replica": True, "name": name})
+        for name in ("a", "b")
+    ]
+    monkeypatch.setattr(database, "replica_session_makers", replicas)
+    monkeypatch.setattr(database, "_next_replica", itertools.cycle(replicas))
+
+    names = []
+    for _ in range(3):
+        async for session in get_read_db():
+            assert database.is_replica(session)
+            names.append(session.info["name"])
+    assert names == ["a", "b", "a"]
+
+    app = FastAPI()
+
+    @app.get("/sessions")
+    async def sessions(
+        db: AsyncSession = Depends(get_db), read_db: AsyncSession = Depends(get_read_db)
+    ) -> dict[str, bool]:
+        return {"same": db is read_db, "replica": database.is_replica(read_db)}
+
+    @app.get("/read")
+    async def read(read_db: AsyncSession = Depends(get_read_db)) -> dict[str, bool]:
+        return {"replica": database.is_replica(read_db)}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/sessions")).json() == {"same": True, "replica": False}
+        assert (await client.get("/read")).json() == {"replica": True}
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_commits_once_and_rolls_back_on_error(
+    create_test_engine_fixture: AsyncEngine, get_test_db_session: AsyncSession
+):
+    """
+    Tests that a multi-step write commits once, runs its after-commit callbacks only then,
+    and leaves nothing behind when the block raises.
+    """
+    session_maker = async_sessionmaker(bind=create_test_engine_fixture, class_=AsyncSession, expire_on_commit=False)
+    commits: list[str] = []
+
+    def on_commit(conn) -> None:
+        commits.append("commit")
+
+    event.listen(create_test_engine_fixture.sync_engine, "commit", on_commit)
+
+    async def buy(session: AsyncSession, stock_info_id: int) -> None:
+        transaction = StockTransactionCreate(
+            user_id=1,
+            stock_info_id=stock_info_id,
+            transaction_date=datetime(2025, 1, 2, tzinfo=timezone.utc),
+            brokerage="BrokerA",
+            transaction_type=lot_service.BUY,
+            ticker="UOW",
+            transaction_price=10.0,
+            quantity=3,
+            total_amount=30.0,
+        )
+        await stock_service.create_stock_transaction(session=session, transaction=transaction)
+
+    try:
+        calls: list[str] = []
+        async with unit_of_work(session_maker) as session:
+            stock_info = await stock_service.get_or_create_stock_info(
+                session=session, ticker="UOW", stock_info_data={"ticker": "UOW"}
+            )
+            assert stock_info.id is not None
+            stock_info_id = stock_info.id
+            await buy(session, stock_info_id)
+            after_commit(session, lambda: calls.append("after"))
+            assert calls == [] and commits == []
+        assert commits == ["commit"]
+        assert calls == ["after"]
+
+        with pytest.raises(RuntimeError):
+            async with unit_of_work(session_maker) as session:
+                await buy(session, stock_info_id)
+                after_commit(session, lambda: calls.append("discarded"))
+                raise RuntimeError("fail after the writes")
+        assert calls == ["after"]
+    finally:
+        event.remove(create_test_engine_fixture.sync_engine, "commit", on_commit)
+
+    session = get_test_db_session
+    assert len((await session.execute(select(StockInfo))).scalars().all()) == 1
+    assert len((await session.execute(select(StockTransaction))).scalars().all()) == 1
+    holding = (await session.execute(select(StockHoldingDetail))).scalar_one()
+    assert holding.holding_quantity == 3
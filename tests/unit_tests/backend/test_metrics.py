@@ -0,0 +1,135 @@
+"""
+Tests for the Prometheus metrics and the /metrics endpoint.
+"""
+
+from collections.abc import Callable
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend import metrics
+from src.backend.database import create_engine
+from src.backend.services import stock_service
+
+
+def test_histogram_renders_cumulative_buckets():
+    """
+    Observations land in cumulative `le` buckets with their sum and count.
+    """
+    registry: list = []
+    histogram = metrics.Histogram("job_seconds", "Job time.", ("job",), buckets=(0.1, 1.0), registry=registry)
+    counter = metrics.Counter("jobs_total", "Jobs run.", registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, job='a"b')
+    counter.inc(2)
+
+    assert metrics.render(registry).splitlines() == [
+        "# HELP job_seconds Job time.",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{job="a\\"b",le="0.1"} 2',
+        'job_seconds_bucket{job="a\\"b",le="1"} 3',
+        'job_seconds_bucket{job="a\\"b",le="+Inf"} 4',
+        'job_seconds_sum{job="a\\"b"} 3.65',
+        'job_seconds_count{job="a\\"b"} 4',
+        "# HELP jobs_total Jobs run.",
+        "# TYPE jobs_total counter",
+        "jobs_total 2",
+    ]
+    with pytest.raises(ValueError):
+        histogram.observe(1.0)
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_and_ingestion(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Requests are recorded under their route template, and committed ingests count their rows.
+    """
+    route = {"method": "GET", "route": "/stock/info/ticker/{ticker}", "status": "404"}
+    requests_before = metrics.HTTP_REQUEST_DURATION.count(**route)
+    inserted_before = metrics.INGEST_ROWS_INSERTED.value()
+    skipped_before = metrics.INGEST_ROWS_SKIPPED.value()
+
+    assert (await client.get("/stock/info/ticker/NONE")).status_code == 404
+    assert metrics.HTTP_REQUEST_DURATION.count(**route) == requests_before + 1
+    assert metrics.HTTP_REQUESTS_IN_PROGRESS.value(method="GET") == 0
+
+    session = get_test_db_session
+    df = price_frame([1.0] * 4)
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=df.iloc[:3], ticker="MET")
+    assert metrics.INGEST_ROWS_INSERTED.value() == inserted_before  # not committed yet
+    await session.commit()
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=df, ticker="MET")
+    await session.commit()
+    assert metrics.INGEST_ROWS_INSERTED.value() == inserted_before + 4
+    assert metrics.INGEST_ROWS_SKIPPED.value() == skipped_before + 3
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/stock/info/ticker/{ticker}",status="404"}' in (
+        response.text
+    )
+    assert f"ingest_rows_inserted_total {inserted_before + 4:g}" in response.text
+
+
+@pytest.mark.asyncio
+async def test_pool_checkouts_are_timed(tmp_path):
+    """
+    Engines record how long each pool checkout waited and how many connections are in use.
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    checkouts_before = metrics.DB_POOL_CHECKOUT_WAIT.count()
+    in_use_before = metrics.DB_POOL_CHECKED_OUT.value()
+    try:
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+            assert metrics.DB_POOL_CHECKED_OUT.value() == in_use_before + 1
+        assert metrics.DB_POOL_CHECKOUT_WAIT.count() == checkouts_before + 1
+        assert metrics.DB_POOL_CHECKED_OUT.value() == in_use_before
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_downloads_of_unknown_tickers_share_one_label(
+    client: AsyncClient, get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    Downloads are timed per ticker only for stored tickers or ones that returned data.
+    """
+    await stock_service.upsert_stocks_from_dataframe(session=get_test_db_session, df=price_frame([1.0]), ticker="DLS")
+    await get_test_db_session.commit()
+    before = {ticker: metrics.DOWNLOAD_DURATION.count(ticker=ticker) for ticker in ("DLS", "DLN", "other")}
+    payload = {"start": "2025-01-01", "end": "2025-01-04"}
+
+    with patch("yfinance.download", side_effect=[pd.DataFrame(), price_frame([1.0, 2.0]), pd.DataFrame()]):
+        for ticker in ("DLS", "DLN", "NOSUCH"):
+            assert (await client.post("/stock/download", json={"ticker": ticker, **payload})).status_code == 200
+
+    after = {ticker: metrics.DOWNLOAD_DURATION.count(ticker=ticker) for ticker in before}
+    assert after == {ticker: n + 1 for ticker, n in before.items()}
+    assert metrics.DOWNLOAD_DURATION.count(ticker="NOSUCH") == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_http_methods_share_one_label(client: AsyncClient):
+    """
+    Requests with made-up methods are recorded under "other" instead of adding series.
+    """
+    route = {"method": "other", "route": "/stock/info/", "status": "405"}
+    requests_before = metrics.HTTP_REQUEST_DURATION.count(**route)
+
+    for method in ("X0RANDOM", "X1RANDOM", "X2RANDOM"):
+        assert (await client.request(method, "/stock/info/")).status_code == 405
+
+    assert metrics.HTTP_REQUEST_DURATION.count(**route) == requests_before + 3
+    assert metrics.HTTP_REQUESTS_IN_PROGRESS.value(method="other") == 0
+    assert "RANDOM" not in metrics.render()
@@ -0,0 +1,249 @@
+"""
+Tests for the schema migration runner and the indexes it maintains.
+"""
+
+import re
+import warnings
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timezone
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy.schema import CreateTable
+from sqlmodel import select
+
+from src.backend import partitioning
+from src.backend.config import settings
+from src.backend.migrations import MIGRATIONS, SchemaMigration, run_migrations
+from src.backend.models.stock import StockInfo
+from src.backend.services import screener_service, stock_service
+
+
+async def capture_statements(engine: AsyncEngine, call: Callable[[], Awaitable[Any]]) -> list[tuple[str, Any]]:
+    """Runs `call` and returns every (statement, parameters) pair it sent to the database."""
+    statements: list[tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        await call()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+async def explain(conn: AsyncConnection, statement: str, parameters: Any) -> str:
+    """Returns the query plan of a captured statement as text, for SQLite or PostgreSQL."""
+    if conn.dialect.name == "sqlite":
+        result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return "\n".join(str(row[-1]) for row in result.all())
+    # Tiny test tables are always cheaper to scan, so force the planner to consider the indexes
+    await conn.exec_driver_sql("SET enable_seqscan = off")
+    result = await conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+    return "\n".join(str(row[0]) for row in result.all())
+
+
+@pytest.mark.asyncio
+async def test_run_migrations_is_idempotent(create_test_engine_fixture: AsyncEngine, get_test_db_session):
+    """
+    Every migration is recorded once, and a second run applies nothing.
+    """
+    async with create_test_engine_fixture.begin() as conn:
+        first = await conn.run_sync(run_migrations)
+        second = await conn.run_sync(run_migrations)
+        versions = (await conn.execute(select(SchemaMigration.version))).scalars().all()
+
+    assert first == [m.version for m in MIGRATIONS]
+    assert second == []
+    assert sorted(versions) == [m.version for m in MIGRATIONS]
+
+
+@pytest.mark.asyncio
+async def test_migration_adds_indexes_to_existing_tables(create_test_engine_fixture: AsyncEngine, get_test_db_session):
+    """
+    A database created before the composite indexes existed gets them from the migration, and
+    loses the single-column time index they replace.
+    """
+    async with create_test_engine_fixture.begin() as conn:
+        await conn.execute(text("DROP INDEX ix_stocktransaction_user_stock_date"))
+        await conn.execute(text("DROP INDEX ix_stockholdingdetail_user_ticker"))
+        await conn.execute(text("DROP INDEX ix_stockprice_time_volume"))
+        await conn.execute(text("CREATE INDEX ix_stockprice_time ON stockprice (time)"))
+        await conn.run_sync(run_migrations)
+
+        def index_names(sync_conn) -> set[str]:
+            inspector = inspect(sync_conn)
+            names = {i["name"] for i in inspector.get_indexes("stocktransaction")}
+            names |= {i["name"] for i in inspector.get_indexes("stockholdingdetail")}
+            return names | {i["name"] for i in inspector.get_indexes("stockprice")}
+
+        names = await conn.run_sync(index_names)
+
+    assert "ix_stocktransaction_user_stock_date" in names
+    assert "ix_stockholdingdetail_user_ticker" in names
+    assert "ix_stockprice_time_volume" in names
+    assert "ix_stockprice_time" not in names
+
+
+@pytest.mark.asyncio
+async def test_service_queries_use_composite_indexes(
+    create_test_engine_fixture: AsyncEngine, get_test_db_session: AsyncSession
+):
+    """
+    The ledger replay and the holding lookup by ticker are planned on the composite indexes.
+    """
+    session = get_test_db_session
+    stock_info = StockInfo(ticker="PLAN")
+    session.add(stock_info)
+    await session.commit()
+    await session.refresh(stock_info)
+    assert stock_info.id is not None
+    stock_info_id = stock_info.id
+
+    ledger = await capture_statements(
+        create_test_engine_fixture,
+        lambda: stock_service._update_stock_holding_detail(
+            session=session, user_id=1, stock_info_id=stock_info_id, ticker="PLAN"
+        ),
+    )
+    holding = await capture_statements(
+        create_test_engine_fixture,
+        lambda: stock_service.get_user_stock_holding_detail_by_ticker(session=session, user_id=1, ticker="PLAN"),
+    )
+    await session.commit()
+
+    ledger_query = next(s for s in ledger if "FROM stocktransaction" in s[0] and "ORDER BY" in s[0])
+    holding_query = next(s for s in holding if "FROM stockholdingdetail" in s[0])
+    async with create_test_engine_fixture.connect() as conn:
+        assert "ix_stocktransaction_user_stock_date" in await explain(conn, *ledger_query)
+        assert "ix_stockholdingdetail_user_ticker" in await explain(conn, *holding_query)
+
+
+def index_scans(plan: str, dialect: str) -> set[str]:
+    """Returns the names of the indexes a SQLite or PostgreSQL plan reads."""
+    if dialect == "sqlite":
+        pattern = r"USING (?:COVERING )?INDEX (\w+)"
+    else:
+        pattern = r"(?:Index Scan using|Index Only Scan using|Bitmap Index Scan on) (\w+)"
+    return set(re.findall(pattern, plan))
+
+
+@pytest.mark.asyncio
+async def test_screener_query_uses_time_index(
+    create_test_engine_fixture: AsyncEngine,
+    get_test_db_session: AsyncSession,
+    price_frame: Callable[..., pd.DataFrame],
+):
+    """
+    A screen over one day of a populated, analyzed table is planned on a (time, ...) index
+    instead of scanning every bar.
+    """
+    session = get_test_db_session
+    rng = np.random.default_rng(0)
+    for i in range(20):
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 500)))
+        df = price_frame(closes, start="2023-01-01", Volume=rng.integers(1_000, 2_000_000, 500))
+        await stock_service.upsert_stocks_from_dataframe(session=session, df=df, ticker=f"SCR{i:02d}")
+    await session.commit()
+    async with create_test_engine_fixture.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+
+    statements = await capture_statements(
+        create_test_engine_fixture,
+        lambda: screener_service.screen(
+            session=session,
+            expression="change_percent > 5 AND volume > 1000",
+            start=datetime(2024, 1, 2, tzinfo=timezone.utc),
+            end=datetime(2024, 1, 3, tzinfo=timezone.utc),
+        ),
+    )
+    screen_query = next(s for s in statements if "FROM stockprice" in s[0])
+    async with create_test_engine_fixture.connect() as conn:
+        plan = await explain(conn, *screen_query)
+        indexes = index_scans(plan, conn.dialect.name)
+    assert indexes & {"ix_stockprice_time_change_percent", "ix_stockprice_time_volume"}, plan
+
+
+def test_partitions_cover_whole_periods():
+    """
+    Yearly and monthly partitions cover the requested days, across year boundaries.
+    """
+    yearly = partitioning.partitions_between(date(2023, 6, 1), date(2024, 1, 1), "year")
+    assert [(p.name, p.start, p.end) for p in yearly] == [
+        ("stockprice_p2023", date(2023, 1, 1), date(2024, 1, 1)),
+        ("stockprice_p2024", date(2024, 1, 1), date(2025, 1, 1)),
+    ]
+    monthly = partitioning.partitions_between(date(2024, 11, 15), date(2025, 1, 31), "month")
+    assert [p.name for p in monthly] == ["stockprice_p2024_11", "stockprice_p2024_12", "stockprice_p2025_01"]
+    assert monthly[1].end == date(2025, 1, 1)
+    assert partitioning._parse_partition("stockprice_p2024_12") == monthly[1]
+    assert partitioning._parse_partition("stockprice_legacy") is None
+
+
+def test_partitioned_table_ddl():
+    """
+    The partitioned stockprice is ranged on time, and its primary key includes the partition key.
+    """
+    with warnings.catch_warnings():
+        # Replacing the primary key must not trip SQLAlchemy's mismatched-key warning
+        warnings.simplefilter("error")
+        table = partitioning.partitioned_table()
+    ddl = str(CreateTable(table).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY RANGE (time)" in ddl
+    assert "PRIMARY KEY (id, time)" in ddl
+    assert "id SERIAL NOT NULL" in ddl
+    assert "UNIQUE (stock_info_id, time)" in ddl
+
+
+@pytest.mark.asyncio
+async def test_partitioning_is_ignored_outside_postgresql(
+    create_test_engine_fixture: AsyncEngine,
+    get_test_db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    price_frame: Callable[..., pd.DataFrame],
+):
+    """
+    Enabling partitioning leaves other databases with a plain stockprice table.
+    """
+    monkeypatch.setattr(settings, "STOCKPRICE_PARTITION_INTERVAL", "month")
+    async with create_test_engine_fixture.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            pytest.skip("checks the non-PostgreSQL path")
+        await conn.run_sync(run_migrations)
+        assert not await conn.run_sync(partitioning.create_partitioned_table)
+        assert await conn.run_sync(partitioning.ensure_partitions, date(2024, 1, 1), date(2025, 1, 1)) == []
+    df = price_frame([1.0, 1.0], start="2024-12-31")
+    assert await stock_service.upsert_stocks_from_dataframe(session=get_test_db_session, df=df, ticker="PART") == 2
+
+
+@pytest.mark.asyncio
+async def test_detached_partition_is_not_reused_silently(
+    create_test_engine_fixture: AsyncEngine, get_test_db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    A detached partition blocks storing its period with a clear error until it is re-attached.
+    """
+    monkeypatch.setattr(settings, "STOCKPRICE_PARTITION_INTERVAL", "year")
+    async with create_test_engine_fixture.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            pytest.skip("needs PostgreSQL partitioning")
+        await conn.execute(text("DROP TABLE stockprice CASCADE"))
+        assert await conn.run_sync(partitioning.create_partitioned_table)
+        assert await conn.run_sync(partitioning.ensure_partitions, date(2024, 1, 1), date(2024, 12, 31)) == [
+            "stockprice_p2024"
+        ]
+        assert await conn.run_sync(partitioning.detach_partitions, date(2025, 1, 1)) == ["stockprice_p2024"]
+
+        with pytest.raises(partitioning.DetachedPartitionError, match="stockprice_p2024"):
+            await conn.run_sync(partitioning.ensure_partitions, date(2024, 6, 1), date(2024, 6, 1))
+
+        await conn.run_sync(partitioning.attach_partition, "stockprice_p2024")
+        assert "stockprice_p2024" in await conn.run_sync(partitioning.attached_partitions)
+        assert await conn.run_sync(partitioning.ensure_partitions, date(2024, 6, 1), date(2024, 6, 1)) == []
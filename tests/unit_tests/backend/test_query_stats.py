@@ -0,0 +1,115 @@
+"""
+Tests for per-request SQL statement accounting.
+"""
+
+from collections.abc import Callable
+
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.backend.config import settings
+from src.backend.models.stock import StockInfo
+from src.backend.query_stats import (
+    QueryBudgetExceeded,
+    query_budget,
+    record_queries,
+    recorded,
+    statement_pattern,
+)
+from src.backend.services import stock_service
+
+
+async def store_prices(session: AsyncSession, df: pd.DataFrame, ticker: str) -> None:
+    await stock_service.upsert_stocks_from_dataframe(session=session, df=df, ticker=ticker)
+    await session.commit()
+
+
+def test_statement_pattern_collapses_in_lists():
+    """
+    Expanded IN lists of any length and extra whitespace map to one pattern.
+    """
+    assert statement_pattern("SELECT id FROM t\n WHERE id IN (?, ?, ?)") == "SELECT id FROM t WHERE id IN (?)"
+    assert statement_pattern("SELECT id FROM t WHERE id IN ($1, $2)") == "SELECT id FROM t WHERE id IN (?)"
+    assert statement_pattern("INSERT INTO t (a, b) VALUES (?, ?)") == "INSERT INTO t (a, b) VALUES (?)"
+
+
+@pytest.mark.asyncio
+async def test_query_budget_reports_repeated_statements(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    A per-row lookup repeats one statement pattern, which the budget rejects even when the
+    total count is within bounds.
+    """
+    session = get_test_db_session
+    for ticker in ("QA", "QB", "QC"):
+        await store_prices(session, price_frame([1.0, 1.0, 1.0]), ticker)
+
+    with query_budget(max_queries=1) as stats:
+        infos = (await session.execute(select(StockInfo))).scalars().all()
+    assert stats.count == 1 and len(infos) == 3
+
+    with pytest.raises(QueryBudgetExceeded, match="2 repeated statements"):
+        with query_budget(max_queries=10):
+            for info in infos:
+                await session.execute(select(StockInfo).where(StockInfo.id == info.id))
+
+    # Nested recorders both see the inner statements
+    with record_queries() as outer:
+        with record_queries() as inner:
+            await session.execute(select(StockInfo))
+        await session.execute(select(StockInfo))
+    assert (outer.count, inner.count) == (2, 1)
+    assert outer.duplicates == {statement_pattern(str(select(StockInfo).compile(session.bind))): 2}
+    assert outer.duration > 0
+
+    # Commits and driver calls that bypass the cursor events are counted as well
+    with record_queries() as stats:
+        async with recorded("COPY t (a, b) FROM STDIN"):
+            pass
+        await session.commit()
+    assert stats.patterns == {"COPY t (a, b) FROM STDIN": 1, "COMMIT": 1}
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_are_counted_and_leave_no_start_time(get_test_db_session: AsyncSession):
+    """
+    A statement that raises is counted, and its start time does not linger on the connection.
+    """
+    session = get_test_db_session
+    with record_queries() as stats:
+        with pytest.raises(OperationalError):
+            await session.execute(text("SELECT * FROM no_such_table"))
+    assert stats.patterns == {"SELECT * FROM no_such_table": 1}
+    assert "query_started" not in (await session.connection()).info
+
+
+@pytest.mark.asyncio
+async def test_debug_mode_adds_query_headers(
+    client: AsyncClient,
+    get_test_db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    price_frame: Callable[..., pd.DataFrame],
+):
+    """
+    In debug mode responses carry the request's statement count, DB time and repeats;
+    outside it they carry nothing.
+    """
+    await store_prices(get_test_db_session, price_frame([1.0, 1.0, 1.0]), "HDR")
+
+    response = await client.get("/stock/info/ticker/HDR")
+    assert "x-db-query-count" not in response.headers
+
+    monkeypatch.setattr(settings, "DEBUG", True)
+    with query_budget(max_queries=2):
+        response = await client.get("/stock/info/ticker/HDR")
+    assert response.status_code == 200
+    # The stock and its prices, loaded with selectinload
+    assert response.headers["x-db-query-count"] == "2"
+    assert response.headers["x-db-duplicate-queries"] == "0"
+    assert float(response.headers["x-db-query-time-ms"]) >= 0
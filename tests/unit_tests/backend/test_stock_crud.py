@@ -2,11 +2,16 @@
 Tests for the stock API CRUD operations.
 """
 
+from collections.abc import Callable
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.query_stats import query_budget
+from src.backend.services import stock_service
 
 
 @pytest.fixture
@@ -61,8 +66,9 @@ async def test_download_and_store(client: AsyncClient, mock_yf_download_fixture:
     assert response.status_code == 200
     assert response.json() == {"saved": 3}
 
-    # 2. Verify the data was saved correctly
-    response = await client.get(f"/stock/info/ticker/{ticker}")
+    # 2. Verify the data was saved correctly; the stock and its prices load in one statement each
+    with query_budget(max_queries=2):
+        response = await client.get(f"/stock/info/ticker/{ticker}")
     assert response.status_code == 200
     data = response.json()
     assert data["ticker"] == ticker
@@ -78,6 +84,33 @@ async def test_download_and_store(client: AsyncClient, mock_yf_download_fixture:
     assert response.json() == {"saved": 0}
 
 
+@pytest.mark.asyncio
+async def test_download_in_local_timezone_is_not_stored_twice(client: AsyncClient, mock_yf_download_fixture: MagicMock):
+    """
+    Bars converted to a local timezone are stored in UTC, so repeated downloads find them.
+    """
+    payload = {"ticker": "LOCAL", "start": "2025-01-01", "end": "2025-01-04", "timezone": "Asia/Seoul"}
+    assert (await client.post("/stock/download", json=payload)).json() == {"saved": 3}
+    assert (await client.post("/stock/download", json=payload)).json() == {"saved": 0}
+
+
+@pytest.mark.asyncio
+async def test_download_without_market_uses_the_stored_calendar(
+    client: AsyncClient, mock_yf_download_fixture: MagicMock
+):
+    """
+    A re-download that names no market skips the stored stock's exchange holidays.
+    """
+    payload = {"ticker": "005930.KS", "start": "2025-01-01", "end": "2025-01-04", "market": "KOSPI"}
+    assert (await client.post("/stock/download", json=payload)).json() == {"saved": 3}
+    calls = mock_yf_download_fixture.call_count
+
+    # 2025-01-28..30 is Seollal, a weekday holiday of the KRX
+    payload = {"ticker": "005930.KS", "start": "2025-01-28", "end": "2025-01-31"}
+    assert (await client.post("/stock/download", json=payload)).json() == {"saved": 0}
+    assert mock_yf_download_fixture.call_count == calls
+
+
 @pytest.mark.asyncio
 async def test_read_stock_info_by_id(client: AsyncClient, mock_yf_download_fixture: MagicMock):
     """
@@ -94,7 +127,8 @@ async def test_read_stock_info_by_id(client: AsyncClient, mock_yf_download_fixtu
     stock_info_id = response.json()["id"]
 
     # Read by ID
-    response = await client.get(f"/stock/info/id/{stock_info_id}")
+    with query_budget(max_queries=2):
+        response = await client.get(f"/stock/info/id/{stock_info_id}")
     assert response.status_code == 200
     data = response.json()
     assert data["id"] == stock_info_id
@@ -111,7 +145,8 @@ async def test_read_all_stock_infos(client: AsyncClient, mock_yf_download_fixtur
     await client.post("/stock/download", json={"ticker": "ALL1", "start": "2025-01-01", "end": "2025-01-02"})
     await client.post("/stock/download", json={"ticker": "ALL2", "start": "2025-01-01", "end": "2025-01-02"})
 
-    response = await client.get("/stock/info/")
+    with query_budget(max_queries=1):
+        response = await client.get("/stock/info/")
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, list)
@@ -178,3 +213,78 @@ async def test_read_nonexistent_stock(client: AsyncClient):
 
     response = await client.get("/stock/info/ticker/NONEXISTENT")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_delete_stock_info_removes_transactions_and_holdings(
+    client: AsyncClient, mock_yf_download_fixture: MagicMock
+):
+    """
+    Deleting a stock also removes its transactions and holdings instead of leaving them dangling.
+    """
+    ticker = "CASCADE"
+    await client.post("/stock/download", json={"ticker": ticker, "start": "2025-01-01", "end": "2025-01-04"})
+    stock_info_id = (await client.get(f"/stock/info/ticker/{ticker}")).json()["id"]
+    transaction = {
+        "user_id": 1,
+        "stock_info_id": stock_info_id,
+        "transaction_date": "2025-01-02T00:00:00Z",
+        "brokerage": "BrokerA",
+        "transaction_type": "매수",
+        "ticker": ticker,
+        "transaction_price": 2.2,
+        "quantity": 10,
+        "total_amount": 22.0,
+    }
+    # The lots, holding and snapshots are updated in place; only the user's cost basis method is read twice
+    with query_budget(max_queries=15, max_duplicates=1):
+        transaction_id = (await client.post("/stock/transaction/", json=transaction)).json()["id"]
+
+    response = await client.delete(f"/stock/info/{stock_info_id}")
+    assert response.status_code == 200
+
+    assert (await client.get(f"/stock/transaction/{transaction_id}")).status_code == 404
+    assert (await client.get("/stock/holding/user/1")).json() == []
+    assert (await client.get("/stock/pnl/user/1")).json() == []
+
+
+@pytest.mark.asyncio
+async def test_purge_stock_prices_by_time_range(client: AsyncClient, mock_yf_download_fixture: MagicMock):
+    """
+    Purging removes only the bars inside [start, end) and only for the requested tickers.
+    """
+    for ticker in ("PURGE1", "PURGE2"):
+        await client.post("/stock/download", json={"ticker": ticker, "start": "2025-01-01", "end": "2025-01-04"})
+
+    params = {"start": "2025-01-02T00:00:00Z", "end": "2025-01-03T00:00:00Z", "tickers": ["PURGE1"]}
+    response = await client.delete("/stock/price/", params=params)
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 1}
+
+    response = await client.delete("/stock/price/", params={"start": "2025-01-01", "end": "2025-01-02"})
+    assert response.json() == {"deleted": 2}
+
+    assert len((await client.get("/stock/info/ticker/PURGE1")).json()["prices"]) == 1
+    assert len((await client.get("/stock/info/ticker/PURGE2")).json()["prices"]) == 2
+
+    response = await client.delete("/stock/price/", params={"start": "2025-01-02", "end": "2025-01-01"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_repeated_bar_time_keeps_the_last_bar(
+    get_test_db_session: AsyncSession, price_frame: Callable[..., pd.DataFrame]
+):
+    """
+    A frame that repeats a time stores one bar for it, the last one, on every backend.
+    """
+    index = pd.DatetimeIndex(["2025-01-01", "2025-01-02", "2025-01-02"], tz="UTC")
+    saved = await stock_service.upsert_stocks_from_dataframe(
+        session=get_test_db_session, df=price_frame([1.0, 2.0, 3.0], index=index), ticker="REPEAT"
+    )
+    await get_test_db_session.commit()
+
+    assert saved == 2
+    stock = await stock_service.get_stock_info_by_ticker(session=get_test_db_session, ticker="REPEAT")
+    assert stock is not None
+    assert [price.close for price in stock.prices] == [1.0, 3.0]
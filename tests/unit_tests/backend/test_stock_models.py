@@ -285,8 +285,8 @@ async def test_stock_holding_detail_auto_update_on_transaction(session: AsyncSes
 
     assert holding_detail is not None
     assert holding_detail.holding_quantity == 15  # 20 - 5
-    assert holding_detail.total_buy_amount == 1550.0  # 2200 - 650
-    assert holding_detail.average_buy_price == pytest.approx(103.33333333333333)
+    assert holding_detail.total_buy_amount == pytest.approx(1650.0)  # 15 * 110, sells keep the average cost
+    assert holding_detail.average_buy_price == pytest.approx(110.0)
 
     # --- Scenario 4: Sell all remaining stock ---
     sell_transaction_2 = StockTransaction(
@@ -0,0 +1,62 @@
+"""
+Tests for the synthetic market and ledger data of the benchmarks.
+"""
+
+from collections import Counter
+
+import pandas as pd
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from benchmarks import synthetic
+from src.backend.services import lot_service, stock_service
+from src.backend.services.yf_adapter import df_to_stockbase
+
+
+def test_ohlcv_frame_is_deterministic_and_in_yfinance_shape():
+    """
+    The same seed yields the same bars, which `df_to_stockbase` converts one for one.
+    """
+    frame = synthetic.ohlcv_frame(250, seed=7, ticker="SYN")
+    pd.testing.assert_frame_equal(frame, synthetic.ohlcv_frame(250, seed=7, ticker="SYN"))
+    assert not frame.equals(synthetic.ohlcv_frame(250, seed=8, ticker="SYN"))
+
+    bars = frame.droplevel("Ticker", axis=1)
+    assert (bars["Low"] <= bars[["Open", "Close"]].min(axis=1)).all()
+    assert (bars["High"] >= bars[["Open", "Close"]].max(axis=1)).all()
+    assert (bars["Volume"] > 0).all()
+
+    records = df_to_stockbase(
+        frame, ticker="SYN", name=None, market=None, currency="USD", auto_adjust=True, timezone="UTC"
+    )
+    assert len(records) == 250
+    assert records[-1].close == pytest.approx(bars["Close"].iloc[-1])
+
+    # The bulk rows carry the same values as the converted records
+    rows = synthetic.price_rows(frame, stock_info_id=1)
+    for field in ("time", "open", "high", "low", "close", "volume", "previous_close", "change", "change_percent"):
+        assert [row[field] for row in rows] == pytest.approx([getattr(record, field) for record in records])
+
+
+@pytest.mark.asyncio
+async def test_populate_stores_consistent_ledgers(
+    create_test_engine_fixture: AsyncEngine, get_test_db_session: AsyncSession
+):
+    """
+    Every bar and transaction is stored, and each user's holdings match the ledger's net quantities.
+    """
+    session_maker = async_sessionmaker(bind=create_test_engine_fixture, class_=AsyncSession, expire_on_commit=False)
+    frames = synthetic.market_frames(2, 60, seed=3)
+
+    counts = await synthetic.populate(session_maker, frames, users=2, transactions_per_user=30, seed=3)
+
+    assert counts["bars"] == 120
+    assert counts["transactions"] == 60
+    for user_id in (1, 2):
+        transactions = await stock_service.get_user_stock_transactions(session=get_test_db_session, user_id=user_id)
+        net: Counter[str] = Counter()
+        for transaction in transactions:
+            sign = 1 if transaction.transaction_type == lot_service.BUY else -1
+            net[transaction.ticker] += sign * transaction.quantity
+        holdings = await stock_service.get_user_stock_holding_details(session=get_test_db_session, user_id=user_id)
+        assert {holding.ticker: holding.holding_quantity for holding in holdings} == +net